@@ -0,0 +1,194 @@
+# benchmarks/run.py
+# Benchmarks for the parse / PDF / summary / projection stages on synthetic transcripts.
+#
+#   python benchmarks/run.py                     # run everything, compare with baselines.json
+#   python benchmarks/run.py --sizes 1,1000      # quicker subset
+#   python benchmarks/run.py --save              # record the current timings as the baselines
+#
+# Each benchmark runs at 1, 1k and 100k documents. Large sizes cycle through a pool of distinct
+# generated documents so memory stays flat; timings are the best of --repeat runs (one run above
+# 1k documents; the 100k PDF case alone takes minutes). Exits 1 when
+# a benchmark is slower than its baseline by more than --tolerance, or falls below the speedup
+# it must keep over a reference implementation timed in the same run (see min_speedups).
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+# Run as a script from anywhere: the repo root provides utils, this directory provides synthetic
+sys.path[:0] = [path for path in (os.path.dirname(benchmarks_dir), benchmarks_dir) if path not in sys.path]
+from synthetic import generate_transcripts, transcript_pdf
+
+baselines_path = os.path.join(benchmarks_dir, 'baselines.json')
+default_sizes = (1, 1000, 100000)
+# Distinct documents generated per benchmark; larger sizes reuse them in order
+pool_size = 2000
+pdf_pool_size = 200
+
+def cycle(items: List, n: int) -> List:
+    return list(itertools.islice(itertools.cycle(items), n))
+
+def bench_parse_transcript(n: int) -> Callable[[], object]:
+    from utils.transcript_parser import parse_transcript
+    texts = cycle(generate_transcripts(min(n, pool_size), seed=1), n)
+    return lambda: [parse_transcript(text) for text in texts]
+
+def bench_reference_parse_transcript(n: int) -> Callable[[], object]:
+    # The original parser (benchmarks/reference_parser.py) on the same documents as parse_transcript
+    from reference_parser import parse_transcript
+    texts = cycle(generate_transcripts(min(n, pool_size), seed=1), n)
+    return lambda: [parse_transcript(text) for text in texts]
+
+def bench_extract_text_from_pdf(n: int) -> Callable[[], object]:
+    from utils.pdf_utils import extract_text_from_pdf
+    pdfs = cycle([transcript_pdf(text) for text in generate_transcripts(min(n, pdf_pool_size), seed=2)], n)
+    return lambda: [extract_text_from_pdf(data, workers=1) for data in pdfs]
+
+def _parsed(n: int, seed: int) -> List[Dict]:
+    from utils.transcript_parser import parse_transcript
+    return cycle([parse_transcript(text) for text in generate_transcripts(min(n, pool_size), seed=seed)], n)
+
+def bench_create_client_summary(n: int) -> Callable[[], object]:
+    from utils.client_sum import create_client_summary
+    results = _parsed(n, 3)
+    return lambda: create_client_summary(results)
+
+def bench_create_tax_projection(n: int) -> Callable[[], object]:
+    from utils.tax_utils import create_tax_projection
+    results = _parsed(n, 4)
+    return lambda: [create_tax_projection(result, 1, 'Unknown', 'Unknown') for result in results]
+
+def bench_create_tax_projections(n: int) -> Callable[[], object]:
+    from utils.tax_utils import create_tax_projections, projection_rows
+    results = _parsed(n, 4)
+    return lambda: create_tax_projections(projection_rows(results), by=['Document'])
+
+def bench_calculate_based_on_forms(n: int) -> Callable[[], object]:
+    from utils.calculations import calculate_based_on_forms
+    results = _parsed(n, 5)
+    return lambda: calculate_based_on_forms(results)
+
+benchmarks = {
+    'parse_transcript': bench_parse_transcript,
+    'reference_parse_transcript': bench_reference_parse_transcript,
+    'extract_text_from_pdf': bench_extract_text_from_pdf,
+    'create_client_summary': bench_create_client_summary,
+    'create_tax_projection': bench_create_tax_projection,
+    'create_tax_projections': bench_create_tax_projections,
+    'calculate_based_on_forms': bench_calculate_based_on_forms,
+}
+
+# benchmark -> (reference benchmark, how many times faster it must stay). A ratio taken in one
+# run holds on any machine, where the baselines only hold on the one they were recorded on.
+min_speedups = {
+    'parse_transcript': ('reference_parse_transcript', 5.0),
+}
+
+def time_best(run: Callable[[], object], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def time_pair(run: Callable[[], object], reference_run: Callable[[], object], repeat: int) -> Tuple[float, float]:
+    # time_best for both, alternating runs so a burst of load on the machine hits both alike
+    best, reference_best = float('inf'), float('inf')
+    for _ in range(repeat):
+        best = min(best, time_best(run, 1))
+        reference_best = min(reference_best, time_best(reference_run, 1))
+    return best, reference_best
+
+def run_benchmarks(names: List[str], sizes: List[int], repeat: int) -> Dict[str, float]:
+    timings = {}
+    # References of the guarded benchmarks being run are timed together with them
+    paired = {min_speedups[name][0] for name in names if name in min_speedups}
+    for name in names:
+        if name in paired:
+            continue
+        for size in sizes:
+            run = benchmarks[name](size)
+            # Tiny cases are too quick to time once; the 100k cases are timed once
+            runs = repeat * 20 if size == 1 else repeat if size <= 1000 else 1
+            if name in min_speedups and min_speedups[name][0] in names:
+                reference = min_speedups[name][0]
+                timings[f"{name}[{size}]"], timings[f"{reference}[{size}]"] = time_pair(run, benchmarks[reference](size), runs)
+            else:
+                timings[f"{name}[{size}]"] = time_best(run, runs)
+            del run
+    return timings
+
+def load_baselines(path: str = baselines_path) -> Dict[str, float]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)['timings']
+
+def save_baselines(timings: Dict[str, float], path: str = baselines_path):
+    merged = dict(load_baselines(path))
+    merged.update(timings)
+    data = {
+        'python': platform.python_version(),
+        'machine': f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPU",
+        'timings': {key: round(value, 6) for key, value in sorted(merged.items())},
+    }
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(data, file, indent=1)
+        file.write('\n')
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the transcript pipeline on synthetic data")
+    parser.add_argument('names', nargs='*', help=f"benchmarks to run: {', '.join(benchmarks)} (default: all)")
+    parser.add_argument('--sizes', default=','.join(map(str, default_sizes)), help="comma-separated document counts")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per benchmark; the best is kept")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown over the baseline (default: 0.25)")
+    parser.add_argument('--save', action='store_true', help=f"write the timings to {os.path.relpath(baselines_path)}")
+    args = parser.parse_args(argv)
+
+    names = args.names or list(benchmarks)
+    unknown = [name for name in names if name not in benchmarks]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+    # A guarded benchmark always runs with its reference
+    names += [min_speedups[name][0] for name in names if name in min_speedups and min_speedups[name][0] not in names]
+    sizes = [int(size) for size in args.sizes.split(',')]
+    baselines = load_baselines()
+    timings = run_benchmarks(names, sizes, args.repeat)
+
+    regressions = 0
+    for key, seconds in timings.items():
+        size = int(key[key.index('[') + 1:-1])
+        line = f"{key:<36} {seconds * 1000:10.2f} ms {seconds / size * 1e6:10.1f} us/doc"
+        baseline = baselines.get(key)
+        if baseline:
+            change = seconds / baseline - 1
+            slower = change > args.tolerance
+            regressions += slower
+            line += f"  {change:+7.1%} vs baseline{'  REGRESSION' if slower else ''}"
+        print(line)
+
+    for name, (reference, minimum) in min_speedups.items():
+        for size in sizes:
+            key, reference_key = f"{name}[{size}]", f"{reference}[{size}]"
+            if key not in timings or reference_key not in timings:
+                continue
+            speedup = timings[reference_key] / timings[key]
+            # One document is too quick to time reliably against another implementation
+            too_slow = size > 1 and speedup < minimum
+            regressions += too_slow
+            print(f"{key:<36} {speedup:10.2f}x {reference}, at least {minimum}x{'  REGRESSION' if too_slow else ''}")
+
+    if args.save:
+        save_baselines(timings)
+        print(f"Saved baselines to {baselines_path}")
+        return 0
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+# benchmarks/synthetic.py
+# Deterministic synthetic IRS transcripts for benchmarks. The same seed always gives the same
+# documents, so timings are comparable across runs and machines.
+import random
+from typing import Dict, List, Optional, Sequence
+
+from utils.transcript_parser import income_fields, withholding_fields
+
+transcript_kinds = ('account', 'record', 'wage_income', 'summary')
+default_mix = {'account': 0.35, 'record': 0.15, 'wage_income': 0.4, 'summary': 0.1}
+filing_statuses = ('Single', 'Married Filing Joint', 'Married Filing Separate', 'Head of Household')
+# (code, explanation) pairs used for account transcript transaction lines
+transaction_codes = (
+    ('150', 'Tax return filed'),
+    ('806', 'W-2 or 1099 withholding'),
+    ('196', 'Interest charged for late payment'),
+    ('276', 'Penalty for late payment of tax'),
+    ('290', 'Additional tax assessed'),
+    ('300', 'Additional tax or deficiency assessment by examination'),
+    ('582', 'Lien placed on assets due to balance owed'),
+    ('971', 'Notice issued'),
+    ('670', 'Payment'),
+)
+banner = "This Product Contains Sensitive Taxpayer Data"
+
+def _money(rng: random.Random, high: int = 100000) -> str:
+    return f"{rng.randint(0, high):,}.{rng.randint(0, 99):02d}"
+
+def _noise_lines(rng: random.Random, count: int) -> List[str]:
+    # Lines real transcripts are full of: page banners, addresses, keys without values, stray dates
+    choices = (
+        lambda: banner,
+        lambda: f"{rng.randint(100, 9999)} MAIN ST APT {rng.randint(1, 99)}",
+        lambda: "Submission Type: Original document",
+        lambda: "SPOUSE TAXPAYER IDENTIFICATION NUMBER:",
+        lambda: f"{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}-{rng.randint(2015, 2024)} $0.00",
+        lambda: "",
+        lambda: f"n/a {rng.randint(10000, 99999)}-{rng.randint(100, 999)}-{rng.randint(10000, 99999)}-{rng.randint(0, 9)}",
+    )
+    return [rng.choice(choices)() for _ in range(count)]
+
+def _account_lines(rng: random.Random, year: int, ssn_last_four: str, filed: bool, record: bool) -> List[str]:
+    balance = _money(rng, 50000)
+    lines = [
+        "Record of Account" if record else "Account Transcript",
+        "Request Date: 10-15-2024",
+        "Response Date: 10-15-2024",
+        f"Tracking Number: {rng.randint(10 ** 11, 10 ** 12 - 1)}",
+        "FORM NUMBER: 1040",
+        f"Tax Period: 12-31-{year}" if record else f"TAX PERIOD: Dec. 31, {year}",
+        f"TAXPAYER IDENTIFICATION NUMBER: XXX-XX-{ssn_last_four}",
+        f"FILING STATUS: {rng.choice(filing_statuses)}",
+        f"ACCOUNT BALANCE: {balance}",
+        f"ACCRUED INTEREST: {_money(rng, 900)} AS OF: Apr. 25, 2024",
+        f"ACCRUED PENALTY: {_money(rng, 900)} AS OF: Apr. 25, 2024",
+        "ACCOUNT BALANCE PLUS ACCRUALS",
+        f"(this is not a payoff amount): {balance}",
+        f"ADJUSTED GROSS INCOME: {_money(rng)}",
+        f"TAXABLE INCOME: {_money(rng)}",
+        f"TAX PER RETURN: {_money(rng, 20000)}",
+        "SE TAXABLE INCOME TAXPAYER: 0.00",
+    ]
+    if record:
+        lines.append(f"Current Balance: {balance}")
+    lines.append("CODE EXPLANATION OF TRANSACTION CYCLE DATE AMOUNT")
+    codes = [code for code in transaction_codes if code[0] != '150']
+    if filed:
+        lines.append(f"150 Tax return filed {year + 1}2105 06-03-{year + 1} ${_money(rng, 20000)}")
+    for code, explanation in rng.sample(codes, rng.randint(1, 5)):
+        lines.append(f"{code} {explanation} {rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}-{rng.randint(year + 1, year + 4)} ${_money(rng, 5000)}")
+    return lines
+
+def _wage_income_lines(rng: random.Random, year: int, ssn_last_four: str, forms: int) -> List[str]:
+    lines = [
+        "Wage and Income Transcript",
+        "Request Date: 10-15-2024",
+        "Response Date: 10-15-2024",
+        f"Tracking Number: {rng.randint(10 ** 11, 10 ** 12 - 1)}",
+        f"SSN Provided: XXX-XX-{ssn_last_four}",
+        f"Tax Period Requested: December, {year}",
+    ]
+    for form in rng.choices(sorted(income_fields), k=forms):
+        lines.append(f"Form {form}")
+        lines.append(f"Employer Identification Number (EIN):XXXXX{rng.randint(1000, 9999)}")
+        for field in sorted(income_fields[form]):
+            lines.append(f"{field}: ${_money(rng)}")
+        for field in sorted(withholding_fields.get(form, ())):
+            lines.append(f"{field}: ${_money(rng, 5000)}")
+    return lines
+
+def _summary_lines(rng: random.Random, year: int, ssn_last_four: str) -> List[str]:
+    return [
+        "Wage and Income Transcript",
+        "Wage & Income Summary",
+        f"SSN Provided: XXX-XX-{ssn_last_four}",
+        f"Tax Period Requested: December, {year}",
+        f"Tracking Number: {rng.randint(10 ** 11, 10 ** 12 - 1)}",
+        f"Total Income: ${_money(rng)}",
+        f"Total Withholding: ${_money(rng, 5000)}",
+    ]
+
+def generate_transcript(rng: random.Random, kind: str, year: int, ssn_last_four: str, forms: int = 3, noise: float = 0.1, filed: Optional[bool] = None) -> str:
+    # noise is the share of extra junk lines mixed in between the real ones
+    if filed is None:
+        filed = rng.random() < 0.7
+    if kind in ('account', 'record'):
+        lines = _account_lines(rng, year, ssn_last_four, filed, kind == 'record')
+    elif kind == 'wage_income':
+        lines = _wage_income_lines(rng, year, ssn_last_four, forms)
+    elif kind == 'summary':
+        lines = _summary_lines(rng, year, ssn_last_four)
+    else:
+        raise ValueError(f"Unknown transcript kind {kind!r}; choose from {', '.join(transcript_kinds)}")
+    extra = int(len(lines) * noise)
+    for line in _noise_lines(rng, extra):
+        lines.insert(rng.randint(1, len(lines)), line)
+    return "\n".join([banner] + lines + [banner]) + "\n"
+
+def generate_transcripts(n: int, seed: int = 0, mix: Optional[Dict[str, float]] = None, clients: int = 50, years: Sequence[int] = range(2015, 2024), forms: Sequence[int] = (1, 6), noise: float = 0.1) -> List[str]:
+    # n transcripts for `clients` taxpayers across `years`, in the proportions of `mix`
+    rng = random.Random(seed)
+    mix = mix or default_mix
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+    ssns = [f"{rng.randint(0, 9999):04d}" for _ in range(clients)]
+    return [
+        generate_transcript(rng, rng.choices(kinds, weights)[0], rng.choice(list(years)), rng.choice(ssns), rng.randint(*forms), noise)
+        for _ in range(n)
+    ]
+
+def transcript_pdf(text: str, lines_per_page: int = 60) -> bytes:
+    # Render a transcript into a text PDF (needs PyMuPDF)
+    import fitz
+    lines = text.split("\n")
+    with fitz.open() as doc:
+        for start in range(0, len(lines), lines_per_page):
+            page = doc.new_page()
+            page.insert_text((36, 36), "\n".join(lines[start:start + lines_per_page]), fontsize=7)
+        return doc.tobytes()
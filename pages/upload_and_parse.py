@@ -1,13 +1,12 @@
+import time
 import streamlit as st
 import pandas as pd
-from utils.transcript_parser import parse_transcript
-from utils.pdf_utils import extract_text_from_pdf, display_pdf
-from utils.client_sum import create_client_summary
-from utils.common import get_last_four_ssn
-
-def highlight_not_filed(row):
-    color = 'red' if row['Return Filed'] == 'No' else ''
-    return ['background-color: {}'.format(color) for _ in row]
+from utils.streamlit_ui import display_pdf, ingest_executor, show_pipeline_timings, style_client_summary
+from utils.ingest import IngestJob, collect_results, discard_uploads
+from utils.parse_cache import default_parse_cache
+from utils.client_sum import IncrementalClientSummary, build_client_index
+from utils.transcript_store import default_transcript_store
+from utils.metrics import collect_metrics, stage
 
 # Set page configuration for wider screen layout
 st.set_page_config(layout="wide")
@@ -21,53 +20,100 @@ with st.expander("Upload and Process Tax Transcript Files", expanded=show_file_u
 
 # Process and store the uploaded files
 if uploaded_files:
-    all_transcripts = []
-    results = []
-
-    # Extract text and save both results and original uploaded files
-    for uploaded_file in uploaded_files:
-        if uploaded_file.type == "application/pdf":
-            text_content = extract_text_from_pdf(uploaded_file)
-        else:
-            text_content = uploaded_file.getvalue().decode("utf-8")
-
-        all_transcripts.append(text_content)
-        results.append(parse_transcript(text_content))
-
-    # Save the results and uploaded files into session state
-    st.session_state['results'] = results
-    st.session_state['uploaded_files'] = uploaded_files
+    # Only re-run the parse stage when the set of uploads changes, not on every widget interaction
+    upload_ids = tuple(getattr(uploaded_file, 'file_id', uploaded_file.name) for uploaded_file in uploaded_files)
+    if st.session_state.get('upload_ids') != upload_ids:
+        # Each new upload goes to a background executor as soon as it arrives and results come back
+        # as they finish, so the summary below fills in from the quickest files instead of waiting
+        # for the slowest one. Removed files are taken back out of the summary, files already seen
+        # come straight from the parse cache, and a rerun mid-batch picks the same job back up.
+        # A TXT upload holding many transcripts (a vendor dump) is parsed as one document each.
+        # Stage timings for this batch, shown in the "Pipeline timings" panel below
+        with collect_metrics() as metrics:
+            job = st.session_state.setdefault('ingest_job', IngestJob(ingest_executor(), cache=default_parse_cache()))
+            parsed = st.session_state.setdefault('parsed_uploads', {})
+            summary_state = st.session_state.setdefault('summary_state', IncrementalClientSummary())
+
+            with stage('update_client_summary'):
+                discard_uploads(job, parsed, summary_state, upload_ids)
+            job.add_uploads(zip(upload_ids, uploaded_files))
+            # (item id, name, uploaded file, start, end) per transcript, in upload order
+            documents = [
+                (item_id, uploaded_file.name + item_id[len(upload_id):], uploaded_file, start, end)
+                for upload_id, uploaded_file in zip(upload_ids, uploaded_files)
+                for item_id, start, end in job.items(upload_id)
+            ]
+            item_ids = tuple(item_id for item_id, *_ in documents)
+            names = {item_id: name for item_id, name, *_ in documents}
+            # Results go into the summary as they finish, but where a client year has several
+            # transcripts the later upload wins, so the summary keeps them in upload order
+            summary_state.set_order(item_ids)
+
+            new_ids = []
+            progress = live_summary = None
+            if not job.done:
+                progress = st.progress(job.finished / job.total, text=f"Parsed {job.finished} of {job.total} files")
+                live_summary = st.empty()
+            last_render = 0.0
+            with stage('parse_uploads', items=job.total - job.finished):
+                for upload_id in collect_results(job, parsed, summary_state):
+                    new_ids.append(upload_id)
+                    if progress is None:
+                        continue
+                    progress.progress(job.finished / job.total, text=f"Parsed {job.finished} of {job.total} files")
+                    # Redraw the partial summary at most a few times a second
+                    if time.perf_counter() - last_render > 0.25 or job.done:
+                        with stage('render_partial_summary'):
+                            live_summary.dataframe(style_client_summary(summary_state.frame()), use_container_width=True)
+                        last_render = time.perf_counter()
+            if progress is not None:
+                progress.empty()
+                live_summary.empty()
+
+            # Persist the new files for later queries when a store is configured (TAXRESO_STORE)
+            transcript_store = default_transcript_store()
+            if transcript_store is not None and new_ids:
+                with stage('store_results', items=len(new_ids)):
+                    transcript_store.write_results([parsed[upload_id] for upload_id in new_ids], names=[names[upload_id] for upload_id in new_ids])
+            results = [parsed[item_id] for item_id in item_ids]
+
+            # Save the results (as compact Transcript records, which read like the result dicts),
+            # uploaded files, summary views and per-client index into session state
+            with stage('build_summary_views'):
+                st.session_state.update(summary_state.views())
+            st.session_state['client_index'] = build_client_index(results)
+            st.session_state['results'] = results
+            st.session_state['uploaded_files'] = uploaded_files
+            st.session_state['documents'] = [document[1:] for document in documents]
+            st.session_state['upload_ids'] = upload_ids
+        st.session_state['pipeline_metrics'] = metrics
 
     st.success("Transcripts processed successfully! You can now view the client summary below.")
 
 # Show client summary and original document viewer if transcripts are processed
-if 'results' in st.session_state and 'uploaded_files' in st.session_state:
+if 'results' in st.session_state and 'client_index' in st.session_state:
     st.subheader("Client Summary")
 
     results = st.session_state['results']
-    uploaded_files = st.session_state['uploaded_files']
+    documents = st.session_state['documents']
+    client_summaries = st.session_state['client_summaries']
+    client_index = st.session_state['client_index']
 
-    # Create client summary from results
-    client_summary = create_client_summary(results)
+    # Client selection by SSN last four digits
+    selected_ssn_last_four = st.selectbox("Select a client (Last 4 digits of SSN):", list(client_summaries))
 
-    # Get unique SSN last four digits for client selection
-    unique_ssn_last_four = client_summary['SSN Last Four'].unique()
-    selected_ssn_last_four = st.selectbox("Select a client (Last 4 digits of SSN):", unique_ssn_last_four)
+    # Summary rows for the selected client, grouped once at parse time
+    selected_client_summary = client_summaries[selected_ssn_last_four]
 
-    # Filter summary for selected client
-    selected_client_summary = client_summary[client_summary['SSN Last Four'] == selected_ssn_last_four]
+    # Highlight unfiled returns and format currency columns for display
+    with collect_metrics(st.session_state.get('pipeline_metrics')), stage('render_client_summary', items=len(selected_client_summary)):
+        styled_df = style_client_summary(selected_client_summary)
+        st.dataframe(styled_df, use_container_width=True)
 
-    # Highlight unfiled returns
-    styled_df = selected_client_summary.style.apply(highlight_not_filed, axis=1)
-    st.dataframe(styled_df, use_container_width=True)
-
-    # Calculate total tax liability using 'Current Balance'
-    total_balance = selected_client_summary['Balance Plus Accruals']
-    total_balance_sum = total_balance.apply(lambda x: float(x.replace('$', '').replace(',', ''))).sum()
-
-    # Calculate total projected amount owed for unfiled returns
-    total_projected = selected_client_summary[selected_client_summary['Return Filed'] == 'No']['Projected Amount Owed']
-    total_projected_sum = total_projected.apply(lambda x: float(x.replace('$', '').replace(',', ''))).sum()
+    # Total tax liability uses 'Balance Plus Accruals'; projected amount owed covers unfiled returns
+    client_totals = st.session_state['client_totals']
+    total_balance_sum = client_totals.loc[selected_ssn_last_four, 'Balance Plus Accruals']
+    total_projected_sum = client_totals.loc[selected_ssn_last_four, 'Projected Amount Owed']
 
     # Display the calculated totals
     st.write(f"Total Tax Liability for selected client: ${total_balance_sum:.2f}")
@@ -82,18 +128,17 @@ if 'results' in st.session_state and 'uploaded_files' in st.session_state:
         mime="text/csv",
     )
 
+    # Where the time went for the last processed batch (and summary renders since)
+    show_pipeline_timings(st.session_state.get('pipeline_metrics'))
+
     # Display original documents for selected client alongside relevant data in table format
     st.header("Original Document Viewer & Relevant Data Analysis")
-    selected_client_files = [
-        file for file, result in zip(uploaded_files, results)
-        if get_last_four_ssn(result['SSN']) == selected_ssn_last_four
-    ]
-    selected_client_results = [
-        result for result in results if get_last_four_ssn(result['SSN']) == selected_ssn_last_four
-    ]
-
-    for i, (result, uploaded_file) in enumerate(zip(selected_client_results, selected_client_files)):
-        with st.expander(f"Document {i + 1}: {uploaded_file.name}"):
+    selected_positions = client_index.get(selected_ssn_last_four, [])
+    selected_client_documents = [documents[position] for position in selected_positions]
+    selected_client_results = [results[position] for position in selected_positions]
+
+    for i, (result, (name, uploaded_file, start, end)) in enumerate(zip(selected_client_results, selected_client_documents)):
+        with st.expander(f"Document {i + 1}: {name}"):
             # Create two columns, one for the PDF and the other for the relevant data analysis
             col1, col2 = st.columns([2, 2])
             
@@ -103,7 +148,8 @@ if 'results' in st.session_state and 'uploaded_files' in st.session_state:
                 if uploaded_file.type == "application/pdf":
                     display_pdf(uploaded_file)
                 else:
-                    st.text(uploaded_file.getvalue().decode("utf-8"))
+                    # Just this document's part of a dump
+                    st.text(uploaded_file.getvalue()[start:end].decode("utf-8"))
 
             # Column for displaying relevant data in a table-like format
             with col2:
@@ -1,5 +1,6 @@
 import re
 from typing import Dict, List, Union
+from utils.form_registry import form_registry
 
 def parse_transcript(content: str) -> Dict[str, Union[str, List[Dict[str, str]]]]:
     lines = content.split('\n')
@@ -21,42 +22,8 @@ def parse_transcript(content: str) -> Dict[str, Union[str, List[Dict[str, str]]]
     
     current_form = None
     
-    income_fields = {
-        'W-2': ['Wages, Tips and Other Compensation'],
-        '1099-MISC': ['Non-Employee Compensation', 'Medical Payments', 'Fishing Income', 'Rents', 'Royalties', 'Attorney Fees', 'Other Income', 'Substitute Payments for Dividends'],
-        '1099-NEC': ['Non-Employee Compensation'],
-        '1099-K': ['Gross Amount of Payment Card/Third Party Transactions'],
-        '1099-PATR': ['Patronage Dividends', 'Non-Patronage Distribution', 'Retained Allocations', 'Redemption Amount'],
-        '1042-S': ['Gross Income'],
-        'K-1 1065': ['Royalties', 'Ordinary Income K-1', 'Real Estate', 'Other Rental', 'Guaranteed Payments', 'Dividends', 'Interest'],
-        'K-1 1041': ['Net Rental Real Estate Income', 'Other Rental Income', 'Dividends', 'Interest', 'Long-Term Capital Gain', 'Other Portfolio and Non-Business Income'],
-        'W-2G': ['Gross Winnings'],
-        '1099-R': ['Taxable Amount'],
-        '1099-B': ['Proceeds', 'Cost or Basis'],
-        '1099-S': ['Gross Proceeds'],
-        '1099-LTC': ['Gross Long-Term Care Benefits Paid', 'Accelerated Death Benefits Paid'],
-        '3922': ['Exercise Fair Market Value per Share on Exercise Date', 'Exercise Price per Share', 'Number of Shares Transferred'],
-        'K-1 1120S': ['Dividends', 'Interest', 'Royalties', 'Ordinary Income K-1', 'Real Estate', 'Other Rental'],
-        'SSA': ['Pensions and Annuities'],
-        '1099-DIV': ['Qualified Dividends', 'Cash Liquidation Distribution', 'Capital Gains', 'Ordinary Dividend'],
-        '1099-INT': ['Interest'],
-        '1099-G': ['Unemployment Compensation', 'Agricultural Subsidies', 'Taxable Grants']
-    }
-    
-    withholding_fields = {
-        'W-2': ['Federal Income Tax Withheld'],
-        '1099-MISC': ['Tax Withheld'],
-        '1099-NEC': ['Federal Income Tax Withheld'],
-        '1099-K': ['Federal Income Tax Withheld'],
-        '1099-PATR': ['Tax Withheld'],
-        '1042-S': ['U.S. Federal Tax Withheld'],
-        'W-2G': ['Federal Income Tax Withheld'],
-        '1099-R': ['Tax Withheld'],
-        'SSA': ['Tax Withheld'],
-        '1099-DIV': ['Tax Withheld'],
-        '1099-INT': ['Tax Withheld'],
-        '1099-G': ['Tax Withheld']
-    }
+    income_fields = form_registry.income_fields
+    withholding_fields = form_registry.withholding_fields
     
     for line in lines:
         tracking_number_match = tracking_number_pattern.search(line)
@@ -78,7 +45,7 @@ def parse_transcript(content: str) -> Dict[str, Union[str, List[Dict[str, str]]]
         
         form_match = form_pattern.search(line)
         if form_match:
-            current_form = form_match.group(1)
+            current_form = form_registry.form_for_word(form_match.group(1), line, form_match.start(1))
             if current_form not in data["Income"]:
                 data["Income"][current_form] = {"Income": {}, "Withholdings": {}}
         
@@ -1,26 +1,14 @@
 import streamlit as st
 import pandas as pd
-import requests
-from utils.transcript_parser import parse_transcript, flatten_dict
-from utils.pdf_utils import extract_text_from_pdf, display_pdf, process_transcripts
-from utils.tax_utils import get_irs_standards, calculate_tax, create_tax_projection
-from utils.client_sum import create_client_summary
-
-
-def extract_text_from_pdf(pdf_file):
-    pdf_reader = PyPDF2.PdfReader(pdf_file)
-    text = ""
-    for page in pdf_reader.pages:
-        text += page.extract_text()
-    return text
-
-
-def extract_float(value: str) -> float:
-    try:
-        return float(value.replace(',', '').replace('$', ''))
-    except ValueError:
-        return 0.0
-
+from utils.transcript_parser import flatten_dict
+from utils.streamlit_ui import display_pdf, style_client_summary
+from utils.transcript_sources import iter_parse_transcripts
+from utils.parse_cache import default_parse_cache
+from utils.tax_utils import create_tax_projection
+from utils.client_sum import index_clients
+from utils.reference_data import get_state_names, get_counties
+from utils.transcript_model import to_transcripts
+from utils.transcript_store import default_transcript_store
 
 
 def get_last_four_ssn(ssn: str) -> str:
@@ -37,63 +25,47 @@ def main():
 
     household_size = st.number_input("Household Size", min_value=1, value=1)
 
-    # Load US states and counties from GitHub JSON file
-    states_url = 'https://raw.githubusercontent.com/dr5hn/countries-states-cities-database/refs/heads/master/json/states.json'
-    counties_url = 'https://raw.githubusercontent.com/dr5hn/countries-states-cities-database/refs/heads/master/json/cities.json'
-
-    states_response = requests.get(states_url)
-
-    if states_response.status_code == 200:
-        states = [state for state in states_response.json() if state['country_code'] == 'US']
-        state_names = [state['name'] for state in states]
-        state_code_map = {state['name']: state['id'] for state in states}
-        
-        state = st.selectbox("State", state_names)
-        
-        selected_state_id = state_code_map[state]
-        counties_response = requests.get(counties_url)
-        
-        if counties_response.status_code == 200:
-            counties = [county for county in counties_response.json() if county['state_id'] == selected_state_id]
-            county_names = [county['name'] for county in counties]
-            county = st.selectbox("County", county_names)
-        else:
-            st.error("Failed to load counties. Please try again later.")
-    else:
-        st.error("Failed to load states. Please try again later.")
+    # US states and counties come from the bundled reference data, loaded once per process
+    state = st.selectbox("State", get_state_names())
+    county = st.selectbox("County", get_counties(state))
 
     if uploaded_files:
-        all_transcripts = []
-        for uploaded_file in uploaded_files:
-            if uploaded_file.type == "application/pdf":
-                text_content = extract_text_from_pdf(uploaded_file)
-            else:
-                text_content = uploaded_file.getvalue().decode("utf-8")
-            all_transcripts.append(text_content)
-
-        results = process_transcripts(all_transcripts)
+        # Parse and index only when the set of uploads changes; other reruns reuse session state.
+        # The batch is kept under its own key: the pages keep theirs ('results', 'documents', ...)
+        # at the top level, and switching pages must not mix one page's uploads into the other's.
+        upload_ids = tuple(getattr(uploaded_file, 'file_id', uploaded_file.name) for uploaded_file in uploaded_files)
+        batch = st.session_state.get('app_batch')
+        if batch is None or batch['upload_ids'] != upload_ids:
+            results = list(iter_parse_transcripts(uploaded_files, cache=default_parse_cache()))
+            batch = index_clients(results)
+            # Persist the batch for later queries when a store is configured (TAXRESO_STORE)
+            transcript_store = default_transcript_store()
+            if transcript_store is not None:
+                transcript_store.write_results(results, names=[uploaded_file.name for uploaded_file in uploaded_files])
+            # Kept as compact Transcript records; they read like the result dicts
+            batch['results'] = to_transcripts(results)
+            batch['upload_ids'] = upload_ids
+            st.session_state['app_batch'] = batch
+        results = batch['results']
+        client_index = batch['client_index']
+        client_summaries = batch['client_summaries']
 
         st.header("Client Summary")
-        client_summary = create_client_summary(results)
 
-        unique_ssn_last_four = client_summary['SSN Last Four'].unique()
-        selected_ssn_last_four = st.selectbox("Select a client (Last 4 digits of SSN):", unique_ssn_last_four)
+        selected_ssn_last_four = st.selectbox("Select a client (Last 4 digits of SSN):", list(client_summaries))
 
-        selected_client_summary = client_summary[client_summary['SSN Last Four'] == selected_ssn_last_four]
+        selected_client_summary = client_summaries[selected_ssn_last_four]
 
         # Apply conditional formatting to the DataFrame to highlight rows where the return is not filed
-        styled_df = selected_client_summary.style.apply(highlight_not_filed, axis=1)
+        styled_df = style_client_summary(selected_client_summary)
 
         # Display the styled DataFrame
         st.dataframe(styled_df, use_container_width=True)
 
-        # Calculate total tax liability only for filed returns
-        total_liability = selected_client_summary[selected_client_summary['Return Filed'] == 'Yes']['Tax Per Return']
-        total_liability_sum = total_liability.apply(lambda x: float(x.replace('$', '').replace(',', ''))).sum()
-
-        # Calculate total projected amount owed for unfiled returns
-        total_projected = selected_client_summary[selected_client_summary['Return Filed'] == 'No']['Projected Amount Owed']
-        total_projected_sum = total_projected.apply(lambda x: float(x.replace('$', '').replace(',', ''))).sum()
+        # Total tax liability covers filed returns only; projected amount owed covers unfiled returns
+        client_totals = batch['client_totals']
+        total_liability_sum = client_totals.loc[selected_ssn_last_four, 'Tax Per Return']
+        total_projected_sum = client_totals.loc[selected_ssn_last_four, 'Projected Amount Owed']
 
         st.write(f"Total Tax Liability for selected client: ${total_liability_sum:.2f}")
         st.write(f"Total Projected Amount Owed for Unfiled Returns: ${total_projected_sum:.2f}")
@@ -109,8 +81,9 @@ def main():
         st.header("Detailed Document View")
         st.write("Expand the sections below to view details of individual documents.")
 
-        selected_client_results = [result for result in results if get_last_four_ssn(result['SSN']) == selected_ssn_last_four]
-        selected_client_files = [file for file, result in zip(uploaded_files, results) if get_last_four_ssn(result['SSN']) == selected_ssn_last_four]
+        selected_positions = client_index.get(selected_ssn_last_four, [])
+        selected_client_results = [results[position] for position in selected_positions]
+        selected_client_files = [uploaded_files[position] for position in selected_positions]
 
         for i, (result, uploaded_file) in enumerate(zip(selected_client_results, selected_client_files)):
             with st.expander(f"Document {i + 1}: {uploaded_file.name}"):
@@ -0,0 +1,157 @@
+# taxreso.py
+# Headless batch runner: parse directories/archives of PDF and TXT transcripts and export the
+# client summary, without streamlit.
+#
+#   python taxreso.py transcripts/ uploads.zip -o summary.parquet --projections projections.csv
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from utils.client_sum import create_client_summary
+from utils.common import get_last_four_ssn
+from utils.metrics import collect_metrics, current_collector, stage
+from utils.tax_utils import create_tax_projection
+from utils.transcript_sources import iter_transcript_files, parse_transcript_file
+
+output_formats = ('csv', 'parquet', 'jsonl')
+# Files in flight per worker; bounds how many raw files are held in memory at once
+inflight_per_worker = 4
+
+def infer_format(path: str, default: str = 'csv') -> str:
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    if extension in ('jsonl', 'ndjson'):
+        return 'jsonl'
+    if extension in ('parquet', 'pq'):
+        return 'parquet'
+    return 'csv' if extension == 'csv' else default
+
+def write_frame(frame: pd.DataFrame, path: str, output_format: Optional[str] = None):
+    output_format = output_format or infer_format(path)
+    if output_format == 'parquet':
+        frame.to_parquet(path, index=False)
+    elif output_format == 'jsonl':
+        frame.to_json(path, orient='records', lines=True)
+    else:
+        frame.to_csv(path, index=False)
+
+def parse_files(items: Iterable[Tuple[str, bytes]], workers: int) -> Iterator[Tuple[str, Dict, int]]:
+    # (name, result, PDF pages) in input order. With several workers, files are parsed in a process
+    # pool with a bounded number in flight, so large backfills are never read into memory at once.
+    if workers <= 1:
+        for item in items:
+            result, pages = parse_transcript_file(item, pdf_workers=1)
+            yield item[0], result, pages
+        return
+    parse = partial(parse_transcript_file, pdf_workers=1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for item in items:
+            pending.append((item[0], pool.submit(parse, item)))
+            if len(pending) >= workers * inflight_per_worker:
+                name, future = pending.popleft()
+                yield (name, *future.result())
+        while pending:
+            name, future = pending.popleft()
+            yield (name, *future.result())
+
+def projection_frame(names: List[str], results: List[Dict], household_size: int, county: str, state: str) -> pd.DataFrame:
+    # create_tax_projection for every unfiled transcript
+    rows = []
+    for name, result in zip(names, results):
+        if result['Return Filed'] or "Error" in result:
+            continue
+        projection = create_tax_projection(result, household_size, county, state)
+        row = {'Source': name, 'SSN Last Four': get_last_four_ssn(result['SSN']), 'Tax Period': result['Tax Period'], 'Transcript Type': result['Transcript Type']}
+        row.update((key, value) for key, value in projection.items() if key != "IRS Standards")
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='taxreso', description="Parse tax transcripts in bulk and export client summaries")
+    parser.add_argument('inputs', nargs='+', help="transcript files, directories, glob patterns or zip/tar archives")
+    parser.add_argument('-o', '--output', default='client_summary.csv', help="client summary file (default: client_summary.csv)")
+    parser.add_argument('-f', '--format', choices=output_formats, help="output format (default: from the output file extension, else csv)")
+    parser.add_argument('--results', help="also write every parse result as JSON lines to this file")
+    parser.add_argument('--projections', help="also write tax projections for unfiled transcripts to this file")
+    parser.add_argument('--household-size', type=int, default=1, help="household size for projections (default: 1)")
+    parser.add_argument('--county', default='Unknown', help="county for projections")
+    parser.add_argument('--state', default='Unknown', help="state for projections")
+    parser.add_argument('--store', help="also append the parsed batch to a transcript store at this directory")
+    parser.add_argument('--metrics', help="write per-stage timings to this file (Prometheus text for .prom, else JSON)")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1, help="parallel parse processes (default: CPU count)")
+    parser.add_argument('-q', '--quiet', action='store_true', help="only report failures")
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    with collect_metrics() as metrics:
+        status = run(args)
+    if args.metrics:
+        with open(args.metrics, 'w', encoding='utf-8') as file:
+            file.write(metrics.to_prometheus() if args.metrics.endswith('.prom') else metrics.to_json(indent=1))
+    return status
+
+def run(args: argparse.Namespace) -> int:
+    names = []
+    results = []
+    failures = []
+    # Inputs that are missing or can't be read are skipped and reported, like files that fail to parse
+    unreadable = []
+    pages = 0
+    started = time.perf_counter()
+    sources = iter_transcript_files(args.inputs, on_error=lambda path, error: unreadable.append((path, error)))
+    for name, result, page_count in parse_files(sources, args.workers):
+        names.append(name)
+        results.append(result)
+        pages += page_count
+        if "Error" in result:
+            failures.append((name, result["Error"]))
+    elapsed = time.perf_counter() - started
+    # Parsing in pool workers isn't seen by the collector, so the batch is recorded as one stage
+    current_collector().record('parse_files', elapsed, items=len(results), pages=pages)
+
+    for path, error in unreadable:
+        print(f"taxreso: failed to read {path}: {error}", file=sys.stderr)
+    if not results:
+        print("taxreso: no PDF or TXT transcripts found in the given inputs", file=sys.stderr)
+        return 2
+
+    # Failed files stay in --results; in the summary they would only add an 'Unknown' client row
+    summary = create_client_summary([result for result in results if "Error" not in result])
+    with stage('write_outputs'):
+        write_frame(summary, args.output, args.format)
+    if args.projections:
+        projections = projection_frame(names, results, args.household_size, args.county, args.state)
+        with stage('write_outputs'):
+            write_frame(projections, args.projections)
+    if args.results:
+        with open(args.results, 'w', encoding='utf-8') as file:
+            for name, result in zip(names, results):
+                file.write(json.dumps({'Source': name, **result}) + '\n')
+    if args.store:
+        from utils.transcript_store import TranscriptStore
+        TranscriptStore(args.store).write_results(results, names=names)
+
+    for name, error in failures:
+        print(f"taxreso: failed to parse {name}: {error}", file=sys.stderr)
+    if not args.quiet:
+        seconds = max(elapsed, 1e-9)
+        print(
+            f"Parsed {len(results)} files ({pages} PDF pages) in {elapsed:.2f}s: "
+            f"{len(results) / seconds:.1f} files/sec, {pages / seconds:.1f} pages/sec; {len(failures)} failed, "
+            f"{len(unreadable)} unreadable. "
+            f"Summary written to {args.output}",
+            file=sys.stderr,
+        )
+    return 1 if failures or unreadable else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,41 +1,7 @@
 import streamlit as st
-from utils.client_sum import create_client_summary
-from utils.pdf_utils import display_pdf
-from utils.form_calculations import calculate_based_on_form
-
-# Rest of your code...
-
-for i, (result, uploaded_file) in enumerate(zip(selected_client_results, selected_client_files)):
-    with st.expander(f"Document {i+1}: {uploaded_file.name}"):
-        col1, col2 = st.columns([1, 1])
-
-        with col1:
-            st.write(f"Transcript Type: {result['Transcript Type']}")
-            st.write(f"Tracking Number: {result['Tracking Number']}")
-            st.write(f"Tax Period: {result['Tax Period']}")
-            st.write(f"SSN: {result['SSN']}")
-
-            # Extract the form type and pass to the appropriate calculation logic
-            form_type = result['Transcript Type']
-            calculation_result = calculate_based_on_form(form_type, result)
-            st.write("Calculation Result:", calculation_result["calculation"])
-
-            st.write("Income and Details:")
-            # Display relevant data in a tabular format, based on form type or result
-
-        with col2:
-            st.write("Original Document:")
-            if uploaded_file.type == "application/pdf":
-                display_pdf(uploaded_file)
-            else:
-                st.text(uploaded_file.getvalue().decode("utf-8"))////
-
-
-
-                import streamlit as st
 import pandas as pd
-from utils.client_sum import create_client_summary
-from utils.pdf_utils import display_pdf
+from utils.client_sum import index_clients
+from utils.streamlit_ui import display_pdf, style_client_summary
 from utils.form_extraction import extract_income_withholdings
 from utils.common import extract_float, get_last_four_ssn
 
@@ -46,24 +12,24 @@ st.title("Client Summary")
 
 if 'results' in st.session_state:
     results = st.session_state['results']
-    client_summary = create_client_summary(results)
+    # The upload page builds the per-client index alongside the results; build it here only if missing
+    if 'client_index' not in st.session_state:
+        st.session_state.update(index_clients(results))
+    client_summaries = st.session_state['client_summaries']
+    client_index = st.session_state['client_index']
 
-    unique_ssn_last_four = client_summary['SSN Last Four'].unique()
-    selected_ssn_last_four = st.selectbox("Select a client (Last 4 digits of SSN):", unique_ssn_last_four)
+    selected_ssn_last_four = st.selectbox("Select a client (Last 4 digits of SSN):", list(client_summaries))
 
-    selected_client_summary = client_summary[client_summary['SSN Last Four'] == selected_ssn_last_four]
+    selected_client_summary = client_summaries[selected_ssn_last_four]
 
     # Highlight unfiled returns
-    styled_df = selected_client_summary.style.apply(lambda row: ['background-color: red' if row['Return Filed'] == 'No' else '' for _ in row], axis=1)
+    styled_df = style_client_summary(selected_client_summary)
     st.dataframe(styled_df, use_container_width=True)
 
-    # Calculate total tax liability for all years using 'Current Balance'
-    total_balance = selected_client_summary['Balance Plus Accruals']
-    total_balance_sum = total_balance.apply(lambda x: float(x.replace('$', '').replace(',', ''))).sum()
-
-    # Calculate total projected amount owed for unfiled returns
-    total_projected = selected_client_summary[selected_client_summary['Return Filed'] == 'No']['Projected Amount Owed']
-    total_projected_sum = total_projected.apply(lambda x: float(x.replace('$', '').replace(',', ''))).sum()
+    # Total tax liability for all years uses 'Balance Plus Accruals'; projected amount owed covers unfiled returns
+    client_totals = st.session_state['client_totals']
+    total_balance_sum = client_totals.loc[selected_ssn_last_four, 'Balance Plus Accruals']
+    total_projected_sum = client_totals.loc[selected_ssn_last_four, 'Projected Amount Owed']
 
     # Display the calculated totals
     st.write(f"Total Tax Liability for selected client: ${total_balance_sum:.2f}")
@@ -81,11 +47,15 @@ if 'results' in st.session_state:
     # Display detailed information alongside PDF viewer
     st.header("Detailed Document View")
     
-    # Filter results and uploaded files based on the selected client
-    selected_client_results = [result for result in results if get_last_four_ssn(result['SSN']) == selected_ssn_last_four]
-    selected_client_files = [file for file, result in zip(st.session_state['uploaded_files'], results) if get_last_four_ssn(result['SSN']) == selected_ssn_last_four]
-
-    for i, (result, uploaded_file) in enumerate(zip(selected_client_results, selected_client_files)):
+    # Filter results and documents based on the selected client. Positions count documents, not
+    # uploaded files: a TXT dump is one document per transcript it holds.
+    documents = st.session_state['documents']
+    selected_positions = client_index.get(selected_ssn_last_four, [])
+    selected_client_results = [results[position] for position in selected_positions]
+    selected_client_documents = [documents[position] for position in selected_positions]
+
+    for i, (result, (name, uploaded_file, start, end)) in enumerate(zip(selected_client_results, selected_client_documents)):
+        st.subheader(f"Document {i + 1}: {name}")
         col1, col2 = st.columns([1, 1])
 
         with col1:
@@ -108,6 +78,7 @@ if 'results' in st.session_state:
             if uploaded_file.type == "application/pdf":
                 display_pdf(uploaded_file)
             else:
-                st.text(uploaded_file.getvalue().decode("utf-8"))
+                # Just this document's part of a dump
+                st.text(uploaded_file.getvalue()[start:end].decode("utf-8"))
 else:
     st.warning("Please upload and process transcripts first.")
@@ -0,0 +1,7 @@
+# tests/conftest.py
+import os
+import sys
+
+# The repo root provides utils; benchmarks/ provides the synthetic transcript generator
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [path for path in (repo_dir, os.path.join(repo_dir, 'benchmarks')) if path not in sys.path]
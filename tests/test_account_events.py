@@ -0,0 +1,80 @@
+# tests/test_account_events.py
+import pytest
+
+from utils.account_events import collection_status, get_accruals
+from utils.client_sum import create_client_summary
+from utils.transcript_parser import parse_transcript
+
+def account_transcript(transactions, header=()):
+    lines = [
+        "Account Transcript",
+        "Tracking Number: 1000",
+        "TAX PERIOD: Dec. 31, 2018",
+        "TAXPAYER IDENTIFICATION NUMBER: XXX-XX-1234",
+        *header,
+        "CODE EXPLANATION OF TRANSACTION CYCLE DATE AMOUNT",
+        *transactions,
+    ]
+    return parse_transcript("\n".join(lines))
+
+def status(*transactions):
+    (csed,), (legal_action,) = collection_status([account_transcript(transactions)])
+    return csed, legal_action
+
+def test_csed_runs_ten_years_from_the_latest_assessment():
+    assert status("150 Tax return filed 20191505 05-13-2019 $1,200.00", "290 Additional tax assessed 20204205 11-02-2020 $300.00")[0] == '11-02-2030'
+
+def test_csed_rolls_leap_days_over():
+    assert status("150 Tax return filed 20200905 02-29-2020 $1,200.00")[0] == '03-01-2030'
+
+def test_csed_adds_closed_tolling_periods():
+    # Offer pending 100 days plus 30 days after its rejection
+    csed, _ = status(
+        "150 Tax return filed 20191505 05-13-2019 $1,200.00",
+        "480 Offer in compromise pending 01-01-2021 $0.00",
+        "481 Offer in compromise rejected 04-11-2021 $0.00",
+    )
+    assert csed == '09-20-2029'
+
+def test_csed_is_suspended_while_tolling_is_open():
+    assert status("150 Tax return filed 20191505 05-13-2019 $1,200.00", "520 Bankruptcy or other legal action filed 03-01-2021 $0.00")[0] == 'Suspended'
+
+def test_csed_needs_an_assessment():
+    assert status("670 Payment 06-01-2019 -$100.00") == ('Unknown', 'None')
+
+@pytest.mark.parametrize('transactions, legal_action', [
+    ([], 'None'),
+    (["971 Notice issued 05-20-2019 $0.00"], 'Notice Issued'),
+    # A payment after a plain notice is only a payment
+    (["971 Notice issued 05-20-2019 $0.00", "670 Payment 07-01-2019 -$100.00"], 'Notice Issued'),
+    (["971 Intent to levy collection due process notice 05-20-2019 $0.00"], 'Levy'),
+    (["971 Notice issued AC 069 05-20-2019 $0.00"], 'Levy'),
+    (["670 Payment levy 07-01-2019 -$100.00"], 'Levy'),
+    (["582 Lien placed on assets due to balance owed 06-01-2019 $0.00"], 'Lien'),
+    (["582 Lien placed on assets due to balance owed 06-01-2019 $0.00", "583 Lien released 09-01-2019 $0.00"], 'None'),
+    ([
+        "582 Lien placed on assets due to balance owed 06-01-2019 $0.00",
+        "971 Intent to levy collection due process notice 05-20-2019 $0.00",
+        "971 Notice issued 05-21-2019 $0.00",
+    ], 'Lien, Levy, Notice Issued'),
+])
+def test_legal_action(transactions, legal_action):
+    assert status("150 Tax return filed 20191505 05-13-2019 $1,200.00", *transactions)[1] == legal_action
+
+def test_other_transcripts_have_no_status():
+    result = parse_transcript("Wage and Income Transcript\nSSN Provided: XXX-XX-1234\nTax Period Requested: December, 2018\n150 Tax return filed 20191505 05-13-2019 $1,200.00")
+    assert collection_status([result]) == (['Unknown'], ['Unknown'])
+
+def test_accruals():
+    result = account_transcript([], header=["ACCOUNT BALANCE: $1,000.00", "ACCRUED INTEREST: 12.50 AS OF: Apr. 25, 2024", "ACCRUED PENALTY: $7.25 AS OF: Apr. 25, 2024"])
+    assert get_accruals(result) == 19.75
+    assert get_accruals(account_transcript([])) == 0.0
+
+def test_balance_plus_accruals():
+    header = ["ACCOUNT BALANCE: $1,000.00", "ACCRUED INTEREST: 12.50 AS OF: Apr. 25, 2024", "ACCRUED PENALTY: $7.25 AS OF: Apr. 25, 2024"]
+    # Added up when the transcript doesn't print the total, taken as printed when it does
+    summary = create_client_summary([account_transcript([], header=header)])
+    assert summary['Balance Plus Accruals'].tolist() == [1019.75]
+    printed = header + ["ACCOUNT BALANCE PLUS ACCRUALS", "(this is not a payoff amount): $1,020.00"]
+    summary = create_client_summary([account_transcript([], header=printed)])
+    assert summary['Balance Plus Accruals'].tolist() == [1020.0]
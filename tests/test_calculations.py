@@ -0,0 +1,23 @@
+# tests/test_calculations.py
+from synthetic import generate_transcripts
+from utils.calculations import calculate_based_on_form, calculate_based_on_forms, calculation_map, wage_and_income_summary
+from utils.transcript_parser import parse_transcript
+
+def test_scalar_matches_batch():
+    results = [parse_transcript(text) for text in generate_transcripts(300, seed=5)]
+    batch = calculate_based_on_forms(results)
+    checked = set()
+    for document, result in enumerate(results):
+        for form in calculation_map:
+            calculation = calculate_based_on_form(form, result)['calculation']
+            if form in batch and document in batch[form].index:
+                # Same values, to the last bit
+                assert calculation == batch[form].loc[document].to_dict()
+                checked.add(form)
+            else:
+                assert calculation == {}
+    assert wage_and_income_summary in checked and 'W-2' in checked and '1099-MISC' in checked
+
+def test_unknown_form():
+    result = parse_transcript(generate_transcripts(1, seed=5)[0])
+    assert calculate_based_on_form('8888', result) == {"calculation": "Unknown form type"}
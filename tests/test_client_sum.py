@@ -0,0 +1,104 @@
+# tests/test_client_sum.py
+import math
+
+import pandas as pd
+
+from synthetic import generate_transcripts
+from utils.client_sum import IncrementalClientSummary, create_client_summary, index_clients, summarize_client_totals, summary_columns
+from utils.tax_utils import create_tax_projection
+from utils.transcript_parser import parse_transcript
+
+def account(ssn_last_four, year, agi, taxable, tax_per_return, filed=True, status='Single', kind='Account Transcript'):
+    lines = [
+        kind,
+        f"TAX PERIOD: Dec. 31, {year}",
+        f"TAXPAYER IDENTIFICATION NUMBER: XXX-XX-{ssn_last_four}",
+        f"FILING STATUS: {status}",
+        "ACCOUNT BALANCE: $1,500.00",
+        "ACCOUNT BALANCE PLUS ACCRUALS",
+        "(this is not a payoff amount): $1,625.50",
+        f"ADJUSTED GROSS INCOME: {agi}",
+        f"TAXABLE INCOME: {taxable}",
+        f"TAX PER RETURN: {tax_per_return}",
+        "CODE EXPLANATION OF TRANSACTION CYCLE DATE AMOUNT",
+    ]
+    if filed:
+        lines.append(f"150 Tax return filed {year + 1}2105 06-03-{year + 1} $0.00")
+    return parse_transcript("\n".join(lines))
+
+def wage_income(ssn_last_four, year, *forms):
+    lines = ["Wage and Income Transcript", f"SSN Provided: XXX-XX-{ssn_last_four}", f"Tax Period Requested: December, {year}"]
+    for wages, withheld in forms:
+        lines += ["Form W-2 Wage and Tax Statement", f"Wages, Tips and Other Compensation: {wages}", f"Federal Income Tax Withheld: {withheld}"]
+    return parse_transcript("\n".join(lines))
+
+def batch():
+    return [
+        # Two years for one client; the later account transcript of 2020 wins
+        account('1111', 2020, '$40,000.00', '$27,000.00', '$3,000.00'),
+        wage_income('1111', 2021, ('$30,000.00', '$1,000.00'), ('$12,500.50', '$0.00')),
+        account('1111', 2020, '$50,000.00', '$37,000.00', '$4,000.00', kind='Record of Account'),
+        # No income at all
+        wage_income('2222', 2019),
+        # Unfiled account transcript with zero income
+        account('3333', 2018, '0.00', '0.00', '0.00', filed=False, status='Married Filing Joint'),
+    ]
+
+def test_rows_and_values():
+    results = batch()
+    summary = create_client_summary(results)
+    assert list(summary.columns) == summary_columns
+    assert summary[['SSN Last Four', 'Tax Year']].values.tolist() == [['1111', '2020'], ['1111', '2021'], ['2222', '2019'], ['3333', '2018']]
+    rows = summary.set_index(['SSN Last Four', 'Tax Year'])
+
+    filed = rows.loc[('1111', '2020')]
+    assert filed['Return Filed'] == 'Yes'
+    assert (filed['Adjusted Gross Income'], filed['Taxable Income'], filed['Tax Per Return']) == (50000.0, 37000.0, 4000.0)
+    assert (filed['Current Balance'], filed['Balance Plus Accruals']) == (0.0, 1625.5)
+    assert filed['Legal Action'] == 'None'
+    assert filed['Projected Amount Owed'] == 0.0
+
+    # Years without an account transcript have no AGI / TI / TPR
+    unfiled = rows.loc[('1111', '2021')]
+    assert unfiled['Return Filed'] == 'No'
+    assert all(math.isnan(unfiled[name]) for name in ('Adjusted Gross Income', 'Taxable Income', 'Tax Per Return'))
+    assert unfiled['Projected Amount Owed'] == create_tax_projection(results[1], 1, 'Unknown', 'Unknown')['Projected Amount Owed']
+    assert unfiled['CSED Date'] == unfiled['Legal Action'] == 'Unknown'
+
+    no_income = rows.loc[('2222', '2019')]
+    assert no_income['Projected Amount Owed'] == 0.0
+    assert no_income['Filing Status'] == 'Unknown'
+
+    zero = rows.loc[('3333', '2018')]
+    assert (zero['Return Filed'], zero['Filing Status']) == ('No', 'Married Filing Joint')
+    assert (zero['Adjusted Gross Income'], zero['Taxable Income'], zero['Tax Per Return'], zero['Projected Amount Owed']) == (0.0, 0.0, 0.0, 0.0)
+
+def test_client_totals():
+    totals = summarize_client_totals(create_client_summary(batch()))
+    assert totals.index.tolist() == ['1111', '2222', '3333']
+    assert totals.loc['1111'].tolist() == [1625.5, 4000.0, create_tax_projection(batch()[1], 1, 'Unknown', 'Unknown')['Projected Amount Owed']]
+    assert totals.loc['3333'].tolist() == [1625.5, 0.0, 0.0]
+
+def test_incremental_summary_matches_a_rebuild():
+    # Synthetic batch with few clients and years, so clients span several years and client-years
+    # have several transcripts; the handmade batch adds zero-income clients
+    results = batch() + [parse_transcript(text) for text in generate_transcripts(120, seed=21, clients=6, years=range(2019, 2023))] + batch()
+    summary = IncrementalClientSummary()
+    for count, result in enumerate(results, 1):
+        summary.add(result)
+        if count % 20 == 0:
+            pd.testing.assert_frame_equal(summary.frame(), create_client_summary(results[:count]))
+    pd.testing.assert_frame_equal(summary.frame(), create_client_summary(results))
+    pd.testing.assert_frame_equal(summary.totals(), summarize_client_totals(create_client_summary(results)))
+    views = summary.views()
+    expected = index_clients(results)
+    for ssn_last_four, frame in expected['client_summaries'].items():
+        pd.testing.assert_frame_equal(views['client_summaries'][ssn_last_four], frame)
+        pd.testing.assert_frame_equal(summary.client_frame(ssn_last_four), frame.reset_index(drop=True))
+
+    # Taking results back out leaves the summary of the rest
+    for position in range(0, len(results), 3):
+        assert summary.remove(results[position])
+    remaining = [result for position, result in enumerate(results) if position % 3]
+    pd.testing.assert_frame_equal(summary.frame(), create_client_summary(remaining))
+    pd.testing.assert_frame_equal(summary.totals(), summarize_client_totals(create_client_summary(remaining)))
@@ -0,0 +1,81 @@
+# tests/test_common.py
+import math
+import random
+
+import pytest
+
+from utils.common import _bulk_cents, amount_to_cents, amounts_to_cents, amounts_to_floats, bulk_threshold, extract_float
+
+@pytest.mark.parametrize('value, cents', [
+    ('$1,234.56', 123456),
+    ('-$1,234.00', -123400),
+    ('$-1,234.00', -123400),
+    ('(1,234.50)', -123450),
+    ('1,234.50-', -123450),
+    (' 12.00 ', 1200),
+    ('.5', 50),
+    ('5.', 500),
+    # Past cents the amount rounds half to even
+    ('1.005', 100),
+    ('1.015', 102),
+    # More digits than a float holds exactly
+    ('12345678901234567.89', 1234567890123456789),
+    ('-99,999,999,999,999,999.99', -9999999999999999999),
+])
+def test_amount_to_cents(value, cents):
+    assert amount_to_cents(value) == cents
+
+@pytest.mark.parametrize('value', ['', '$', '-', 'abc', '1e5', '1_000', 'nan', 'inf', '--5', '(5', '5)', '$1.2.3', ',5', '5$', '0.00 AS OF: Apr. 25, 2024', None])
+def test_non_amounts(value):
+    assert amount_to_cents(value) is None
+    assert extract_float(value) == 0.0
+
+def test_columns_match_the_scalar_functions():
+    values = ['$1,234.56', '-$0.50', '1.015', '12345678901234567.89', '1e5', '1_000', 'nan', ',5', '5$', '$-5', '1\x002', '', '(7.25)'] * (bulk_threshold // 4)
+    cents, valid = amounts_to_cents(values)
+    for value, value_cents, ok in zip(values, cents.tolist(), valid.tolist()):
+        expected = amount_to_cents(value)
+        assert (ok, value_cents if ok else None) == (expected is not None, expected)
+    floats = amounts_to_floats(values)
+    for value, amount in zip(values, floats.tolist()):
+        assert amount == extract_float(value) and math.copysign(1, amount) == math.copysign(1, extract_float(value))
+
+# Values of the common shape, which the bulk kernel must read itself
+bulk_amounts = [
+    '0', '0.00', '-0.00', '$0.00', '-$0.00', '.5', '5.', '$.05', '-.5',
+    '1,234.56', '$1,234.56', '-$1,234.56', '-1,234.5', '1,2,3', '1,,234.00', '1,',
+    '999,999,999,999.99', '-$9,999,999,999,999.99',
+]
+# Everything else: parentheses, trailing minus, spaces, too many digits or decimals, and
+# malformed values. The kernel must leave these to amount_to_cents.
+scalar_amounts = [
+    '(1,234.56)', '($5.00)', '1,234.56-', '$-5', ' 12.00 ', '12.00 ', '1.005', '1.015',
+    '99,999,999,999,999.99', '12345678901234567.89', '9' * 30, '1' + '0' * 19 + '.00', '000000000000012.34',
+    '', '$', '-', '.', '$-', '--5', '-$-5', '$$5', '5$', '5-5', ',5', '$,5', '-,5', '.,5', '1.2.3', '1.2,3',
+    '(5', '5)', '1e5', '1_000', 'nan', 'inf', '5\x00', '1\x002', '\x005', 'AS OF 0.00',
+]
+
+def signed_bulk_cents(values):
+    cents, negative, parsed = _bulk_cents(values)
+    return [(-amount if minus else amount) if ok else None for amount, minus, ok in zip(cents.tolist(), negative.tolist(), parsed.tolist())]
+
+def test_bulk_kernel_reads_the_common_shape():
+    assert signed_bulk_cents(bulk_amounts) == [amount_to_cents(value) for value in bulk_amounts]
+
+def test_bulk_kernel_leaves_the_rest_to_the_scalar_path():
+    assert signed_bulk_cents(scalar_amounts) == [None] * len(scalar_amounts)
+    # A value that can't be encoded as bytes, or isn't a string, sends the whole batch to the scalar path
+    assert signed_bulk_cents(['1.00', '£5.00', '١٢٣']) == [None, None, None]
+    assert signed_bulk_cents(['1.00', None]) == [None, None]
+    assert amounts_to_cents(['1.00', '£5.00', '١٢٣', None] * bulk_threshold)[0].tolist() == [100, 0, 12300, 0] * bulk_threshold
+
+def test_bulk_kernel_on_random_strings():
+    # Never vouch for a value amount_to_cents reads differently, and agree on all of it in the columns
+    generator = random.Random(25)
+    values = [''.join(generator.choices('0123456789,.$-() \x00', k=generator.randint(0, 12))) for _ in range(5000)]
+    values += [generator.choice(['', '-', '$', '-$']) + f"{generator.randint(0, 10 ** 12):,}" + generator.choice(['', '.', '.5', '.05', '.123']) for _ in range(5000)]
+    for value, cents in zip(values, signed_bulk_cents(values)):
+        assert cents is None or cents == amount_to_cents(value), value
+    cents, valid = amounts_to_cents(values)
+    assert [amount if ok else None for amount, ok in zip(cents.tolist(), valid.tolist())] == [amount_to_cents(value) for value in values]
+    assert amounts_to_floats(values).tolist() == [extract_float(value) for value in values]
@@ -0,0 +1,83 @@
+# tests/test_form_registry.py
+import pytest
+
+from utils.form_defs import form_income_withholdings
+from utils.form_registry import form_registry, income_section, withholding_section
+from utils.tax_utils import se_income_forms
+from utils.transcript_parser import parse_transcript
+
+# The tables the parser, form_defs and tax_utils kept before forms moved to utils/data/forms.json
+hard_coded_income_fields = {
+    'W-2': frozenset(['Wages, Tips and Other Compensation']),
+    '1099-MISC': frozenset(['Non-Employee Compensation', 'Medical Payments', 'Fishing Income', 'Rents', 'Royalties', 'Attorney Fees', 'Other Income', 'Substitute Payments for Dividends']),
+    '1099-NEC': frozenset(['Non-Employee Compensation']),
+    '1099-K': frozenset(['Gross Amount of Payment Card/Third Party Transactions']),
+    '1099-PATR': frozenset(['Patronage Dividends', 'Non-Patronage Distribution', 'Retained Allocations', 'Redemption Amount']),
+    '1042-S': frozenset(['Gross Income']),
+    'K-1 1065': frozenset(['Royalties', 'Ordinary Income K-1', 'Real Estate', 'Other Rental', 'Guaranteed Payments', 'Dividends', 'Interest']),
+    'K-1 1041': frozenset(['Net Rental Real Estate Income', 'Other Rental Income', 'Dividends', 'Interest', 'Long-Term Capital Gain', 'Other Portfolio and Non-Business Income']),
+    'W-2G': frozenset(['Gross Winnings']),
+    '1099-R': frozenset(['Taxable Amount']),
+    '1099-B': frozenset(['Proceeds', 'Cost or Basis']),
+    '1099-S': frozenset(['Gross Proceeds']),
+    '1099-LTC': frozenset(['Gross Long-Term Care Benefits Paid', 'Accelerated Death Benefits Paid']),
+    '3922': frozenset(['Exercise Fair Market Value per Share on Exercise Date', 'Exercise Price per Share', 'Number of Shares Transferred']),
+    'K-1 1120S': frozenset(['Dividends', 'Interest', 'Royalties', 'Ordinary Income K-1', 'Real Estate', 'Other Rental']),
+    'SSA': frozenset(['Pensions and Annuities (Total Benefits Paid)']),
+    '1099-DIV': frozenset(['Qualified Dividends', 'Cash Liquidation Distribution', 'Capital Gains', 'Ordinary Dividend']),
+    '1099-INT': frozenset(['Interest']),
+    '1099-G': frozenset(['Unemployment Compensation', 'Agricultural Subsidies', 'Taxable Grants']),
+    '1098': frozenset(['Mortgage Interest Received from Payer(s)/Borrower(s)', 'Outstanding Mortgage Principle'])
+}
+hard_coded_withholding_fields = {
+    'W-2': frozenset(['Federal Income Tax Withheld']),
+    '1099-MISC': frozenset(['Tax Withheld']),
+    '1099-NEC': frozenset(['Federal Income Tax Withheld']),
+    '1099-K': frozenset(['Federal Income Tax Withheld']),
+    '1099-PATR': frozenset(['Tax Withheld']),
+    '1042-S': frozenset(['U.S. Federal Tax Withheld']),
+    'W-2G': frozenset(['Federal Income Tax Withheld']),
+    '1099-R': frozenset(['Tax Withheld']),
+    'SSA': frozenset(['Tax Withheld']),
+    '1099-DIV': frozenset(['Tax Withheld']),
+    '1099-INT': frozenset(['Tax Withheld']),
+    '1099-G': frozenset(['Tax Withheld'])
+}
+hard_coded_se_income_forms = frozenset(['1099-MISC', '1099-NEC', '1099-K', '1099-PATR', '1042-S', 'K-1 1065', 'K-1 1041'])
+
+def test_registry_declares_the_hard_coded_forms():
+    assert form_registry.income_fields == hard_coded_income_fields
+    assert form_registry.withholding_fields == hard_coded_withholding_fields
+    assert se_income_forms == form_registry.self_employment_forms == hard_coded_se_income_forms
+    for name, fields in form_income_withholdings.items():
+        assert fields == {'Income': sorted(hard_coded_income_fields.get(name, ())), 'Withholdings': sorted(hard_coded_withholding_fields.get(name, ()))}
+
+def test_labels_classify_like_the_hard_coded_tables():
+    for name in form_registry.forms:
+        income = hard_coded_income_fields.get(name, frozenset())
+        withholding = hard_coded_withholding_fields.get(name, frozenset())
+        for label in income | withholding | {'Tax Withheld', 'Interest', 'Employer Identification Number (EIN)'}:
+            # The old parser checked income first, then withholding
+            expected = (income_section, label) if label in income else (withholding_section, label) if label in withholding else None
+            assert form_registry.classify(name, label) == expected, (name, label)
+    assert form_registry.classify('8888', 'Interest') is None
+    # Aliases map to the canonical label
+    assert form_registry.classify('W-2', 'Wages, Tips, and Other Compensation') == (income_section, 'Wages, Tips and Other Compensation')
+
+@pytest.mark.parametrize('line, form', [
+    ('Form W-2 Wage and Tax Statement', 'W-2'),
+    ('Form W-2G Certain Gambling Winnings', 'W-2G'),
+    ('Form 1099-INT', '1099-INT'),
+    ("Form K-1 1065 Partner's Share of Income", 'K-1 1065'),
+    ('Form K-1 1041', 'K-1 1041'),
+    ('Form K-1 1120S', 'K-1 1120S'),
+    ('Form SSA-1099 Social Security Benefit Statement', 'SSA'),
+    # Unregistered names keep their first word, as the old parser did
+    ('Form K-1 9999', 'K-1'),
+    ('Form 8888 Allocation of Refund', '8888'),
+])
+def test_form_names(line, form):
+    start = line.index(' ') + 1
+    assert form_registry.form_for_word(line[start:].split(' ', 1)[0], line, start) == form
+    parsed = parse_transcript(f"Wage and Income Transcript\nSSN Provided: XXX-XX-1234\nTax Period Requested: December, 2020\n{line}\nInterest: $5.00")
+    assert list(parsed['Income']) == [form]
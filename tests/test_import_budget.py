@@ -0,0 +1,48 @@
+# tests/test_import_budget.py
+# Import-time budget for the core (non-UI) modules. Each module is imported in a fresh interpreter,
+# so pool workers and CLI runs see the same cost. A module fails when it goes over its budget or
+# pulls in one of the heavy/UI packages at import time.
+import os
+import subprocess
+import sys
+
+import pytest
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Module -> budget in milliseconds (cumulative import time, measured with -X importtime)
+import_budgets = {
+    'utils.transcript_parser': 50,
+    'utils.transcript_sources': 60,
+    'utils.tax_utils': 60,
+    'utils.client_sum': 80,
+    'utils.pdf_utils': 60,
+    'utils.transcript_model': 60,
+    'utils.calculations': 60,
+}
+# None of these may be imported just by importing a core module
+forbidden_modules = ('streamlit', 'pandas', 'numpy', 'pyarrow', 'requests', 'PyPDF2', 'fitz', 'pypdfium2', 'pdfplumber', 'multiprocessing')
+repeats = 3
+
+def measure(module: str):
+    # (best cumulative import time in ms, forbidden modules that were loaded)
+    code = f"import sys, {module}; print(','.join(name for name in {forbidden_modules!r} if name in sys.modules))"
+    best = None
+    loaded = ''
+    for _ in range(repeats):
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            cwd=repo_root, capture_output=True, text=True, check=True,
+        )
+        loaded = completed.stdout.strip()
+        for line in completed.stderr.splitlines():
+            parts = [part.strip() for part in line.split('|')]
+            if len(parts) == 3 and parts[2] == module:
+                micros = int(parts[1])
+                best = micros if best is None else min(best, micros)
+    return best / 1000, [name for name in loaded.split(',') if name]
+
+@pytest.mark.parametrize('module, budget', import_budgets.items())
+def test_import_budget(module, budget):
+    elapsed, loaded = measure(module)
+    assert not loaded, f"{module} imports {', '.join(loaded)}"
+    assert elapsed <= budget, f"{module} took {elapsed:.1f} ms to import, over its {budget} ms budget"
@@ -0,0 +1,104 @@
+# tests/test_ingest.py
+import io
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from synthetic import generate_transcripts
+from utils.client_sum import IncrementalClientSummary, create_client_summary, summarize_client_totals
+from utils.ingest import IngestJob, collect_results, discard_uploads
+from utils.parse_cache import ParseCache
+from utils.transcript_parser import parse_transcript
+
+class Upload(io.BytesIO):
+    # The parts of a Streamlit UploadedFile the ingest job reads
+    def __init__(self, name: str, data: bytes):
+        super().__init__(data)
+        self.name = name
+
+def uploads(count: int):
+    return [(f"id{position}", Upload(f"f{position}.txt", text.encode())) for position, text in enumerate(generate_transcripts(count, seed=7))]
+
+def test_cached_uploads_are_added_once_and_removed_cleanly():
+    files = uploads(12)
+    cache = ParseCache()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        # A first session parses the files and fills the cache
+        first = IngestJob(executor, cache)
+        first.add_uploads(files)
+        list(first.as_completed())
+
+        # A second session gets every file from the cache
+        job = IngestJob(executor, cache)
+        parsed = {}
+        summary = IncrementalClientSummary()
+        job.add_uploads(files)
+        added = list(collect_results(job, parsed, summary))
+        assert added == [upload_id for upload_id, _ in files]
+        assert cache.hits == len(files)
+        assert len(summary) == len(files)
+
+        # Removing an upload leaves exactly the summary of the remaining files
+        keep = [upload_id for upload_id, _ in files if upload_id != 'id3']
+        discard_uploads(job, parsed, summary, keep)
+        assert list(collect_results(job, parsed, summary)) == []
+        remaining = [parsed[upload_id] for upload_id in keep]
+        pd.testing.assert_frame_equal(summary.frame(), create_client_summary(remaining))
+
+def test_results_finished_during_an_interrupted_run_are_added_once():
+    files = uploads(6)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        job = IngestJob(executor)
+        job.add_uploads(files)
+        # The rerun stopped the page after the job reported a few results but before they were added
+        reported = job.as_completed()
+        for _ in range(3):
+            next(reported)
+        parsed = {}
+        summary = IncrementalClientSummary()
+        assert sorted(collect_results(job, parsed, summary)) == sorted(upload_id for upload_id, _ in files)
+        assert len(summary) == len(files)
+
+def test_a_text_dump_is_parsed_as_one_item_per_transcript():
+    texts = generate_transcripts(5, seed=8)
+    files = [('dump', Upload('dump.txt', '\n'.join(texts[:4]).encode())), ('single', Upload('single.txt', texts[4].encode()))]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        job = IngestJob(executor)
+        job.add_uploads(files)
+        items = [item_id for upload_id, _ in files for item_id, _, _ in job.items(upload_id)]
+        assert items == ['dump#1', 'dump#2', 'dump#3', 'dump#4', 'single']
+        parsed = {}
+        summary = IncrementalClientSummary()
+        assert sorted(collect_results(job, parsed, summary)) == sorted(items)
+        assert [parsed[item_id].tracking_number for item_id in items] == [parse_transcript(text)['Tracking Number'] for text in texts]
+
+        # Removing the dump removes every transcript it held
+        discard_uploads(job, parsed, summary, ['single'])
+        assert list(parsed) == ['single'] and len(summary) == 1
+
+def test_summary_keeps_upload_order_whatever_order_results_finish_in():
+    # Few clients and years, so most client-years have several transcripts and the later upload wins
+    results = [parse_transcript(text) for text in generate_transcripts(40, seed=3, clients=3, years=range(2020, 2023))]
+    item_ids = [f"id{position}" for position in range(len(results))]
+    summary = IncrementalClientSummary()
+    summary.set_order(item_ids)
+    for position in random.Random(1).sample(range(len(results)), len(results)):
+        summary.add(results[position], item_ids[position])
+    pd.testing.assert_frame_equal(summary.frame(), create_client_summary(results))
+    pd.testing.assert_frame_equal(summary.totals(), summarize_client_totals(create_client_summary(results)))
+
+    # Dropping uploads keeps the rest in place; new ones go after them
+    for item_id in item_ids[5:15]:
+        summary.discard(item_id)
+    extra = [parse_transcript(text) for text in generate_transcripts(5, seed=4, clients=3, years=range(2020, 2023))]
+    summary.set_order(item_ids[:5] + item_ids[15:] + ['new0', 'new1', 'new2', 'new3', 'new4'])
+    for position in (3, 0, 4, 2, 1):
+        summary.add(extra[position], f"new{position}")
+    expected = results[:5] + results[15:] + extra
+    pd.testing.assert_frame_equal(summary.frame(), create_client_summary(expected))
+
+    # A different order re-merges every row
+    order = list(range(len(expected)))[::-1]
+    summary.set_order([(item_ids[:5] + item_ids[15:] + [f"new{position}" for position in range(5)])[position] for position in order])
+    pd.testing.assert_frame_equal(summary.frame(), create_client_summary([expected[position] for position in order]))
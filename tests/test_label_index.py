@@ -0,0 +1,66 @@
+# tests/test_label_index.py
+import pytest
+
+from utils import label_index
+from utils.label_index import LabelIndex, normalize_label
+from utils.transcript_parser import income_fields, withholding_fields
+
+@pytest.fixture(params=['rapidfuzz', 'difflib'])
+def matcher(request, monkeypatch):
+    # Both fuzzy backends must give the same answers
+    if request.param == 'difflib':
+        monkeypatch.setattr(label_index, '_rapidfuzz', lambda: None)
+    elif label_index._rapidfuzz() is None:
+        pytest.skip("rapidfuzz is not installed")
+    return request.param
+
+def test_exact_labels_resolve_to_themselves(matcher):
+    # Every label the old hard-coded per-form sets accepted is still accepted as is
+    for fields in (income_fields, withholding_fields):
+        index = LabelIndex(fields)
+        for form, labels in fields.items():
+            for label in labels:
+                assert index.resolve(form, label) == label
+
+@pytest.mark.parametrize('form, label, resolved', [
+    # Punctuation, case and '&' drift
+    ('W-2', 'Wages, Tips, and Other Compensation', 'Wages, Tips and Other Compensation'),
+    ('W-2', 'WAGES TIPS AND OTHER COMPENSATION', 'Wages, Tips and Other Compensation'),
+    ('W-2', 'Wages Tips & Other Compensation', 'Wages, Tips and Other Compensation'),
+    ('1099-MISC', 'Non Employee Compensation', 'Non-Employee Compensation'),
+    # OCR misreads
+    ('1099-MISC', 'Royaltics', 'Royalties'),
+    ('1099-INT', 'lnterest', 'Interest'),
+    ('1099-G', 'Unemployrnent Compensation', 'Unemployment Compensation'),
+])
+def test_near_misses(matcher, form, label, resolved):
+    assert LabelIndex(income_fields).resolve(form, label) == resolved
+
+@pytest.mark.parametrize('fields, form, label', [
+    # Labels the old sets didn't hold stay unmatched
+    (withholding_fields, 'W-2', 'State Income Tax Withheld'),
+    (income_fields, 'W-2', 'Employer Identification Number (EIN)'),
+    (income_fields, 'W-2', 'Social Security Wages'),
+    (income_fields, '1099-INT', 'Tax Withheld'),
+    (income_fields, 'W-2', ''),
+    (income_fields, 'W-2', '  ,  '),
+    # Labels of another form, and forms without a table
+    (income_fields, 'W-2', 'Non-Employee Compensation'),
+    (income_fields, '8888', 'Interest'),
+])
+def test_no_match(matcher, fields, form, label):
+    assert LabelIndex(fields).resolve(form, label) is None
+
+def test_resolve_many_matches_resolve(matcher):
+    labels = ['Wages, Tips and Other Compensation', 'Wages, Tips, and Other Compensation', 'Royaltics', 'State Income Tax Withheld', 'Interest', '']
+    for form in ('W-2', '1099-MISC', 'K-1 1065', '8888'):
+        expected = [LabelIndex(income_fields).resolve(form, label) for label in labels]
+        assert LabelIndex(income_fields).resolve_many(form, labels) == expected
+        # And the memoized answers agree with fresh ones
+        index = LabelIndex(income_fields)
+        index.resolve_many(form, labels)
+        assert [index.resolve(form, label) for label in labels] == expected
+
+def test_normalize_label():
+    assert normalize_label('Wages, Tips, & Other Compensation ') == 'wages tips and other compensation'
+    assert normalize_label('Mortgage Interest Received from Payer(s)/Borrower(s)') == 'mortgage interest received from payer s borrower s'
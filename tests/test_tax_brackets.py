@@ -0,0 +1,69 @@
+# tests/test_tax_brackets.py
+import numpy as np
+import pytest
+
+from utils.tax_brackets import (
+    bracket_years, filing_statuses, get_bracket_table, legacy_bracket_table, load_bracket_tables,
+    normalize_filing_status, tax_for_income, tax_for_incomes,
+)
+from utils.tax_utils import calculate_tax, calculate_tax_batch
+
+years = range(2013, 2025)
+
+def bracket_sum(table, income):
+    # Tax bracket by bracket, without the precomputed base amounts
+    taxable = max(0.0, income - table.standard_deduction)
+    uppers = table.thresholds[1:] + (float('inf'),)
+    return sum(min(max(taxable - lower, 0.0), upper - lower) * rate for lower, upper, rate in zip(table.thresholds, uppers, table.rates))
+
+def test_every_year_and_status_is_bundled():
+    assert bracket_years() == (2013, 2024)
+    tables = load_bracket_tables()
+    assert set(tables) == {(year, status) for year in years for status in filing_statuses}
+    for table in tables.values():
+        assert table.thresholds[0] == 0.0
+        assert list(table.thresholds) == sorted(set(table.thresholds))
+        assert len(table.rates) == len(table.thresholds) == len(table.base_tax)
+
+@pytest.mark.parametrize('year', years)
+@pytest.mark.parametrize('status', filing_statuses)
+def test_bracket_edges(year, status):
+    table = get_bracket_table(year, status)
+    # Taxable income on, just below and just above every bracket edge, plus zero and the deduction itself
+    taxable = [0.0] + [edge + offset for edge in table.thresholds[1:] for offset in (-0.01, 0.0, 0.01)]
+    incomes = [value + table.standard_deduction for value in taxable] + [0.0, table.standard_deduction / 2]
+    scalar = [tax_for_income(table, income) for income in incomes]
+    for income, tax in zip(incomes, scalar):
+        assert tax == pytest.approx(bracket_sum(table, income), abs=0.01)
+    # At an edge the tax is exactly what the brackets below it add up to
+    for position, edge in enumerate(table.thresholds):
+        assert tax_for_income(table, edge + table.standard_deduction) == table.base_tax[position]
+    # searchsorted picks the same bracket as bisect, edges included
+    assert tax_for_incomes(table, incomes).tolist() == scalar
+    assert calculate_tax_batch(np.array(incomes), [str(year)] * len(incomes), [status] * len(incomes)).tolist() == scalar
+    assert [calculate_tax(income, str(year), status) for income in incomes] == scalar
+
+def test_2023_single():
+    table = get_bracket_table('2023', 'Single')
+    assert table.standard_deduction == 13850
+    assert calculate_tax(13850 + 44725, '2023', 'Single') == 1100 + 33725 * 0.12
+
+@pytest.mark.parametrize('year, table_year', [('2010', 2013), ('2013', 2013), ('2024', 2024), ('2031', 2024)])
+def test_years_outside_the_table_use_the_nearest(year, table_year):
+    assert get_bracket_table(year, 'single') == load_bracket_tables()[(table_year, 'single')]
+
+@pytest.mark.parametrize('year', [None, '', 'Unknown'])
+def test_no_year_uses_the_legacy_schedule(year):
+    assert get_bracket_table(year, 'married_joint') == legacy_bracket_table
+
+@pytest.mark.parametrize('printed, status', [
+    ('Single', 'single'),
+    ('MARRIED FILING JOINT', 'married_joint'),
+    ('Qualifying Surviving Spouse', 'married_joint'),
+    ('Married Filing Separate', 'married_separate'),
+    ('Head of Household', 'head_of_household'),
+    ('Unknown', 'single'),
+    (None, 'single'),
+])
+def test_filing_status(printed, status):
+    assert normalize_filing_status(printed) == status
@@ -0,0 +1,41 @@
+# tests/test_tax_utils.py
+import pytest
+
+from synthetic import generate_transcripts
+from utils.tax_utils import create_tax_projection, create_tax_projections, projection_rows
+from utils.transcript_parser import parse_transcript
+
+projection_columns = ["(TP) Income Subject to SE Tax", "(TP) Income Not Subject to SE Tax", "(TP) Withholding", "Total Income", "Projected Tax", "Projected Amount Owed"]
+
+def wage_income(*forms):
+    lines = ["Wage and Income Transcript", "SSN Provided: XXX-XX-1111", "Tax Period Requested: December, 2022"]
+    for form, amounts in forms:
+        lines.append(f"Form {form}")
+        lines += [f"{label}: {amount}" for label, amount in amounts]
+    return parse_transcript("\n".join(lines))
+
+def results():
+    # Amounts whose float sum drifts off the cent (0.1 + 0.2 style), plus a synthetic batch
+    handmade = [
+        wage_income(('W-2 Wage and Tax Statement', [('Wages, Tips and Other Compensation', '$0.10')]), ('1099-INT', [('Interest', '$0.20')])),
+        wage_income(('1099-MISC', [('Rents', '$190,696.13'), ('Royalties', '$394,318.67'), ('Other Income', '$259,763.92')])),
+        wage_income(('W-2 Wage and Tax Statement', [('Wages, Tips and Other Compensation', '(1,234.56)')]), ('1099-INT', [('Interest', '$12.345')])),
+        wage_income(),
+    ]
+    return handmade + [parse_transcript(text) for text in generate_transcripts(200, seed=9)]
+
+def test_batch_matches_scalar_exactly():
+    batch = results()
+    projections = create_tax_projections(projection_rows(batch), by=['Document'])
+    assert projections.index.tolist() == [document for document, result in enumerate(batch) if projection_rows([result]).shape[0]]
+    for document, row in projections.iterrows():
+        scalar = create_tax_projection(batch[document], 1, 'Unknown', 'Unknown')
+        # Identical floats, not just close ones
+        assert [row[column] for column in projection_columns] == [scalar[column] for column in projection_columns]
+
+def test_totals_are_whole_cents():
+    projection = create_tax_projection(results()[0], 1, 'Unknown', 'Unknown')
+    assert projection["Total Income"] == 0.3
+    projection = create_tax_projection(results()[1], 1, 'Unknown', 'Unknown')
+    assert projection["(TP) Income Subject to SE Tax"] == projection["Total Income"] == 844778.72
+    assert create_tax_projection(results()[3], 1, 'Unknown', 'Unknown')["Projected Amount Owed"] == 0
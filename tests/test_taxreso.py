@@ -0,0 +1,28 @@
+# tests/test_taxreso.py
+import json
+
+import pandas as pd
+
+import taxreso
+from synthetic import generate_transcripts
+from utils.client_sum import create_client_summary
+from utils.transcript_parser import parse_transcript
+
+def test_failed_files_stay_out_of_the_summary(tmp_path):
+    inputs = tmp_path / 'inputs'
+    inputs.mkdir()
+    texts = generate_transcripts(3, seed=7)
+    for position, text in enumerate(texts):
+        (inputs / f'{position}.txt').write_text(text)
+    (inputs / 'broken.pdf').write_bytes(b'not a pdf')
+    output = tmp_path / 'summary.csv'
+    results = tmp_path / 'results.jsonl'
+
+    # A failed file makes the run exit with 1
+    assert taxreso.main([str(inputs), '-o', str(output), '--results', str(results), '-q']) == 1
+    summary = pd.read_csv(output, dtype={'SSN Last Four': str, 'Tax Year': str})
+    expected = create_client_summary([parse_transcript(text) for text in texts])
+    assert summary[['SSN Last Four', 'Tax Year']].values.tolist() == expected[['SSN Last Four', 'Tax Year']].values.tolist()
+    # The failure is still reported with the other results
+    lines = [json.loads(line) for line in results.read_text().splitlines()]
+    assert [line['Source'] for line in lines if 'Error' in line] == [str(inputs / 'broken.pdf')]
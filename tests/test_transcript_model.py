@@ -0,0 +1,28 @@
+# tests/test_transcript_model.py
+import pickle
+
+from synthetic import generate_transcripts
+from utils.transcript_model import Transcript, to_dicts, to_transcripts
+from utils.transcript_parser import error_result, parse_transcript
+
+def test_round_trip():
+    results = [parse_transcript(text) for text in generate_transcripts(200, seed=11)] + [error_result(ValueError('bad file'))]
+    transcripts = to_transcripts(results)
+    assert to_dicts(transcripts) == results
+    for transcript, result in zip(transcripts, results):
+        assert list(transcript.to_dict()) == list(result)
+        for key in result:
+            assert transcript[key] == result[key]
+    assert pickle.loads(pickle.dumps(transcripts)) == transcripts
+
+def test_dict_views_are_built_once():
+    transcript = Transcript.from_dict(parse_transcript(generate_transcripts(1, seed=12)[0]))
+    assert transcript['Income'] is transcript.income
+    assert transcript['Details'] is transcript.details
+    # to_dict hands out its own copies
+    data = transcript.to_dict()
+    data['Income'].clear()
+    data['Details'].clear()
+    assert transcript.income and transcript.details
+    # The cached views don't count towards equality
+    assert transcript == Transcript.from_dict(transcript.to_dict())
@@ -0,0 +1,29 @@
+# tests/test_transcript_sources.py
+import zipfile
+
+import pytest
+
+from synthetic import generate_transcripts
+from utils.transcript_sources import iter_transcript_files
+
+def test_unreadable_inputs_are_reported_and_skipped(tmp_path):
+    first, second = generate_transcripts(2, seed=2)
+    (tmp_path / 'a.txt').write_text(first)
+    (tmp_path / 'bad.zip').write_bytes(b'not a zip')
+    with zipfile.ZipFile(tmp_path / 'ok.zip', 'w') as archive:
+        archive.writestr('b.txt', second)
+    inputs = [str(tmp_path / name) for name in ('a.txt', 'missing.txt', 'missing/', 'bad.zip', 'none*.pdf', 'ok.zip')]
+
+    errors = []
+    items = list(iter_transcript_files(inputs, on_error=lambda path, error: errors.append((path, type(error)))))
+    assert [data.decode() for _, data in items] == [first, second]
+    assert errors == [
+        (inputs[1], FileNotFoundError),
+        (inputs[2], FileNotFoundError),
+        (inputs[3], zipfile.BadZipFile),
+        (inputs[4], FileNotFoundError),
+    ]
+
+    # Without on_error the first unreadable input raises
+    with pytest.raises(FileNotFoundError):
+        list(iter_transcript_files(inputs))
@@ -0,0 +1,174 @@
+# utils/account_events.py
+# The transaction-code (TC) lines of Account Transcripts / Records of Account as one typed event
+# array, and the collection status computed from it for every transcript of a batch at once:
+# the CSED (collection statute expiration date), legal actions and accruals. numpy is imported on
+# first use, like the rest of the computation modules.
+import re
+from typing import List, Optional, Tuple
+from utils.common import amounts_to_cents, extract_float
+from utils.transcript_parser import transaction_keys
+
+# One row per transaction line, sorted by document position then posting date
+event_fields = [('doc', 'i4'), ('code', 'i2'), ('date', 'datetime64[D]'), ('cycle', 'i4'), ('cents', 'i8'), ('levy', '?')]
+
+# Assessments start a collection statute: the original return (150), additional tax (290, 298)
+# and examination assessments (300, 308). The CSED runs from the latest one.
+assessment_codes = (150, 290, 298, 300, 308)
+collection_statute_years = 10
+# Events that suspend the statute: (opening code, closing codes, days added after the close).
+# Offers in compromise toll while pending and 30 days past rejection, return or withdrawal;
+# bankruptcy and other litigation toll until discharge or dismissal plus six months.
+tolling_codes = (
+    (480, (481, 482, 483), 30),
+    (520, (521, 522), 180),
+)
+lien_code = 582
+lien_release_code = 583
+notice_code = 971
+payment_code = 670
+# A notice (971) is a levy notice when its explanation says so ('Intent to levy collection due
+# process notice') or it carries action code 069, the notice of intent to levy; a payment (670)
+# when its explanation names levy proceeds. Other notices are Notice Issued.
+levy_action_pattern = re.compile(r'\blevy\b|\bAC\s*0?69\b', re.I)
+# Legal Action lists these, in this order; 'None' when an account transcript shows none of them
+legal_actions = ('Lien', 'Levy', 'Notice Issued')
+# Printed in the account transcript header, e.g. 'ACCRUED INTEREST: 12.50 AS OF: Apr. 25, 2024';
+# the amount is the part in front of the as-of date
+accrual_labels = ('ACCRUED INTEREST', 'ACCRUED PENALTY')
+leading_amount_pattern = re.compile(r'-?\$?-?[\d,]*\.?\d+')
+
+def is_account_result(result) -> bool:
+    return result['Transcript Type'] in ["Account Transcript", "Record of Account"]
+
+def get_transactions(result) -> List[Tuple[str, ...]]:
+    # (code, explanation, cycle, date, amount) for each transaction line of a result dict or Transcript
+    transactions = getattr(result, 'transactions', None)
+    if transactions is not None:
+        return list(transactions)
+    return [tuple(transaction[key] for key in transaction_keys) for transaction in result.get('Transactions') or ()]
+
+def transaction_events(results) -> 'np.ndarray':
+    # Structured array of event_fields for every transaction line in results; 'doc' is the
+    # result's position. Dates that don't parse are NaT.
+    import numpy as np
+    # 'cents' collects the printed amounts; they are converted together below
+    columns = {name: [] for name, _ in event_fields}
+    for doc, result in enumerate(results):
+        for code, explanation, cycle, date, amount in get_transactions(result):
+            number = int(code) if code.isdigit() else -1
+            columns['doc'].append(doc)
+            columns['code'].append(number)
+            columns['levy'].append(number in (notice_code, payment_code) and levy_action_pattern.search(explanation) is not None)
+            month, _, rest = date.partition('-')
+            day, _, year = rest.partition('-')
+            columns['date'].append(f"{year}-{month}-{day}" if year else 'NaT')
+            columns['cycle'].append(int(cycle) if cycle.isdigit() else 0)
+            columns['cents'].append(amount)
+    events = np.empty(len(columns['doc']), dtype=event_fields)
+    for name, dtype in event_fields:
+        if name not in ('date', 'cents'):
+            events[name] = np.array(columns[name], dtype=dtype)
+    # Amounts that don't parse count as 0
+    events['cents'] = amounts_to_cents(columns['cents'])[0]
+    try:
+        events['date'] = np.array(columns['date'], dtype='datetime64[D]')
+    except ValueError:
+        # A malformed date (e.g. '13-45-2021') fails the whole column; fall back per value
+        events['date'] = [_to_date(value) for value in columns['date']]
+    return events[np.lexsort((events['code'], events['date'], events['doc']))]
+
+def _to_date(value: str):
+    import numpy as np
+    try:
+        return np.datetime64(value, 'D')
+    except ValueError:
+        return np.datetime64('NaT', 'D')
+
+def add_years(dates: 'np.ndarray', years: int) -> 'np.ndarray':
+    # Same month and day `years` later; Feb 29 rolls over to Mar 1 in non-leap years
+    import numpy as np
+    months = dates.astype('datetime64[M]')
+    return (months + 12 * years).astype('datetime64[D]') + (dates - months.astype('datetime64[D]'))
+
+def _tolled_days(events: 'np.ndarray', count: int) -> Tuple['np.ndarray', 'np.ndarray']:
+    # (days the statute was suspended, still suspended) per document. Each opening event pairs
+    # with the next closing event of its kind in the same document; repeated openings before a
+    # close count once.
+    import numpy as np
+    tolled = np.zeros(count, dtype='i8')
+    suspended = np.zeros(count, dtype=bool)
+    dated = events[~np.isnat(events['date'])]
+    for open_code, close_codes, extra_days in tolling_codes:
+        rows = dated[(dated['code'] == open_code) | np.isin(dated['code'], close_codes)]
+        if not rows.size:
+            continue
+        docs = rows['doc']
+        days = rows['date'].astype('i8')
+        is_close = rows['code'] != open_code
+        # Index of the next closing row at or after each row
+        positions = np.arange(rows.size)
+        next_close = np.minimum.accumulate(np.where(is_close, positions, rows.size)[::-1])[::-1]
+        repeated = np.r_[False, ~is_close[:-1] & (docs[:-1] == docs[1:])]
+        opens = positions[~is_close & ~repeated]
+        closes = next_close[opens]
+        closed = closes < rows.size
+        closed[closed] = docs[closes[closed]] == docs[opens[closed]]
+        np.add.at(tolled, docs[opens[closed]], days[closes[closed]] - days[opens[closed]] + extra_days)
+        suspended[docs[opens[~closed]]] = True
+    return tolled, suspended
+
+def collection_status(results, events: Optional['np.ndarray'] = None) -> Tuple[List[str], List[str]]:
+    # (CSED Date, Legal Action) lists for results, by position. Results other than account
+    # transcripts get 'Unknown'; so does the CSED of an account transcript without an assessment.
+    # CSED Date is 'Suspended' while an offer or bankruptcy is still open.
+    import numpy as np
+    results = results if isinstance(results, list) else list(results)
+    count = len(results)
+    if events is None:
+        events = transaction_events(results)
+    docs = events['doc']
+    codes = events['code']
+    days = events['date'].astype('i8')
+    dated = ~np.isnat(events['date'])
+
+    never = np.iinfo('i8').min
+    assessed = np.full(count, never, dtype='i8')
+    mask = dated & np.isin(codes, assessment_codes)
+    np.maximum.at(assessed, docs[mask], days[mask])
+    tolled, suspended = _tolled_days(events, count)
+    has_assessment = assessed != never
+    csed = add_years(np.where(has_assessment, assessed, 0).astype('datetime64[D]'), collection_statute_years) + tolled
+
+    # A lien stands when the latest lien event is a filing rather than a release
+    last_lien = np.full(count, never, dtype='i8')
+    last_release = np.full(count, never, dtype='i8')
+    np.maximum.at(last_lien, docs[codes == lien_code], days[codes == lien_code])
+    np.maximum.at(last_release, docs[codes == lien_release_code], days[codes == lien_release_code])
+    flags = {
+        'Lien': (last_lien != never) & (last_lien > last_release),
+        'Levy': np.zeros(count, dtype=bool),
+        'Notice Issued': np.zeros(count, dtype=bool),
+    }
+    flags['Levy'][docs[events['levy']]] = True
+    flags['Notice Issued'][docs[(codes == notice_code) & ~events['levy']]] = True
+
+    csed_dates = ['Unknown'] * count
+    legal_action = ['Unknown'] * count
+    for position, iso_date in zip(np.flatnonzero(has_assessment).tolist(), np.datetime_as_string(csed[has_assessment]).tolist()):
+        # 'YYYY-MM-DD' -> the MM-DD-YYYY the transcripts use
+        csed_dates[position] = 'Suspended' if suspended[position] else f"{iso_date[5:7]}-{iso_date[8:10]}-{iso_date[:4]}"
+    for position, result in enumerate(results):
+        if is_account_result(result):
+            legal_action[position] = ', '.join(action for action in legal_actions if flags[action][position]) or 'None'
+        else:
+            csed_dates[position] = 'Unknown'
+    return csed_dates, legal_action
+
+def _leading_amount(value) -> float:
+    match = leading_amount_pattern.match(value.strip()) if isinstance(value, str) else None
+    return extract_float(match.group()) if match else 0.0
+
+def get_accruals(result) -> float:
+    # Accrued interest plus accrued penalty printed on an account transcript; 0.0 when it prints neither
+    income = result['Income']
+    return sum(_leading_amount(income.get(label)) for label in accrual_labels)
@@ -1,26 +1,174 @@
-# utils/form_calculations.py
+# utils/calculations.py
+# Per-form calculations. Each one is a calculate_batch(rows) over a calculation_rows table (the
+# projection_rows layout: one row per amount, 'Document' is the result's position) returning one
+# row per document, plus a plain-Python calculate_totals(totals) giving the same values for a
+# single parsed result without pandas. calculate_based_on_forms groups a whole batch by form and runs each
+# calculation once over its group.
+from typing import Callable, Dict, NamedTuple, Optional
+from utils.common import extract_float
+from utils.form_registry import form_registry
+from utils.tax_utils import amount_cents, projection_row_columns, projection_rows, return_income_fields, se_income_forms
 
-def calculate_for_w2(data):
-    # Logic for W-2
-    return {"calculation": "W2 result"}
+wage_and_income_summary = "Wage and Income Summary"
+# Flat amounts a Wage and Income Summary carries in place of per-form fields
+summary_income_field = 'Total Income'
+summary_withholding_field = 'Total Withholding'
 
-def calculate_for_1099(data):
-    # Logic for 1099
-    return {"calculation": "1099 result"}
+class FormTotals(NamedTuple):
+    # One document's amounts for one form, in dollars
+    income: float
+    withholding: float
+    se_income: float
 
-def calculate_for_wage_and_income_summary(data):
-    # Logic for Wage and Income Summary
-    return {"calculation": "Wage and Income Summary result"}
+class CalculationHook(NamedTuple):
+    calculate_batch: Callable[['pd.DataFrame'], 'pd.DataFrame']
+    calculate_totals: Callable[[FormTotals], Dict[str, float]]
 
-def calculate_based_on_form(form_type, data):
-    calculation_map = {
-        "W-2": calculate_for_w2,
-        "1099-MISC": calculate_for_1099,
-        "Wage and Income Summary": calculate_for_wage_and_income_summary,
-        # Add more form types here
+class Calculation(NamedTuple):
+    calculate_batch: Callable[['pd.DataFrame'], 'pd.DataFrame']
+    calculate: Callable[[Dict[str, object]], Dict[str, object]]
+
+def calculation_rows(results) -> 'pd.DataFrame':
+    # projection_rows for results, plus one row per Wage and Income Summary with its totals under
+    # the form 'Wage and Income Summary'
+    import pandas as pd
+    results = results if isinstance(results, list) else list(results)
+    rows = projection_rows(results)
+    summaries = [(document, result) for document, result in enumerate(results) if result['Transcript Type'] == wage_and_income_summary]
+    if not summaries:
+        return rows
+    summary_rows = pd.DataFrame({
+        'Document': [document for document, _ in summaries],
+        'Client': [result['SSN'] for _, result in summaries],
+        'Tax Year': [result['Tax Period'] for _, result in summaries],
+        'Filing Status': [None] * len(summaries),
+        'Form': [wage_and_income_summary] * len(summaries),
+        'Income': [extract_float(result['Income'].get(summary_income_field, '0')) for _, result in summaries],
+        'Withholding': [extract_float(result['Income'].get(summary_withholding_field, '0')) for _, result in summaries],
+    }, columns=projection_row_columns)
+    return pd.concat([rows, summary_rows], ignore_index=True) if len(rows) else summary_rows
+
+def _cents(amounts: 'pd.Series') -> 'np.ndarray':
+    # Amounts in whole cents, summed as integers so the batch totals match form_totals
+    import numpy as np
+    return np.rint(amounts.to_numpy(dtype=float) * 100).astype(np.int64)
+
+def _document_totals(rows: 'pd.DataFrame') -> 'pd.DataFrame':
+    # Income and Withholding summed per document, indexed by 'Document'
+    import pandas as pd
+    cents = pd.DataFrame({'Income': _cents(rows['Income']), 'Withholding': _cents(rows['Withholding'])}, index=rows.index)
+    return cents.groupby(rows['Document'], sort=False).sum() / 100
+
+def _rate(numerator: 'pd.Series', denominator: 'pd.Series') -> 'pd.Series':
+    # numerator / denominator, 0.0 where there is nothing to divide by
+    return (numerator / denominator.where(denominator > 0)).fillna(0.0)
+
+def _scalar_rate(numerator: float, denominator: float) -> float:
+    return numerator / denominator if denominator > 0 else 0.0
+
+def calculate_w2_batch(rows: 'pd.DataFrame') -> 'pd.DataFrame':
+    import pandas as pd
+    totals = _document_totals(rows)
+    return pd.DataFrame({
+        'Wages': totals['Income'],
+        'Withholding': totals['Withholding'],
+        'Withholding Rate': _rate(totals['Withholding'], totals['Income']),
+    })
+
+def calculate_w2(totals: FormTotals) -> Dict[str, float]:
+    return {
+        'Wages': totals.income,
+        'Withholding': totals.withholding,
+        'Withholding Rate': _scalar_rate(totals.withholding, totals.income),
+    }
+
+def calculate_1099_batch(rows: 'pd.DataFrame') -> 'pd.DataFrame':
+    import pandas as pd
+    totals = _document_totals(rows)
+    se_cents = pd.Series(_cents(rows['Income'].where(rows['Form'].isin(se_income_forms), 0.0)), index=rows.index)
+    se_income = se_cents.groupby(rows['Document'], sort=False).sum() / 100
+    return pd.DataFrame({
+        'Income': totals['Income'],
+        'Withholding': totals['Withholding'],
+        'Income Subject to SE Tax': se_income,
+    })
+
+def calculate_1099(totals: FormTotals) -> Dict[str, float]:
+    return {
+        'Income': totals.income,
+        'Withholding': totals.withholding,
+        'Income Subject to SE Tax': totals.se_income,
     }
 
-    if form_type in calculation_map:
-        return calculation_map[form_type](data)
+def calculate_wage_and_income_summary_batch(rows: 'pd.DataFrame') -> 'pd.DataFrame':
+    import pandas as pd
+    totals = _document_totals(rows)
+    return pd.DataFrame({
+        'Total Income': totals['Income'],
+        'Total Withholding': totals['Withholding'],
+        'Withholding Rate': _rate(totals['Withholding'], totals['Income']),
+    })
+
+def calculate_wage_and_income_summary(totals: FormTotals) -> Dict[str, float]:
+    return {
+        'Total Income': totals.income,
+        'Total Withholding': totals.withholding,
+        'Withholding Rate': _scalar_rate(totals.withholding, totals.income),
+    }
+
+def form_totals(data, name: str) -> Optional[FormTotals]:
+    # The amounts calculation_rows would give data under form name, summed; None when it has none
+    incomes = []
+    withholdings = []
+    value = data['Income'].get(name)
+    if isinstance(value, dict) and 'Income' in value:
+        incomes.extend(value['Income'].values())
+        withholdings.extend(value.get('Withholdings', {}).values())
+    elif name in return_income_fields and value is not None:
+        incomes.append(value)
+    if name == wage_and_income_summary and data['Transcript Type'] == wage_and_income_summary:
+        incomes.append(data['Income'].get(summary_income_field, '0'))
+        withholdings.append(data['Income'].get(summary_withholding_field, '0'))
+    if not incomes and not withholdings:
+        return None
+    income = sum(map(amount_cents, incomes)) / 100
+    return FormTotals(income, sum(map(amount_cents, withholdings)) / 100, income if name in se_income_forms else 0.0)
+
+def scalar_calculation(name: str, calculate: Callable[[FormTotals], Dict[str, float]]) -> Callable[[Dict[str, object]], Dict[str, object]]:
+    # calculate(result) for one parsed result, as {"calculation": {column: value}}, giving the
+    # values of its calculate_batch row. A result without the form gets an empty dict.
+    def calculate_result(data):
+        totals = form_totals(data, name)
+        return {"calculation": calculate(totals) if totals is not None else {}}
+    return calculate_result
+
+# Hooks a form can name as its "calculation" in utils/data/forms.json
+calculation_hooks = {
+    "w2": CalculationHook(calculate_w2_batch, calculate_w2),
+    "1099": CalculationHook(calculate_1099_batch, calculate_1099),
+}
+
+def build_calculation_map() -> Dict[str, Calculation]:
+    hooks = {name: calculation_hooks[spec.calculation] for name, spec in form_registry.forms.items() if spec.calculation}
+    # Whole-transcript calculations, keyed by transcript type rather than form
+    hooks[wage_and_income_summary] = CalculationHook(calculate_wage_and_income_summary_batch, calculate_wage_and_income_summary)
+    return {name: Calculation(hook.calculate_batch, scalar_calculation(name, hook.calculate_totals)) for name, hook in hooks.items()}
+
+calculation_map = build_calculation_map()
+
+def calculate_based_on_form(form_type, data):
+    calculation = calculation_map.get(form_type)
+    if calculation is not None:
+        return calculation.calculate(data)
     else:
         return {"calculation": "Unknown form type"}
+
+def calculate_based_on_forms(results) -> Dict[str, 'pd.DataFrame']:
+    # Every calculation over a whole batch: form (or transcript type) -> its calculate_batch
+    # frame, one row per document that has the form, indexed by the document's position in results
+    rows = calculation_rows(results)
+    return {
+        form: calculation_map[form].calculate_batch(form_rows)
+        for form, form_rows in rows.groupby('Form', sort=False)
+        if form in calculation_map
+    }
@@ -1,72 +1,338 @@
+import bisect
 import re
-import pandas as pd
-from typing import Dict, List, Union
+from typing import Dict, Iterable, List
 from utils.tax_utils import create_tax_projection
+from utils.account_events import collection_status, get_accruals, is_account_result
 from utils.common import get_last_four_ssn, extract_float
+from utils.metrics import timed
 
-def create_client_summary(results):
-    summary_data = {}
-    for result in results:
-        year = result['Tax Period']
-        if year.isdigit() and len(year) == 4:
-            tax_year = year
-        else:
-            year_match = re.search(r'\d{4}', year)
-            tax_year = year_match.group() if year_match else 'Unknown'
-        
-        ssn = result['SSN']
-        last_four_ssn = get_last_four_ssn(ssn)
-        key = (last_four_ssn, tax_year)
-        
-        if key not in summary_data:
-            summary_data[key] = {
-                'SSN Last Four': last_four_ssn,
-                'Tax Year': tax_year,
-                'Return Filed': 'No',
-                'Filing Status': 'Unknown',
-                'Current Balance': 0,
-                'Balance Plus Accruals': 0,
-                'CSED Date': 'Unknown',
-                'Legal Action': 'Unknown',
-                'Projected Amount Owed': 0,
-                'Income Types': 'Unknown',
-            }
+# pandas is loaded by the frame builders on first use; get_summary_key and the other per-result
+# helpers are used by the store and CLI without it
+summary_keys = ['SSN Last Four', 'Tax Year']
+summary_columns = [
+    'SSN Last Four', 'Tax Year', 'Return Filed', 'Filing Status', 'Current Balance', 'Balance Plus Accruals',
+    'CSED Date', 'Legal Action', 'Projected Amount Owed', 'Income Types',
+    'Adjusted Gross Income', 'Taxable Income', 'Tax Per Return',
+]
+# Kept numeric in the summary frame; turned into dollar strings only when rendered
+currency_columns = ['Current Balance', 'Balance Plus Accruals', 'Projected Amount Owed', 'Adjusted Gross Income', 'Taxable Income', 'Tax Per Return']
+# Values filled in from the latest Account Transcript / Record of Account for a client-year
+account_columns = ['Return Filed', 'Filing Status', 'Current Balance', 'Balance Plus Accruals', 'Adjusted Gross Income', 'Taxable Income', 'Tax Per Return', 'CSED Date', 'Legal Action']
+summary_defaults = {
+    'Return Filed': 'No',
+    'Filing Status': 'Unknown',
+    'Current Balance': 0.0,
+    'Balance Plus Accruals': 0.0,
+    'CSED Date': 'Unknown',
+    'Legal Action': 'Unknown',
+    'Projected Amount Owed': 0.0,
+    'Income Types': 'Unknown',
+}
+year_pattern = re.compile(r'\d{4}')
+
+def get_tax_year(tax_period: str) -> str:
+    if tax_period.isdigit() and len(tax_period) == 4:
+        return tax_period
+    year_match = year_pattern.search(tax_period)
+    return year_match.group() if year_match else 'Unknown'
+
+def get_balances(details: List[Dict[str, str]]):
+    # (Current Balance, Balance Plus Accruals) from the first matching detail of each, in one scan;
+    # Balance Plus Accruals is None when the transcript doesn't print it
+    current_balance = None
+    balance_plus_accruals = None
+    for detail in details:
+        if current_balance is None and 'Current Balance' in detail:
+            current_balance = extract_float(detail['Current Balance'])
+        if balance_plus_accruals is None and '(this is not a payoff amount)' in detail:
+            balance_plus_accruals = extract_float(detail['(this is not a payoff amount)'])
+        if current_balance is not None and balance_plus_accruals is not None:
+            break
+    return current_balance or 0.0, balance_plus_accruals
+
+def get_summary_key(result):
+    return get_last_four_ssn(result['SSN']), get_tax_year(result['Tax Period'])
+
+def get_account_values(result, status=None) -> List:
+    # account_columns values for an Account Transcript / Record of Account, in column order.
+    # status is the result's (CSED Date, Legal Action) when already computed for a whole batch.
+    if status is None:
+        (csed_date,), (legal_action,) = collection_status([result])
+        status = (csed_date, legal_action)
+    income = result['Income']
+    current_balance, balance_plus_accruals = get_balances(result['Details'])
+    if balance_plus_accruals is None:
+        # Not printed: the account balance plus the accrued interest and penalty
+        balance = income.get('ACCOUNT BALANCE')
+        balance_plus_accruals = round((extract_float(balance) if balance is not None else current_balance) + get_accruals(result), 2)
+    return [
+        'Yes' if result['Return Filed'] else 'No',
+        income.get('FILING STATUS', 'Unknown'),
+        current_balance,
+        balance_plus_accruals,
+        extract_float(income.get('ADJUSTED GROSS INCOME', '0')),
+        extract_float(income.get('TAXABLE INCOME', '0')),
+        extract_float(income.get('TAX PER RETURN', '0')),
+        *status,
+    ]
+
+def get_projected_amount(result):
+    # Projected Amount Owed only applies to unfiled years; None otherwise
+    if result['Return Filed']:
+        return None
+    return create_tax_projection(result, 1, 'Unknown', 'Unknown')['Projected Amount Owed']
+
+@timed('create_client_summary', lambda summary, results: {'items': len(summary)})
+def create_client_summary(results) -> 'pd.DataFrame':
+    # One row per (SSN last four, tax year), in order of first appearance. Account fields come from
+    # the last Account Transcript / Record of Account for the year and the projection from the last
+    # unfiled transcript. Results are read into columns in a single pass and merged with groupby;
+    # CSED and legal actions come from one collection_status run over the whole batch.
+    results = list(results)
+    statuses = zip(*collection_status(results))
+    columns = {name: [] for name in summary_keys + account_columns + ['Is Account', 'Projected Amount Owed']}
+    for result, result_status in zip(results, statuses):
+        ssn_last_four, tax_year = get_summary_key(result)
+        columns['SSN Last Four'].append(ssn_last_four)
+        columns['Tax Year'].append(tax_year)
         
-        if result['Transcript Type'] in ["Account Transcript", "Record of Account"]:
-            summary_data[key]['Return Filed'] = 'Yes' if result['Return Filed'] else 'No'
-            summary_data[key]['Filing Status'] = result['Income'].get('FILING STATUS', 'Unknown')
-            
-            # Assign Current Balance
-            current_balance = 0.0
-            for detail in result['Details']:
-                if 'Current Balance' in detail:
-                    current_balance = extract_float(detail['Current Balance'])
-                    break
-            summary_data[key]['Current Balance'] = current_balance
-
-            # Assign Balance Plus Accruals separately
-            balance_plus_accruals = 0.0
-            for detail in result['Details']:
-                if '(this is not a payoff amount)' in detail:
-                    balance_plus_accruals = extract_float(detail['(this is not a payoff amount)'])
-                    break
-            summary_data[key]['Balance Plus Accruals'] = balance_plus_accruals
-            
-            summary_data[key]['Adjusted Gross Income'] = extract_float(result['Income'].get('ADJUSTED GROSS INCOME', '0'))
-            summary_data[key]['Taxable Income'] = extract_float(result['Income'].get('TAXABLE INCOME', '0'))
-            summary_data[key]['Tax Per Return'] = extract_float(result['Income'].get('TAX PER RETURN', '0'))
+        is_account = is_account_result(result)
+        columns['Is Account'].append(is_account)
+        if is_account:
+            for name, value in zip(account_columns, get_account_values(result, result_status)):
+                columns[name].append(value)
+        else:
+            for name in account_columns:
+                columns[name].append(float('nan') if name in currency_columns else None)
         
-        # Update Projected Amount Owed only for unfiled returns
-        if result['Return Filed'] == 'No':  # Only apply to unfiled years
-            projection = create_tax_projection(result, 1, 'Unknown', 'Unknown')
-            summary_data[key]['Projected Amount Owed'] = projection['Projected Amount Owed']
-    
-    df = pd.DataFrame(summary_data.values())
-    df['Current Balance'] = df['Current Balance'].apply(lambda x: f'${x:.2f}')
-    df['Balance Plus Accruals'] = df['Balance Plus Accruals'].apply(lambda x: f'${x:.2f}')
-    df['Adjusted Gross Income'] = df['Adjusted Gross Income'].apply(lambda x: f'${x:.2f}')
-    df['Taxable Income'] = df['Taxable Income'].apply(lambda x: f'${x:.2f}')
-    df['Tax Per Return'] = df['Tax Per Return'].apply(lambda x: f'${x:.2f}')
-    df['Projected Amount Owed'] = df['Projected Amount Owed'].apply(lambda x: f'${x:.2f}')
+        projected = get_projected_amount(result)
+        columns['Projected Amount Owed'].append(float('nan') if projected is None else projected)
     
-    return df
+    import pandas as pd
+    frame = pd.DataFrame(columns)
+    summary = frame[summary_keys].drop_duplicates().reset_index(drop=True)
+    account = frame.loc[frame['Is Account'], summary_keys + account_columns].groupby(summary_keys, sort=False).last()
+    projected = frame.loc[frame['Projected Amount Owed'].notna(), summary_keys + ['Projected Amount Owed']].groupby(summary_keys, sort=False).last()
+    summary = summary.join(account, on=summary_keys).join(projected, on=summary_keys)
+    for name, default in summary_defaults.items():
+        summary[name] = summary[name].where(summary[name].notna(), default) if name in summary else default
+    for name in currency_columns:
+        summary[name] = summary[name].astype(float)
+    return summary[summary_columns]
+
+def summarize_client_totals(summary: 'pd.DataFrame') -> 'pd.DataFrame':
+    # Per-client totals: balance plus accruals over all years, tax per return over filed years
+    # and projected amount owed over unfiled years
+    filed = summary['Return Filed'] == 'Yes'
+    import pandas as pd
+    totals = pd.DataFrame({
+        'Balance Plus Accruals': summary['Balance Plus Accruals'],
+        'Tax Per Return': summary['Tax Per Return'].where(filed, 0.0),
+        'Projected Amount Owed': summary['Projected Amount Owed'].where(~filed, 0.0),
+    })
+    return totals.groupby(summary['SSN Last Four'], sort=False).sum()
+
+def build_client_index(results) -> Dict[str, List[int]]:
+    # SSN last four -> positions of that client's results (and uploaded files) in the batch
+    client_index = {}
+    for position, result in enumerate(results):
+        client_index.setdefault(get_last_four_ssn(result['SSN']), []).append(position)
+    return client_index
+
+def index_clients(results) -> Dict[str, object]:
+    # Everything the document views need to switch clients without rescanning the batch. Build it
+    # once per parsed batch and keep it in session state; a client lookup is then O(its documents).
+    results = list(results)
+    client_summary = create_client_summary(results)
+    return {
+        'client_summary': client_summary,
+        'client_summaries': {ssn: frame for ssn, frame in client_summary.groupby('SSN Last Four', sort=False)},
+        'client_totals': summarize_client_totals(client_summary),
+        'client_index': build_client_index(results),
+    }
+
+def _group_sum(values) -> float:
+    # Kahan-compensated sum, step for step the one pandas' groupby().sum() does, so running totals
+    # match summarize_client_totals to the last bit
+    total = compensation = 0.0
+    for value in values:
+        if value != value:
+            continue
+        adjusted = value - compensation
+        updated = total + adjusted
+        compensation = updated - total - adjusted
+        if compensation != compensation:
+            compensation = 0.0
+        total = updated
+    return total
+
+class IncrementalClientSummary:
+    # create_client_summary kept up to date one result at a time. Each (SSN last four, tax year)
+    # keeps its contributing results in batch order, so add/remove only re-merge that one row
+    # (latest account transcript wins, latest unfiled projection wins) and re-total its client.
+    # frame() and totals() give exactly what create_client_summary and summarize_client_totals
+    # would for the results currently added, taken in batch order: the order set with set_order
+    # (by item id), then arrival order for items it doesn't list. Results can therefore be added
+    # in the order they finish parsing.
+
+    def __init__(self, results=()):
+        self._seq = 0
+        # item id -> position in the batch, from set_order
+        self._positions = {}
+        # summary key -> [(order, item id, result, account values or None, projected amount or None), ...],
+        # sorted by order; order is (batch position, arrival)
+        self._entries = {}
+        # item id -> summary key
+        self._items = {}
+        self._rows = {}
+        # SSN last four -> {summary key: None}, and that client's running totals
+        self._client_keys = {}
+        self._totals = {}
+        for result in results:
+            self.add(result)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _order(self, item_id, seq):
+        return (self._positions.get(item_id, len(self._positions)), seq)
+
+    def add(self, result, item_id=None):
+        # item_id names the result for set_order and discard; adding an id again replaces its result
+        if item_id is None:
+            item_id = ('arrival', self._seq)
+        elif item_id in self._items:
+            self.discard(item_id)
+        key = get_summary_key(result)
+        account = get_account_values(result) if is_account_result(result) else None
+        entry = (self._order(item_id, self._seq), item_id, result, account, get_projected_amount(result))
+        self._seq += 1
+        entries = self._entries.setdefault(key, [])
+        entries.insert(bisect.bisect([other[0] for other in entries], entry[0]), entry)
+        self._items[item_id] = key
+        self._client_keys.setdefault(key[0], {})[key] = None
+        self._merge_row(key)
+
+    def discard(self, item_id) -> bool:
+        # Drops the result added under item_id; False if there is none
+        key = self._items.get(item_id)
+        if key is None:
+            return False
+        entries = self._entries[key]
+        self._drop(key, next(i for i, entry in enumerate(entries) if entry[1] == item_id))
+        return True
+
+    def remove(self, result) -> bool:
+        # Drops the latest contribution of result (matched by identity, then equality); False if
+        # it was never added
+        key = get_summary_key(result)
+        entries = self._entries.get(key, [])
+        position = next((i for i in range(len(entries) - 1, -1, -1) if entries[i][2] is result), None)
+        if position is None:
+            position = next((i for i in range(len(entries) - 1, -1, -1) if entries[i][2] == result), None)
+        if position is None:
+            return False
+        self._drop(key, position)
+        return True
+
+    def set_order(self, item_ids: Iterable):
+        # Batch order of the items, e.g. the uploads' items in upload order. Items keep their place
+        # when the order only drops or appends ids; otherwise every row is re-merged in the new order.
+        old = sorted((entry[0], entry[1]) for entries in self._entries.values() for entry in entries)
+        self._positions = {item_id: position for position, item_id in enumerate(item_ids)}
+        new = [self._order(item_id, seq) for (_, seq), item_id in old]
+        kept = all(earlier < later for earlier, later in zip(new, new[1:]))
+        for key, entries in self._entries.items():
+            entries[:] = sorted((self._order(entry[1], entry[0][1]),) + entry[1:] for entry in entries)
+        if not kept:
+            for key in self._entries:
+                self._merge_row(key, total=False)
+            for ssn_last_four in self._client_keys:
+                self._total_client(ssn_last_four)
+
+    def _drop(self, key, position):
+        del self._items[self._entries[key].pop(position)[1]]
+        if self._entries[key]:
+            self._merge_row(key)
+            return
+        del self._entries[key]
+        del self._rows[key]
+        client_keys = self._client_keys[key[0]]
+        del client_keys[key]
+        if client_keys:
+            self._total_client(key[0])
+        else:
+            del self._client_keys[key[0]]
+            del self._totals[key[0]]
+
+    def _merge_row(self, key, total=True):
+        account = None
+        projected = None
+        for _, _, _, entry_account, entry_projected in reversed(self._entries[key]):
+            if account is None:
+                account = entry_account
+            if projected is None:
+                projected = entry_projected
+            if account is not None and projected is not None:
+                break
+        row = dict(summary_defaults)
+        row['SSN Last Four'], row['Tax Year'] = key
+        row['Adjusted Gross Income'] = row['Taxable Income'] = row['Tax Per Return'] = float('nan')
+        if account is not None:
+            for name, value in zip(account_columns, account):
+                if value is not None:
+                    row[name] = value
+        if projected is not None:
+            row['Projected Amount Owed'] = projected
+        self._rows[key] = row
+        if total:
+            self._total_client(key[0])
+
+    def _ordered_keys(self, keys):
+        # Rows appear in order of their earliest remaining contribution, as a rebuild would list them
+        return sorted(keys, key=lambda key: self._entries[key][0][0])
+
+    def _total_client(self, ssn_last_four):
+        rows = [self._rows[key] for key in self._ordered_keys(self._client_keys[ssn_last_four])]
+        filed = [row['Return Filed'] == 'Yes' for row in rows]
+        self._totals[ssn_last_four] = (
+            _group_sum(row['Balance Plus Accruals'] for row in rows),
+            _group_sum(row['Tax Per Return'] if is_filed else 0.0 for row, is_filed in zip(rows, filed)),
+            _group_sum(0.0 if is_filed else row['Projected Amount Owed'] for row, is_filed in zip(rows, filed)),
+        )
+
+    def _frame(self, keys) -> 'pd.DataFrame':
+        import pandas as pd
+        frame = pd.DataFrame([self._rows[key] for key in keys], columns=summary_columns)
+        for name in currency_columns:
+            frame[name] = frame[name].astype(float)
+        return frame
+
+    def frame(self) -> 'pd.DataFrame':
+        return self._frame(self._ordered_keys(self._rows))
+
+    def client_frame(self, ssn_last_four: str) -> 'pd.DataFrame':
+        return self._frame(self._ordered_keys(self._client_keys.get(ssn_last_four, ())))
+
+    def clients(self) -> List[str]:
+        # In order of each client's first row
+        return sorted(self._client_keys, key=lambda ssn: min(self._entries[key][0][0] for key in self._client_keys[ssn]))
+
+    def totals(self) -> 'pd.DataFrame':
+        clients = self.clients()
+        import pandas as pd
+        return pd.DataFrame(
+            [self._totals[ssn] for ssn in clients],
+            index=pd.Index(clients, name='SSN Last Four'),
+            columns=['Balance Plus Accruals', 'Tax Per Return', 'Projected Amount Owed'],
+            dtype=float,
+        )
+
+    def views(self) -> Dict[str, object]:
+        # The same summary views index_clients builds, taken from the current state
+        client_summary = self.frame()
+        return {
+            'client_summary': client_summary,
+            'client_summaries': {ssn: frame for ssn, frame in client_summary.groupby('SSN Last Four', sort=False)},
+            'client_totals': self.totals(),
+        }
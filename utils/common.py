@@ -1,9 +1,162 @@
 # utils/common.py
+import re
+from decimal import ROUND_HALF_EVEN, Decimal
+from typing import Optional, Sequence, Tuple
+
+# An amount as transcripts and reports print it. Besides '$1,234.56' and '-$1,234.56' this takes
+# '$-1,234.56', '(1,234.56)' and '1,234.56-', all negative. Groups: opening parenthesis, minus
+# before and after the dollar sign, the number, trailing minus, closing parenthesis.
+amount_pattern = re.compile(r'\s*(\()?\s*(-)?\s*\$?\s*(-)?\s*(\d[\d,]*(?:\.\d*)?|\.\d+)\s*(-)?\s*(\))?\s*')
+# Amounts with at most this many digits and two decimals convert exactly through a float; longer
+# ones could lose cents there (or overflow int64 in bulk) and go through Decimal
+max_bulk_digits = 15
+# Below this many values the per-position passes cost more than converting one value at a time
+bulk_threshold = 64
+
+def _amount_parts(value: str) -> Optional[Tuple[bool, str]]:
+    # (negative, the number without commas) when value is an amount, else None. The common shape
+    # ('1,234.56', '-$1,234.56') is checked with string methods; the rest goes through amount_pattern.
+    if isinstance(value, str):
+        negative = value[:1] == '-'
+        body = value[1:] if negative else value
+        if body[:1] == '$':
+            body = body[1:]
+        whole, point, decimals = body.partition('.')
+        digits = whole.replace(',', '')
+        # isdecimal() accepts exactly what \d matches
+        if (digits.isdecimal() and whole[0] != ',' or not whole and decimals) and (not decimals or decimals.isdecimal()):
+            return negative, digits + point + decimals
+    match = amount_pattern.fullmatch(value) if isinstance(value, str) else None
+    if match is None:
+        return None
+    open_paren, minus, dollar_minus, number, trailing_minus, close_paren = match.groups()
+    if (open_paren is None) != (close_paren is None):
+        return None
+    signs = (open_paren is not None) + (minus is not None) + (dollar_minus is not None) + (trailing_minus is not None)
+    if signs > 1:
+        return None
+    return signs == 1, number.replace(',', '')
+
+def amount_to_decimal(value: str) -> Optional[Decimal]:
+    # The exact amount value prints, or None when it isn't an amount
+    parts = _amount_parts(value)
+    if parts is None:
+        return None
+    negative, number = parts
+    return -Decimal(number) if negative else Decimal(number)
 
 def extract_float(value: str) -> float:
-    try:
-        return float(value.replace(',', '').replace('$', ''))
-    except ValueError:
+    # The amount value prints as the nearest float; 0.0 when value isn't an amount
+    parts = _amount_parts(value)
+    if parts is None:
         return 0.0
+    negative, number = parts
+    return -float(number) if negative else float(number)
+
+def amount_to_cents(value: str) -> Optional[int]:
+    # '$1,234.56' -> 123456, '(1,234.56)' -> -123456; None when the value isn't an amount at all.
+    # Beyond cents the amount rounds half to even.
+    parts = _amount_parts(value)
+    if parts is None:
+        return None
+    negative, number = parts
+    whole, _, decimals = number.partition('.')
+    if len(decimals) <= 2 and len(whole) + len(decimals) <= max_bulk_digits:
+        cents = round(float(number) * 100)
+    else:
+        cents = int(Decimal(number).scaleb(2).to_integral_value(ROUND_HALF_EVEN))
+    return -cents if negative else cents
+
+def _bulk_cents(values: Sequence[str]) -> Tuple['np.ndarray', 'np.ndarray', 'np.ndarray']:
+    # (cents without the sign, negative, parsed) for values of the common amount shape, read from
+    # the bytes of every value at once: one pass per character position accumulates the digits
+    # (Horner's rule) and flags unexpected characters. Values it can't vouch for are left
+    # unparsed for the scalar functions.
+    import numpy as np
+    count = len(values)
+    try:
+        raw = np.array(values, dtype='S')
+        total_length = len(''.join(values))
+    except (UnicodeEncodeError, TypeError):
+        # Non-ASCII text or values that aren't strings: all of them go to the scalar functions
+        return np.zeros(count, dtype=np.int64), np.zeros(count, dtype=bool), np.zeros(count, dtype=bool)
+    width = raw.dtype.itemsize
+    # One contiguous row per character position; shorter values are padded with NUL
+    positions = raw.view(np.uint8).reshape(count, width).T.copy()
+    cents = np.zeros(count, dtype=np.int64)
+    # Counts stay wide enough that a long non-amount can't wrap around to look like one
+    decimals = np.zeros(count, dtype=np.int32)
+    digits = np.zeros(count, dtype=np.int32)
+    seen_point = np.zeros(count, dtype=bool)
+    padded = np.zeros(count, dtype=bool)
+    rejected = np.zeros(count, dtype=bool)
+    scale = np.empty(count, dtype=np.int64)
+    for position, character in enumerate(positions):
+        digit = character - np.uint8(48)
+        is_digit = digit < 10
+        np.multiply(is_digit, 9, out=scale)
+        scale += 1
+        cents *= scale
+        np.putmask(digit, ~is_digit, 0)
+        cents += digit
+        decimals += is_digit & seen_point
+        digits += is_digit
+        is_point = character == 46
+        is_comma = character == 44
+        is_dollar = character == 36
+        is_padding = character == 0
+        # Only digits, one '.', commas between the first digit and the point, a leading '-' and
+        # a '$' before the number, then the padding
+        other = ~is_digit & ~is_point & ~is_comma & ~is_dollar & ~is_padding
+        if position == 0:
+            other &= character != 45
+        elif position == 1:
+            other |= is_dollar & (positions[0] != 45)
+        else:
+            other |= is_dollar
+        rejected |= other | (is_point & seen_point) | (is_comma & ((digits == 0) | seen_point)) | (padded & ~is_padding)
+        seen_point |= is_point
+        padded |= is_padding
+    parsed = ~rejected & (digits > 0) & (digits <= max_bulk_digits) & (decimals <= 2)
+    # 'S' arrays drop trailing NULs, so '5\x00' would otherwise read as '5'. Checked on the total
+    # length first, since such values hardly ever turn up.
+    lengths = np.char.str_len(raw)
+    if lengths.sum() != total_length:
+        parsed &= lengths == np.fromiter(map(len, values), dtype=np.int64, count=count)
+    cents *= np.array([100, 10, 1], dtype=np.int64)[np.minimum(decimals, 2)]
+    negative = positions[0] == 45 if width else np.zeros(count, dtype=bool)
+    return cents, negative, parsed
+
+def amounts_to_cents(values: Sequence[str]) -> Tuple['np.ndarray', 'np.ndarray']:
+    # amount_to_cents over a whole column: (int64 cents, is an amount), with 0 cents where a value
+    # isn't an amount. The common shape is parsed in bulk; the rest one value at a time.
+    import numpy as np
+    if len(values) < bulk_threshold:
+        amounts = [amount_to_cents(value) for value in values]
+        valid = [amount is not None and -2 ** 63 <= amount < 2 ** 63 for amount in amounts]
+        cents = [amount if ok else 0 for amount, ok in zip(amounts, valid)]
+        return np.array(cents, dtype=np.int64), np.array(valid, dtype=bool)
+    cents, negative, parsed = _bulk_cents(values)
+    np.negative(cents, out=cents, where=negative)
+    valid = parsed.copy()
+    for position in np.flatnonzero(~parsed).tolist():
+        amount = amount_to_cents(values[position])
+        if amount is not None and -2 ** 63 <= amount < 2 ** 63:
+            cents[position] = amount
+            valid[position] = True
+    return cents, valid
+
+def amounts_to_floats(values: Sequence[str]) -> 'np.ndarray':
+    # extract_float over a whole column, as a float array
+    import numpy as np
+    if len(values) < bulk_threshold:
+        return np.fromiter(map(extract_float, values), dtype=float, count=len(values))
+    cents, negative, parsed = _bulk_cents(values)
+    amounts = cents / 100
+    # Negated after the division so '-0.00' stays -0.0, as float() reads it
+    np.negative(amounts, out=amounts, where=negative)
+    for position in np.flatnonzero(~parsed).tolist():
+        amounts[position] = extract_float(values[position])
+    return amounts
 def get_last_four_ssn(ssn: str) -> str:
-    return ssn[-4:] if len(ssn) >= 4 else "Unknown"
\ No newline at end of file
+    return ssn[-4:] if len(ssn) >= 4 else "Unknown"
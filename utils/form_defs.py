@@ -1,22 +1,12 @@
-# utils/form_definitions.py
+# utils/form_defs.py
+from utils.form_registry import form_registry
 
+# Income and withholding fields per form, in the shape extract_income_withholdings expects.
+# Forms are declared in utils/data/forms.json; add new ones there.
 form_income_withholdings = {
-    'W-2': {
-        'Income': ['Wages, Tips, and Other Compensation'],
-        'Withholdings': ['Federal Income Tax Withheld'],
-    },
-    '1099-MISC': {
-        'Income': ['Non-Employee Compensation', 'Medical Payments', 'Fishing Income', 'Rents', 'Royalties', 'Attorney Fees', 'Other Income', 'Substitute Payments for Dividends'],
-        'Withholdings': ['Tax Withheld'],
-    },
-    '1099-NEC': {
-        'Income': ['Non-Employee Compensation'],
-        'Withholdings': ['Federal Income Tax Withheld'],
-    },
-    '1099-K': {
-        'Income': ['Gross Amount of Payment Card/Third Party Transactions'],
-        'Withholdings': ['Federal Income Tax Withheld'],
-    },
-    # Add more form types following the same structure...
+    name: {
+        'Income': sorted(spec.income_fields),
+        'Withholdings': sorted(spec.withholding_fields),
+    }
+    for name, spec in form_registry.forms.items()
 }
-
@@ -1,19 +1,29 @@
 # utils/form_extraction.py
-from utils.form_definitions import form_income_withholdings
+from utils.form_defs import form_income_withholdings
+from utils.label_index import LabelIndex
+
+# form_data keys are resolved through a LabelIndex over each form's declared labels, so punctuation
+# drift and OCR misreads still land under the declared label: 'Wages, Tips, and Other Compensation'
+# -> 'Wages, Tips and Other Compensation', 'Royaltics' -> 'Royalties'. When several keys resolve
+# to one label, the first one wins.
+income_label_index = LabelIndex({form_type: fields.get('Income', []) for form_type, fields in form_income_withholdings.items()})
+withholding_label_index = LabelIndex({form_type: fields.get('Withholdings', []) for form_type, fields in form_income_withholdings.items()})
 
 def extract_income_withholdings(form_type, form_data):
-    income_withholdings = form_income_withholdings.get(form_type, {})
     extracted_data = {
         'Income': {},
         'Withholdings': {}
     }
+    if form_type not in income_label_index:
+        return extracted_data
 
-    for income_field in income_withholdings.get('Income', []):
-        if income_field in form_data:
-            extracted_data['Income'][income_field] = form_data[income_field]
-
-    for withholding_field in income_withholdings.get('Withholdings', []):
-        if withholding_field in form_data:
-            extracted_data['Withholdings'][withholding_field] = form_data[withholding_field]
+    keys = list(form_data)
+    income_labels = income_label_index.resolve_many(form_type, keys)
+    withholding_labels = withholding_label_index.resolve_many(form_type, keys)
+    for key, income_field, withholding_field in zip(keys, income_labels, withholding_labels):
+        if income_field is not None:
+            extracted_data['Income'].setdefault(income_field, form_data[key])
+        elif withholding_field is not None:
+            extracted_data['Withholdings'].setdefault(withholding_field, form_data[key])
 
     return extracted_data
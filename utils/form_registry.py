@@ -0,0 +1,111 @@
+# utils/form_registry.py
+# The one place forms are declared (utils/data/forms.json): each form's income and withholding
+# fields, whether its income is subject to self-employment tax, and its calculation hook. The
+# parser, form_defs, the projections and the calculations all read it, so adding a form is a
+# data change. It is compiled once at import into a character trie over the form names (for
+# "Form ..." lines) and a per-form label -> (section, field) table, so classifying a line is
+# one dict lookup.
+import json
+import os
+from typing import Dict, FrozenSet, NamedTuple, Optional, Tuple
+
+data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+form_registry_path = os.path.join(data_dir, 'forms.json')
+income_section = 'Income'
+withholding_section = 'Withholdings'
+# Characters that continue a form name, so 'W-2' doesn't match the start of 'W-2G' or 'W-2C'
+name_characters = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-')
+
+class FormSpec(NamedTuple):
+    name: str
+    income_fields: FrozenSet[str]
+    withholding_fields: FrozenSet[str]
+    self_employment: bool
+    # Name of the calculation hook in utils.calculations, if any
+    calculation: Optional[str]
+    # Label as printed (canonical labels and their aliases) -> (section, canonical label)
+    fields: Dict[str, Tuple[str, str]]
+
+def build_form_spec(name: str, data: Dict[str, object]) -> FormSpec:
+    fields = {}
+    for section, key in ((income_section, 'income'), (withholding_section, 'withholding')):
+        for label in data.get(key, ()):
+            fields.setdefault(label, (section, label))
+    for alias, label in data.get('aliases', {}).items():
+        fields.setdefault(alias, fields[label])
+    return FormSpec(
+        name,
+        frozenset(data.get('income', ())),
+        frozenset(data.get('withholding', ())),
+        bool(data.get('self_employment', False)),
+        data.get('calculation'),
+        fields,
+    )
+
+def build_form_trie(names: Dict[str, str]) -> Dict:
+    # Nested {character: node} dicts; a node's None entry holds the form a name ending there means
+    trie = {}
+    for name, form in names.items():
+        node = trie
+        for character in name:
+            node = node.setdefault(character, {})
+        node[None] = form
+    return trie
+
+def match_form_name(trie: Dict, text: str, start: int = 0) -> Optional[str]:
+    # Longest registered name at text[start:] that isn't followed by more of a form name
+    node = trie
+    match = None
+    position = start
+    while True:
+        form = node.get(None)
+        if form is not None and (position == len(text) or text[position] not in name_characters):
+            match = form
+        if position == len(text):
+            return match
+        node = node.get(text[position])
+        if node is None:
+            return match
+        position += 1
+
+class FormRegistry:
+    def __init__(self, path: str = form_registry_path):
+        with open(path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        self.version = data['version']
+        self.forms: Dict[str, FormSpec] = {name: build_form_spec(name, spec) for name, spec in data['forms'].items()}
+        names = {name: name for name in self.forms}
+        for name, spec in data['forms'].items():
+            names.update({alias: name for alias in spec.get('names', ())})
+        self.names = names
+        self.trie = build_form_trie(names)
+        # First words of the names that go on past a space ('K-1' of 'K-1 1065')
+        self.continued_words = frozenset(name.split(' ', 1)[0] for name in names if ' ' in name)
+        self.income_fields = {name: spec.income_fields for name, spec in self.forms.items() if spec.income_fields}
+        self.withholding_fields = {name: spec.withholding_fields for name, spec in self.forms.items() if spec.withholding_fields}
+        self.self_employment_forms = frozenset(name for name, spec in self.forms.items() if spec.self_employment)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.forms
+
+    def get(self, name: str) -> Optional[FormSpec]:
+        return self.forms.get(name)
+
+    def match_form(self, text: str, start: int = 0) -> Optional[str]:
+        # The registered form named at text[start:] ('K-1 1065 Partner's Share...' -> 'K-1 1065')
+        return match_form_name(self.trie, text, start)
+
+    def form_for_word(self, word: str, text: str, start: int) -> str:
+        # The form a "Form <word>..." line names, with word found at text[start:]. Most names are
+        # one word and settle with a dict lookup; only words that begin a longer name walk the trie.
+        # Unregistered forms keep the word itself.
+        if word in self.continued_words:
+            return match_form_name(self.trie, text, start) or word
+        return self.names.get(word, word)
+
+    def classify(self, form: str, label: str) -> Optional[Tuple[str, str]]:
+        # (section, canonical label) for a line label under form, or None
+        spec = self.forms.get(form)
+        return spec.fields.get(label) if spec is not None else None
+
+form_registry = FormRegistry()
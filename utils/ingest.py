@@ -0,0 +1,167 @@
+# utils/ingest.py
+import atexit
+import itertools
+import os
+import threading
+from concurrent.futures import Executor, Future, as_completed
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from utils.transcript_model import to_transcripts
+from utils.transcript_parser import error_result
+from utils.transcript_sources import is_pdf, parse_transcript_bytes, transcript_segment_bounds
+
+class IngestJob:
+    # Background parsing for a set of uploads. Each file is submitted to the executor as soon as
+    # it is added, and as_completed() hands results back in the order they finish, so a page can
+    # show the quick documents while the slow ones are still being extracted. With a ParseCache,
+    # files seen before finish immediately and new results are cached as they arrive.
+    # A text upload holding several transcripts (a vendor dump) is split into one item per
+    # transcript, '<upload id>#1', '#2', ..., each parsed on its own; other uploads are one item
+    # under their own id. A job lives in session state across reruns; adding the same upload id
+    # again is a no-op.
+
+    def __init__(self, executor: Optional[Executor] = None, cache=None):
+        self.executor = executor
+        self.cache = cache
+        self.results: Dict[str, Dict[str, Union[str, List[Dict[str, str]]]]] = {}
+        self._pending: Dict[Future, Tuple[str, Optional[str]]] = {}
+        self._unreported: List[str] = []
+        # upload id -> (start, end) byte offsets of its transcripts, for uploads added by add_uploads
+        self._segments: Dict[str, List[Tuple[int, int]]] = {}
+
+    def __contains__(self, upload_id: str) -> bool:
+        return upload_id in self.results or any(upload_id == pending_id for pending_id, _ in self._pending.values())
+
+    @property
+    def total(self) -> int:
+        return len(self.results) + len(self._pending)
+
+    @property
+    def finished(self) -> int:
+        return len(self.results)
+
+    @property
+    def done(self) -> bool:
+        return not self._pending
+
+    def add(self, upload_id: str, name: str, data: bytes):
+        if upload_id in self:
+            return
+        key = None
+        if self.cache is not None:
+            key = self.cache.key_for(name, data)
+            result = self.cache.get(key)
+            if result is not None:
+                self.cache.hits += 1
+                self._finish(upload_id, result)
+                return
+            self.cache.misses += 1
+        executor = self.executor or default_ingest_executor()
+        future = executor.submit(parse_transcript_bytes, name, data, 1)
+        self._pending[future] = (upload_id, key)
+
+    def add_uploads(self, uploads: Iterable[Tuple[str, object]]):
+        # (upload id, uploaded file) pairs; only the name and bytes of each item are sent to the executor
+        for upload_id, uploaded_file in uploads:
+            if upload_id in self._segments or upload_id in self:
+                continue
+            name = getattr(uploaded_file, 'name', '')
+            data = uploaded_file.getvalue()
+            segments = [(0, len(data))] if is_pdf(name, data) else list(transcript_segment_bounds(data))
+            self._segments[upload_id] = segments
+            for item_id, start, end in self.items(upload_id):
+                # A dump's items are named '<name>#1', '<name>#2', ... like the batch runner's
+                self.add(item_id, name + item_id[len(upload_id):], data[start:end])
+
+    def items(self, upload_id: str) -> List[Tuple[str, int, Optional[int]]]:
+        # (item id, start, end) byte offsets for each transcript of an upload, in file order; an
+        # upload parsed whole is (upload id, 0, None)
+        segments = self._segments.get(upload_id, ())
+        if len(segments) < 2:
+            return [(upload_id, 0, None)]
+        return [(f"{upload_id}#{index}", start, end) for index, (start, end) in enumerate(segments, 1)]
+
+    def discard(self, keep: Iterable[str]) -> List[Tuple[str, Dict]]:
+        # Forget uploads not in keep: pending items are cancelled, finished ones are returned (by
+        # item id) so the caller can take them back out of anything built from them
+        keep = set(keep)
+        self._segments = {upload_id: segments for upload_id, segments in self._segments.items() if upload_id in keep}
+        keep = {item_id for upload_id in keep for item_id, _, _ in self.items(upload_id)}
+        for future, (upload_id, _) in list(self._pending.items()):
+            if upload_id not in keep:
+                future.cancel()
+                del self._pending[future]
+        self._unreported = [upload_id for upload_id in self._unreported if upload_id in keep]
+        removed = [(upload_id, result) for upload_id, result in self.results.items() if upload_id not in keep]
+        for upload_id, _ in removed:
+            del self.results[upload_id]
+        return removed
+
+    def as_completed(self, timeout: Optional[float] = None) -> Iterator[Tuple[str, Dict]]:
+        # (upload id, result) for every upload not yet reported: cache hits first, then the rest as
+        # they finish. Failures come back as error results.
+        while self._unreported:
+            upload_id = self._unreported.pop(0)
+            yield upload_id, self.results[upload_id]
+        for future in as_completed(list(self._pending), timeout=timeout):
+            upload_id, key = self._pending.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                result = error_result(e)
+            else:
+                # Failures may be environmental (e.g. a missing PDF engine), so they are never cached
+                if self.cache is not None and "Error" not in result:
+                    self.cache.put(key, result)
+            self.results[upload_id] = result
+            yield upload_id, result
+
+    def _finish(self, upload_id: str, result):
+        self.results[upload_id] = result
+        self._unreported.append(upload_id)
+
+def discard_uploads(job: IngestJob, parsed: Dict[str, object], summary, keep: Iterable[str]):
+    # Take uploads not in keep out of the job, parsed (item id -> Transcript) and the summary
+    for upload_id, _ in job.discard(keep):
+        if parsed.pop(upload_id, None) is not None:
+            summary.discard(upload_id)
+
+def collect_results(job: IngestJob, parsed: Dict[str, object], summary) -> Iterator[str]:
+    # Add each finished upload of job to parsed and the summary, waiting for the pending ones, and
+    # yield its id once added. Uploads already in parsed are skipped: a cache hit is both in
+    # job.results and reported by as_completed, and a rerun may have added part of a batch.
+    for upload_id, result in itertools.chain(list(job.results.items()), job.as_completed()):
+        if upload_id in parsed:
+            continue
+        parsed[upload_id] = to_transcripts([result])[0]
+        summary.add(parsed[upload_id], upload_id)
+        yield upload_id
+
+_default_executor = None
+_default_executor_lock = threading.Lock()
+
+def create_ingest_executor() -> Executor:
+    # Processes when there are cores to spread across; on a single core a couple of threads still
+    # let the page render between results. The caller owns it and shuts it down.
+    workers = os.cpu_count() or 1
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        return ProcessPoolExecutor(max_workers=workers)
+    from concurrent.futures import ThreadPoolExecutor
+    return ThreadPoolExecutor(max_workers=2)
+
+def default_ingest_executor() -> Executor:
+    # For jobs created without an executor: one per process, shut down when the interpreter exits
+    global _default_executor
+    with _default_executor_lock:
+        if _default_executor is None:
+            _default_executor = create_ingest_executor()
+            atexit.register(shutdown_ingest_executor)
+        return _default_executor
+
+def shutdown_ingest_executor():
+    # Cancels what hasn't started; the next default_ingest_executor() call starts a new one
+    global _default_executor
+    with _default_executor_lock:
+        executor, _default_executor = _default_executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,116 @@
+# utils/label_index.py
+# Resolves field labels as printed on a transcript (punctuation drift, OCR noise) to the canonical
+# labels the parser and form definitions use. Canonical labels are normalized once per group
+# (form); a lookup tries the exact label, then its normalized form, then a fuzzy match above
+# the cutoff. Every answer, including "no match", is memoized, so a repeated label costs one
+# dict lookup. Fuzzy matching uses RapidFuzz when installed and difflib otherwise.
+import re
+from typing import Dict, Hashable, Iterable, List, Mapping, Optional, Tuple
+
+# Similarity (0-100) a label must reach to count as a fuzzy match: one misread letter in a short
+# label ('Royaltics') still scores about 89, while 'State Income Tax Withheld' stays well below
+# 'Federal Income Tax Withheld'.
+default_cutoff = 85
+# Memoized lookups kept per index before the memo is cleared
+max_memo_size = 65536
+non_alphanumeric_pattern = re.compile(r'[^0-9a-z]+')
+
+def normalize_label(label: str) -> str:
+    # 'Wages, Tips, and Other Compensation' and 'WAGES TIPS AND OTHER COMPENSATION' -> 'wages tips and other compensation'
+    return non_alphanumeric_pattern.sub(' ', label.lower().replace('&', ' and ')).strip()
+
+def _rapidfuzz():
+    try:
+        from rapidfuzz import fuzz, process
+    except ImportError:
+        return None
+    return fuzz, process
+
+class LabelIndex:
+    def __init__(self, labels: Mapping[Hashable, Iterable[str]], cutoff: int = default_cutoff):
+        self.cutoff = cutoff
+        # group -> {label: label} for the exact path, {normalized: label}, and the normalized choices
+        self._exact: Dict[Hashable, Dict[str, str]] = {}
+        self._normalized: Dict[Hashable, Dict[str, str]] = {}
+        self._choices: Dict[Hashable, List[str]] = {}
+        for group, group_labels in labels.items():
+            group_labels = list(group_labels)
+            self._exact[group] = {label: label for label in group_labels}
+            normalized = {}
+            for label in group_labels:
+                normalized.setdefault(normalize_label(label), label)
+            self._normalized[group] = normalized
+            self._choices[group] = list(normalized)
+        self._memo: Dict[Tuple[Hashable, str], Optional[str]] = {}
+
+    def __contains__(self, group: Hashable) -> bool:
+        return group in self._exact
+
+    def resolve(self, group: Hashable, label: str) -> Optional[str]:
+        # The canonical label of group that label stands for, or None
+        key = (group, label)
+        try:
+            return self._memo[key]
+        except KeyError:
+            pass
+        exact = self._exact.get(group)
+        if not exact:
+            return None
+        resolved = exact.get(label)
+        if resolved is None:
+            normalized = normalize_label(label)
+            resolved = self._normalized[group].get(normalized)
+            if resolved is None and normalized:
+                resolved = self._fuzzy(group, [normalized])[0]
+        self._remember(key, resolved)
+        return resolved
+
+    def resolve_many(self, group: Hashable, labels: Iterable[str]) -> List[Optional[str]]:
+        # resolve() for many labels at once; the labels that need fuzzy matching are scored
+        # against the group's choices in one batch
+        labels = list(labels)
+        if group not in self._exact:
+            return [None] * len(labels)
+        resolved = [self._memo.get((group, label), False) for label in labels]
+        pending = {}
+        for position, label in enumerate(labels):
+            if resolved[position] is not False:
+                continue
+            match = self._exact[group].get(label)
+            normalized = normalize_label(label)
+            if match is None:
+                match = self._normalized[group].get(normalized)
+            if match is None and normalized:
+                pending.setdefault(normalized, []).append(position)
+                continue
+            resolved[position] = match
+            self._remember((group, label), match)
+        if pending:
+            for normalized, match in zip(pending, self._fuzzy(group, list(pending))):
+                for position in pending[normalized]:
+                    resolved[position] = match
+                    self._remember((group, labels[position]), match)
+        return resolved
+
+    def _fuzzy(self, group: Hashable, queries: List[str]) -> List[Optional[str]]:
+        choices = self._choices[group]
+        if not choices:
+            return [None] * len(queries)
+        canonical = self._normalized[group]
+        rapidfuzz = _rapidfuzz()
+        if rapidfuzz is not None:
+            fuzz, process = rapidfuzz
+            if len(queries) == 1:
+                match = process.extractOne(queries[0], choices, scorer=fuzz.ratio, score_cutoff=self.cutoff)
+                return [canonical[match[0]] if match else None]
+            scores = process.cdist(queries, choices, scorer=fuzz.ratio, score_cutoff=self.cutoff)
+            best = scores.argmax(axis=1)
+            return [canonical[choices[column]] if scores[row, column] else None for row, column in enumerate(best)]
+        import difflib
+        matches = [difflib.get_close_matches(query, choices, n=1, cutoff=self.cutoff / 100) for query in queries]
+        return [canonical[match[0]] if match else None for match in matches]
+
+    def _remember(self, key: Tuple[Hashable, str], resolved: Optional[str]):
+        if len(self._memo) >= max_memo_size:
+            self._memo.clear()
+        self._memo[key] = resolved
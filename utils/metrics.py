@@ -0,0 +1,110 @@
+# utils/metrics.py
+# Per-stage wall time and counts for the transcript pipeline. Stages record into the collector of
+# the current context (set with collect_metrics); with no collector active, stage() and @timed
+# cost one ContextVar lookup. Stage times are inclusive: a stage that runs inside another (e.g.
+# create_tax_projection inside create_client_summary) is counted in both. Work done in pool
+# worker processes is not collected.
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, Iterator, Optional
+
+stage_counters = ('pages', 'bytes', 'items')
+_collector: ContextVar[Optional['MetricsCollector']] = ContextVar('taxreso_metrics', default=None)
+
+class MetricsCollector:
+    def __init__(self):
+        # stage -> {'calls', 'seconds', 'pages', 'bytes', 'items'}, in order of first use
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    def record(self, stage: str, seconds: float, calls: int = 1, **counts):
+        stats = self.stages.get(stage)
+        if stats is None:
+            stats = self.stages[stage] = {'calls': 0, 'seconds': 0.0, **{name: 0 for name in stage_counters}}
+        stats['calls'] += calls
+        stats['seconds'] += seconds
+        for name, value in counts.items():
+            stats[name] = stats.get(name, 0) + value
+
+    def to_dict(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        return {'stages': {stage: dict(stats) for stage, stats in self.stages.items()}}
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_prometheus(self, prefix: str = 'taxreso') -> str:
+        # Prometheus text exposition format, one counter family per measure
+        lines = []
+        measures = [('seconds', 'Wall time spent in the stage'), ('calls', 'Times the stage ran')]
+        measures += [(name, f"{name.capitalize()} handled by the stage") for name in stage_counters]
+        for measure, help_text in measures:
+            metric = f"{prefix}_stage_{measure}_total"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for stage, stats in self.stages.items():
+                lines.append(f'{metric}{{stage="{stage}"}} {stats.get(measure, 0)}')
+        return "\n".join(lines) + "\n"
+
+class _Stage:
+    # Handed out by stage(); add() attaches counts that are only known once the work is done
+    __slots__ = ('counts',)
+
+    def __init__(self, counts):
+        self.counts = counts
+
+    def add(self, **counts):
+        for name, value in counts.items():
+            self.counts[name] = self.counts.get(name, 0) + value
+
+class _NoStage:
+    __slots__ = ()
+
+    def add(self, **counts):
+        pass
+
+_no_stage = _NoStage()
+
+def current_collector() -> Optional[MetricsCollector]:
+    return _collector.get()
+
+@contextmanager
+def collect_metrics(collector: Optional[MetricsCollector] = None) -> Iterator[MetricsCollector]:
+    # Collect every stage run in this context (thread / asyncio task) into collector
+    collector = collector if collector is not None else MetricsCollector()
+    token = _collector.set(collector)
+    try:
+        yield collector
+    finally:
+        _collector.reset(token)
+
+@contextmanager
+def stage(name: str, **counts):
+    collector = _collector.get()
+    if collector is None:
+        yield _no_stage
+        return
+    handle = _Stage(counts)
+    started = time.perf_counter()
+    try:
+        yield handle
+    finally:
+        collector.record(name, time.perf_counter() - started, **handle.counts)
+
+def timed(name: str, counts: Optional[Callable[..., Dict[str, int]]] = None):
+    # Decorator form of stage(). counts(result, *args, **kwargs) -> extra counts for the call,
+    # evaluated only while collecting.
+    def decorate(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            collector = _collector.get()
+            if collector is None:
+                return function(*args, **kwargs)
+            started = time.perf_counter()
+            result = function(*args, **kwargs)
+            elapsed = time.perf_counter() - started
+            collector.record(name, elapsed, **(counts(result, *args, **kwargs) if counts else {}))
+            return result
+        return wrapper
+    return decorate
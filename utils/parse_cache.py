@@ -0,0 +1,118 @@
+# utils/parse_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Union
+from utils.transcript_parser import parser_version
+
+class ParseCache:
+    # Content-addressed cache of parse results: the key is the SHA-256 of the uploaded bytes plus
+    # the parser version and PDF engine, so identical files hit regardless of name and a parser
+    # change invalidates old entries. Entries live in an in-memory LRU and, when a path is given,
+    # in a SQLite file trimmed back to max_disk_bytes by least-recent use.
+    # Cached results are shared between callers; treat them as read-only.
+
+    def __init__(self, max_items: int = 512, path: Optional[str] = None, max_disk_bytes: int = 256 * 1024 * 1024):
+        self.max_items = max_items
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS parse_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS parse_cache_accessed ON parse_cache (accessed)")
+            self._db.commit()
+
+    def key_for(self, name: str, data: bytes) -> str:
+        from utils.transcript_sources import is_pdf
+        if is_pdf(name, data):
+            from utils.pdf_utils import resolve_pdf_engine
+            engine = resolve_pdf_engine()
+        else:
+            engine = "text"
+        return f"{parser_version}:{engine}:{hashlib.sha256(data).hexdigest()}"
+
+    def get(self, key: str) -> Optional[Dict[str, Union[str, List[Dict[str, str]]]]]:
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                return result
+            if self._db is None:
+                return None
+            row = self._db.execute("SELECT value FROM parse_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE parse_cache SET accessed = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            result = json.loads(row[0])
+            self._remember(key, result)
+            return result
+
+    def put(self, key: str, result: Dict[str, Union[str, List[Dict[str, str]]]]):
+        with self._lock:
+            self._remember(key, result)
+            if self._db is None:
+                return
+            value = json.dumps(result)
+            self._db.execute("INSERT OR REPLACE INTO parse_cache (key, value, size, accessed) VALUES (?, ?, ?, ?)", (key, value, len(value), time.time()))
+            self._evict_disk()
+            self._db.commit()
+
+    def get_or_parse(self, name: str, data: bytes) -> Dict[str, Union[str, List[Dict[str, str]]]]:
+        from utils.transcript_sources import parse_transcript_bytes
+        key = self.key_for(name, data)
+        result = self.get(key)
+        if result is not None:
+            self.hits += 1
+            return result
+        self.misses += 1
+        result = parse_transcript_bytes(name, data)
+        # Failures may be environmental (e.g. a missing PDF engine), so they are never cached
+        if "Error" not in result:
+            self.put(key, result)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM parse_cache")
+                self._db.commit()
+
+    def _remember(self, key, result):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM parse_cache").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+        stale = []
+        for key, size in self._db.execute("SELECT key, size FROM parse_cache ORDER BY accessed"):
+            if total <= self.max_disk_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM parse_cache WHERE key = ?", stale)
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def default_parse_cache(path: Optional[str] = None) -> ParseCache:
+    # One cache per process, shared by every Streamlit session and rerun. The on-disk tier is
+    # enabled by passing a path or setting TAXRESO_PARSE_CACHE to a SQLite file location.
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ParseCache(path=path or os.environ.get("TAXRESO_PARSE_CACHE"))
+        return _default_cache
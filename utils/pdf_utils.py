@@ -1,19 +1,186 @@
 import io
-import base64
-import PyPDF2
-import streamlit as st
-from typing import List, Dict, Union
-import re
-
-def extract_text_from_pdf(pdf_file):
-    pdf_reader = PyPDF2.PdfReader(pdf_file)
-    text = ""
-    for page in pdf_reader.pages:
-        text += page.extract_text()
+import os
+import importlib.util
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from utils.metrics import stage
+from utils.transcript_parser import tracking_number_pattern, tax_period_pattern, ssn_pattern
+
+# PDFs with at least this many pages are split across processes when more than one core is available
+parallel_page_threshold = 24
+
+# Fast mode stops reading pages once all of these have been seen
+header_patterns = (tracking_number_pattern, tax_period_pattern, ssn_pattern)
+
+def _read_pdf_bytes(pdf_file) -> bytes:
+    if isinstance(pdf_file, (bytes, bytearray, memoryview)):
+        return bytes(pdf_file)
+    if hasattr(pdf_file, 'getvalue'):
+        return pdf_file.getvalue()
+    if hasattr(pdf_file, 'read'):
+        return pdf_file.read()
+    with open(pdf_file, 'rb') as file:
+        return file.read()
+
+# Each engine is a (page count, page texts for [start, stop)) pair. Engine libraries are imported
+# inside the functions so only the one actually used gets loaded.
+def _pymupdf_page_count(data: bytes) -> int:
+    import fitz
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        return doc.page_count
+
+def _pymupdf_pages(data: bytes, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+    import fitz
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        for index in range(start, doc.page_count if stop is None else stop):
+            yield doc[index].get_text()
+
+def _pypdfium2_page_count(data: bytes) -> int:
+    import pypdfium2
+    pdf = pypdfium2.PdfDocument(data)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+def _pypdfium2_pages(data: bytes, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+    import pypdfium2
+    pdf = pypdfium2.PdfDocument(data)
+    try:
+        for index in range(start, len(pdf) if stop is None else stop):
+            page = pdf[index]
+            text_page = page.get_textpage()
+            yield text_page.get_text_bounded()
+            text_page.close()
+            page.close()
+    finally:
+        pdf.close()
+
+def _pdfplumber_page_count(data: bytes) -> int:
+    import pdfplumber
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        return len(pdf.pages)
+
+def _pdfplumber_pages(data: bytes, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+    import pdfplumber
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        for page in pdf.pages[start:stop]:
+            yield page.extract_text() or ""
+            page.close()
+
+def _pypdf2_page_count(data: bytes) -> int:
+    import PyPDF2
+    return len(PyPDF2.PdfReader(io.BytesIO(data)).pages)
+
+def _pypdf2_pages(data: bytes, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+    import PyPDF2
+    pages = PyPDF2.PdfReader(io.BytesIO(data)).pages
+    for index in range(start, len(pages) if stop is None else stop):
+        yield pages[index].extract_text()
+
+pdf_engines: Dict[str, Tuple[Callable[[bytes], int], Callable[..., Iterator[str]]]] = {
+    "pymupdf": (_pymupdf_page_count, _pymupdf_pages),
+    "pypdfium2": (_pypdfium2_page_count, _pypdfium2_pages),
+    "pdfplumber": (_pdfplumber_page_count, _pdfplumber_pages),
+    "pypdf2": (_pypdf2_page_count, _pypdf2_pages),
+}
+engine_modules = {"pymupdf": "fitz", "pypdfium2": "pypdfium2", "pdfplumber": "pdfplumber", "pypdf2": "PyPDF2"}
+# Fastest first; "auto" picks the first one that is installed
+engine_preference = ("pymupdf", "pypdfium2", "pypdf2", "pdfplumber")
+
+def available_pdf_engines() -> List[str]:
+    return [engine for engine in engine_preference if importlib.util.find_spec(engine_modules[engine]) is not None]
+
+def resolve_pdf_engine(engine: Optional[str] = None) -> str:
+    if engine in (None, "auto"):
+        available = available_pdf_engines()
+        if not available:
+            raise ImportError("No PDF engine installed; install one of: " + ", ".join(engine_modules.values()))
+        return available[0]
+    if engine not in pdf_engines:
+        raise ValueError(f"Unknown PDF engine {engine!r}; choose from {', '.join(pdf_engines)}")
+    return engine
+
+def _extract_page_range(engine: str, data: bytes, start: int, stop: int) -> str:
+    return "".join(pdf_engines[engine][1](data, start, stop))
+
+def _extract_until_header(pages: Iterator[str]) -> List[str]:
+    texts = []
+    missing = list(header_patterns)
+    for text in pages:
+        texts.append(text)
+        missing = [pattern for pattern in missing if not pattern.search(text)]
+        if not missing:
+            break
+    return texts
+
+def extract_text_from_pdf(pdf_file, engine: Optional[str] = None, fast: bool = False, workers: Optional[int] = None) -> str:
+    # pdf_file may be an uploaded file, any binary file object, raw bytes or a path.
+    # fast=True stops after the page where the tracking number, tax period and SSN have all
+    # appeared; use it for triage, not for income extraction. workers=None splits large PDFs
+    # across the available cores, workers=1 keeps extraction in-process.
+    data = _read_pdf_bytes(pdf_file)
+    engine = resolve_pdf_engine(engine)
+    with stage('extract_text_from_pdf', bytes=len(data)) as timer:
+        text, pages = _extract_text(data, engine, fast, workers)
+        timer.add(pages=pages)
     return text
 
-def display_pdf(file):
-    bytes_data = file.getvalue()
-    base64_pdf = base64.b64encode(bytes_data).decode('utf-8')
-    pdf_display = f'<iframe src="data:application/pdf;base64,{base64_pdf}" width="100%" height="600" type="application/pdf"></iframe>'
-    st.markdown(pdf_display, unsafe_allow_html=True)
+def _extract_text(data: bytes, engine: str, fast: bool, workers: Optional[int]) -> Tuple[str, int]:
+    # (text, pages read)
+    page_count, iter_pages = pdf_engines[engine]
+    
+    if fast:
+        texts = _extract_until_header(iter_pages(data))
+        return "".join(texts), len(texts)
+    
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers > 1:
+        pages = page_count(data)
+        if pages >= parallel_page_threshold:
+            step = -(-pages // workers)
+            starts = list(range(0, pages, step))
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=len(starts)) as pool:
+                chunks = pool.map(_extract_page_range, [engine] * len(starts), [data] * len(starts), starts, [min(start + step, pages) for start in starts])
+                return "".join(chunks), pages
+    texts = list(iter_pages(data))
+    return "".join(texts), len(texts)
+
+def count_pdf_pages(pdf_file, engine: Optional[str] = None) -> int:
+    return pdf_engines[resolve_pdf_engine(engine)][0](_read_pdf_bytes(pdf_file))
+
+# Page images for the document viewer: (engine, page index, zoom) -> PNG bytes. 72 dpi at zoom 1.
+def _pymupdf_render_page(data: bytes, index: int, zoom: float) -> bytes:
+    import fitz
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        return doc[index].get_pixmap(matrix=fitz.Matrix(zoom, zoom)).tobytes("png")
+
+def _pypdfium2_render_page(data: bytes, index: int, zoom: float) -> bytes:
+    import pypdfium2
+    pdf = pypdfium2.PdfDocument(data)
+    try:
+        page = pdf[index]
+        image = page.render(scale=zoom).to_pil()
+        page.close()
+    finally:
+        pdf.close()
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+page_renderers: Dict[str, Callable[[bytes, int, float], bytes]] = {
+    "pymupdf": _pymupdf_render_page,
+    "pypdfium2": _pypdfium2_render_page,
+}
+
+def render_pdf_page(pdf_file, page: int = 0, zoom: float = 1.0, engine: Optional[str] = None) -> bytes:
+    # One page (0-based) as a PNG. Only the rasterizing engines can render; "auto" picks the first
+    # of those that is installed.
+    if engine in (None, "auto"):
+        engine = next((name for name in available_pdf_engines() if name in page_renderers), None)
+        if engine is None:
+            raise ImportError("No PDF renderer installed; install one of: " + ", ".join(engine_modules[name] for name in page_renderers))
+    elif engine not in page_renderers:
+        raise ValueError(f"PDF engine {engine!r} cannot render pages; choose from {', '.join(page_renderers)}")
+    return page_renderers[engine](_read_pdf_bytes(pdf_file), page, zoom)
@@ -0,0 +1,82 @@
+# utils/reference_data.py
+import argparse
+import csv
+import datetime
+import io
+import json
+import os
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+# Shipped with the app so state/county pickers work offline
+bundled_counties_path = os.path.join(data_dir, 'us_counties.json')
+# Written by --refresh; preferred over the bundled file when present
+local_counties_path = os.path.join(data_dir, 'us_counties.local.json')
+census_counties_url = 'https://www2.census.gov/geo/docs/reference/codes2020/national_county2020.txt'
+# Census state FIPS codes for the states, DC and territories the pickers offer
+state_fips = {
+    '01': 'Alabama', '02': 'Alaska', '04': 'Arizona', '05': 'Arkansas', '06': 'California', '08': 'Colorado',
+    '09': 'Connecticut', '10': 'Delaware', '11': 'District of Columbia', '12': 'Florida', '13': 'Georgia',
+    '15': 'Hawaii', '16': 'Idaho', '17': 'Illinois', '18': 'Indiana', '19': 'Iowa', '20': 'Kansas',
+    '21': 'Kentucky', '22': 'Louisiana', '23': 'Maine', '24': 'Maryland', '25': 'Massachusetts',
+    '26': 'Michigan', '27': 'Minnesota', '28': 'Mississippi', '29': 'Missouri', '30': 'Montana',
+    '31': 'Nebraska', '32': 'Nevada', '33': 'New Hampshire', '34': 'New Jersey', '35': 'New Mexico',
+    '36': 'New York', '37': 'North Carolina', '38': 'North Dakota', '39': 'Ohio', '40': 'Oklahoma',
+    '41': 'Oregon', '42': 'Pennsylvania', '44': 'Rhode Island', '45': 'South Carolina', '46': 'South Dakota',
+    '47': 'Tennessee', '48': 'Texas', '49': 'Utah', '50': 'Vermont', '51': 'Virginia', '53': 'Washington',
+    '54': 'West Virginia', '55': 'Wisconsin', '56': 'Wyoming', '60': 'American Samoa', '66': 'Guam',
+    '69': 'Northern Mariana Islands', '72': 'Puerto Rico', '78': 'U.S. Virgin Islands',
+}
+
+def reference_data_path() -> str:
+    return local_counties_path if os.path.exists(local_counties_path) else bundled_counties_path
+
+@lru_cache(maxsize=None)
+def load_us_counties() -> Dict[str, Tuple[str, ...]]:
+    # State name -> county names, read once per process
+    with open(reference_data_path(), 'r', encoding='utf-8') as file:
+        data = json.load(file)
+    return {state: tuple(counties) for state, counties in data['states'].items()}
+
+def get_state_names() -> List[str]:
+    return list(load_us_counties())
+
+def get_counties(state: str) -> Tuple[str, ...]:
+    return load_us_counties().get(state, ())
+
+def refresh_reference_data(output: Optional[str] = None, url: str = census_counties_url) -> str:
+    # Download the current Census county list and write it as a versioned local file
+    import requests
+    response = requests.get(url, timeout=60)
+    response.raise_for_status()
+    try:
+        text = response.content.decode('utf-8')
+    except UnicodeDecodeError:
+        text = response.content.decode('latin-1')
+    states = {}
+    for row in csv.DictReader(io.StringIO(text), delimiter='|'):
+        state = state_fips.get(row['STATEFP'])
+        if state:
+            states.setdefault(state, []).append(row['COUNTYNAME'])
+    data = {
+        'version': datetime.date.today().isoformat(),
+        'source': url,
+        'states': {state: sorted(counties) for state, counties in sorted(states.items())},
+    }
+    output = output or local_counties_path
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(data, file, separators=(',', ':'), ensure_ascii=False)
+    load_us_counties.cache_clear()
+    return output
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="State/county reference data for the tax projection pickers")
+    parser.add_argument('--refresh', action='store_true', help="download the latest Census county list")
+    parser.add_argument('--output', help=f"where to write refreshed data (default: {local_counties_path})")
+    args = parser.parse_args()
+    if args.refresh:
+        print(f"Wrote {refresh_reference_data(args.output)}")
+    else:
+        counties = load_us_counties()
+        print(f"{reference_data_path()}: {len(counties)} states, {sum(map(len, counties.values()))} counties")
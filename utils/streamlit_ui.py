@@ -0,0 +1,65 @@
+# utils/streamlit_ui.py
+# Streamlit/rendering side of the app. The rest of utils (parser, projections, summary) is plain
+# computation that batch jobs and pool workers import without streamlit.
+import atexit
+import streamlit as st
+from utils.client_sum import currency_columns
+from utils.ingest import create_ingest_executor
+from utils.pdf_utils import count_pdf_pages, render_pdf_page
+
+currency_format = '${:.2f}'
+# Page images are rendered at this zoom (1 = 72 dpi) and cached per file, page and zoom
+pdf_preview_zoom = 1.5
+
+# The file bytes are passed as _data so streamlit skips hashing them; file_key identifies the file
+@st.cache_data(max_entries=64, show_spinner=False)
+def _pdf_page_count(file_key: str, _data: bytes) -> int:
+    return count_pdf_pages(_data)
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _pdf_page_image(file_key: str, page: int, zoom: float, _data: bytes) -> bytes:
+    return render_pdf_page(_data, page, zoom)
+
+# The upload page's parse pool: created on the first upload, shared by the server's sessions
+# through st.cache_resource, and shut down with the server process
+@st.cache_resource(show_spinner=False)
+def ingest_executor():
+    executor = create_ingest_executor()
+    atexit.register(executor.shutdown, wait=False, cancel_futures=True)
+    return executor
+
+def display_pdf(file, key=None, zoom: float = pdf_preview_zoom):
+    # Shows one page at a time as a PNG, and nothing at all until the toggle is switched on, so a
+    # document list only sends the pages someone actually looks at
+    key = key or getattr(file, 'file_id', None) or file.name
+    if not st.toggle("Show document", key=f"pdf_show_{key}"):
+        return
+    data = file.getvalue()
+    pages = _pdf_page_count(key, data)
+    page = st.number_input("Page", min_value=1, max_value=pages, value=1, key=f"pdf_page_{key}") if pages > 1 else 1
+    st.image(_pdf_page_image(key, page - 1, zoom, data), caption=f"Page {page} of {pages}", use_column_width=True)
+
+def highlight_not_filed(row):
+    color = 'red' if row['Return Filed'] == 'No' else ''
+    return ['background-color: {}'.format(color) for _ in row]
+
+def style_client_summary(summary):
+    # Currency formatting happens here, at render time, so the frame itself stays numeric
+    return summary.style.apply(highlight_not_filed, axis=1).format(currency_format, subset=[name for name in currency_columns if name in summary], na_rep='')
+
+def show_pipeline_timings(metrics, label: str = "Pipeline timings"):
+    # Collapsible per-stage table for a MetricsCollector, with JSON / Prometheus exports
+    with st.expander(label, expanded=False):
+        if metrics is None or not metrics.stages:
+            st.write("No timings recorded yet.")
+            return
+        import pandas as pd
+        table = pd.DataFrame.from_dict(metrics.stages, orient='index')
+        table.index.name = 'Stage'
+        table['ms per call'] = table['seconds'] * 1000 / table['calls']
+        st.dataframe(table, use_container_width=True)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("Download as JSON", data=metrics.to_json(indent=1), file_name="pipeline_timings.json", mime="application/json")
+        with col2:
+            st.download_button("Download as Prometheus text", data=metrics.to_prometheus(), file_name="pipeline_timings.prom", mime="text/plain")
@@ -0,0 +1,95 @@
+# utils/tax_brackets.py
+import json
+import os
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional, Tuple
+
+data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+tax_brackets_path = os.path.join(data_dir, 'tax_brackets.json')
+filing_statuses = ('single', 'married_joint', 'married_separate', 'head_of_household')
+default_filing_status = 'single'
+# Transcript wording -> table key, checked in order against the lowercased status
+filing_status_keywords = (
+    ('joint', 'married_joint'),
+    ('widow', 'married_joint'),
+    ('surviving', 'married_joint'),
+    ('separate', 'married_separate'),
+    ('head', 'head_of_household'),
+    ('single', 'single'),
+)
+
+class BracketTable(NamedTuple):
+    # Lower bound of each bracket, its marginal rate, and the tax owed on everything below that bound
+    thresholds: Tuple[float, ...]
+    rates: Tuple[float, ...]
+    base_tax: Tuple[float, ...]
+    standard_deduction: float
+
+def build_bracket_table(thresholds, rates, standard_deduction=0.0) -> BracketTable:
+    base_tax = [0.0]
+    for lower, upper, rate in zip(thresholds, thresholds[1:], rates):
+        base_tax.append(round(base_tax[-1] + (upper - lower) * rate, 2))
+    return BracketTable(tuple(map(float, thresholds)), tuple(map(float, rates)), tuple(base_tax), float(standard_deduction))
+
+# The original three-bracket schedule, still used when a transcript has no usable tax year
+legacy_bracket_table = build_bracket_table((0, 10000, 50000), (0.10, 0.15, 0.25))
+
+@lru_cache(maxsize=None)
+def load_bracket_tables(path: str = tax_brackets_path) -> Dict[Tuple[int, str], BracketTable]:
+    # (tax year, filing status) -> BracketTable, read and precomputed once per process
+    with open(path, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+    tables = {}
+    for year, schedule in data['years'].items():
+        for status, thresholds in schedule['brackets'].items():
+            tables[(int(year), status)] = build_bracket_table(thresholds, schedule['rates'], schedule['standard_deduction'][status])
+    return tables
+
+def bracket_years(path: str = tax_brackets_path) -> Tuple[int, int]:
+    years = [year for year, _ in load_bracket_tables(path)]
+    return min(years), max(years)
+
+def normalize_filing_status(filing_status) -> str:
+    if not isinstance(filing_status, str):
+        return default_filing_status
+    status = filing_status.strip().lower()
+    if status in filing_statuses:
+        return status
+    for keyword, key in filing_status_keywords:
+        if keyword in status:
+            return key
+    return default_filing_status
+
+def normalize_tax_year(year) -> Optional[int]:
+    # Tax Period values are '2021', 'Unknown' or ''; anything that isn't a plausible year is None
+    try:
+        year = int(str(year).strip()[:4])
+    except (TypeError, ValueError):
+        return None
+    return year if 1900 < year < 2100 else None
+
+def get_bracket_table(year=None, filing_status=None) -> BracketTable:
+    # Years outside the bundled range use the nearest year that is bundled
+    year = normalize_tax_year(year)
+    if year is None:
+        return legacy_bracket_table
+    first, last = bracket_years()
+    year = min(max(year, first), last)
+    return load_bracket_tables()[(year, normalize_filing_status(filing_status))]
+
+def tax_for_income(table: BracketTable, income: float) -> float:
+    if table.standard_deduction:
+        income = max(0.0, income - table.standard_deduction)
+    index = max(bisect_right(table.thresholds, income) - 1, 0)
+    return table.base_tax[index] + (income - table.thresholds[index]) * table.rates[index]
+
+def tax_for_incomes(table: BracketTable, incomes) -> 'np.ndarray':
+    # tax_for_income over an array of incomes that share one bracket table
+    import numpy as np
+    incomes = np.asarray(incomes, dtype=float)
+    if table.standard_deduction:
+        incomes = np.maximum(0.0, incomes - table.standard_deduction)
+    thresholds = np.asarray(table.thresholds)
+    index = np.maximum(np.searchsorted(thresholds, incomes, side='right') - 1, 0)
+    return np.asarray(table.base_tax)[index] + (incomes - thresholds[index]) * np.asarray(table.rates)[index]
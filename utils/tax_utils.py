@@ -1,18 +1,9 @@
-import streamlit as st
-import io
-import PyPDF2
-import pandas as pd
-import re
-import base64
-import requests
-from typing import Dict, List, Union
 # utils/tax_utils.py
-from utils.common import extract_float
+from utils.common import amounts_to_floats, extract_float
+from utils.form_registry import form_registry
+from utils.metrics import timed
+from utils.tax_brackets import get_bracket_table, tax_for_income, tax_for_incomes
 
-# Rest of your functions
-
-
-# utils/tax_utils.py
 def get_irs_standards(household_size, county, state):
     standards = {
         "food_clothing_misc": 733 * household_size,
@@ -25,42 +16,56 @@ def get_irs_standards(household_size, county, state):
     }
     return standards
 
-def calculate_tax(total_income):
-    if total_income <= 10000:
-        return total_income * 0.10
-    elif total_income <= 50000:
-        return 1000 + (total_income - 10000) * 0.15
-    else:
-        return 7000 + (total_income - 50000) * 0.25
-    
+# Forms whose income is subject to SE tax, flagged in the form registry
+se_income_forms = form_registry.self_employment_forms
+# Account-transcript figures that count as income not subject to SE tax
+return_income_fields = frozenset(['ADJUSTED GROSS INCOME', 'TAXABLE INCOME'])
+# numpy/pandas are imported inside the batch functions only, so the scalar projection path stays
+# cheap to import in pool workers and CLI runs
+projection_row_columns = ['Document', 'Client', 'Tax Year', 'Filing Status', 'Form', 'Income', 'Withholding']
 
+def calculate_tax(total_income, year=None, filing_status=None):
+    # Brackets and standard deduction for the tax year and filing status; without a year
+    # this is the original three-bracket schedule
+    return tax_for_income(get_bracket_table(year, filing_status), total_income)
+
+def get_filing_status(parsed_data):
+    status = parsed_data['Income'].get('FILING STATUS')
+    return status if isinstance(status, str) else None
+
+def amount_cents(value) -> int:
+    # Whole cents of an amount as extract_float reads it (half to even, as np.rint rounds).
+    # Both projection paths add up cents so they total the same amounts to the same float.
+    return round(extract_float(value) * 100)
+
+@timed('create_tax_projection')
 def create_tax_projection(parsed_data, household_size, county, state):
-    projection = {
-        "(TP) Income Subject to SE Tax": 0,
-        "(TP) Income Not Subject to SE Tax": 0,
-        "(TP) Withholding": 0,
-    }
-    
-    se_income_forms = ['1099-MISC', '1099-NEC', '1099-K', '1099-PATR', '1042-S', 'K-1 1065', 'K-1 1041']
+    # Sums are kept in cents and turned into dollars once at the end
+    se_income = other_income = withholding = 0
     
     for form, data in parsed_data['Income'].items():
         if isinstance(data, dict) and 'Income' in data:
             if form in se_income_forms:
                 for key, value in data['Income'].items():
-                    projection["(TP) Income Subject to SE Tax"] += extract_float(value)
+                    se_income += amount_cents(value)
             else:
                 for key, value in data['Income'].items():
-                    projection["(TP) Income Not Subject to SE Tax"] += extract_float(value)
+                    other_income += amount_cents(value)
             
             for key, value in data.get('Withholdings', {}).items():
-                projection["(TP) Withholding"] += extract_float(value)
-        elif form in ['ADJUSTED GROSS INCOME', 'TAXABLE INCOME']:
-            projection["(TP) Income Not Subject to SE Tax"] += extract_float(data)
+                withholding += amount_cents(value)
+        elif form in return_income_fields:
+            other_income += amount_cents(data)
     
-    total_income = projection["(TP) Income Subject to SE Tax"] + projection["(TP) Income Not Subject to SE Tax"]
+    projection = {
+        "(TP) Income Subject to SE Tax": se_income / 100,
+        "(TP) Income Not Subject to SE Tax": other_income / 100,
+        "(TP) Withholding": withholding / 100,
+    }
+    total_income = (se_income + other_income) / 100
     
     irs_standards = get_irs_standards(household_size, county, state)
-    projected_tax = calculate_tax(total_income)
+    projected_tax = calculate_tax(total_income, parsed_data.get('Tax Period'), get_filing_status(parsed_data))
     
     projection["Total Income"] = total_income
     projection["IRS Standards"] = irs_standards
@@ -68,3 +73,75 @@ def create_tax_projection(parsed_data, household_size, county, state):
     projection["Projected Amount Owed"] = max(0, projected_tax - projection["(TP) Withholding"])
     
     return projection
+
+def calculate_tax_batch(total_income, years=None, filing_statuses=None) -> 'np.ndarray':
+    # calculate_tax over a whole array of incomes; each distinct (year, filing status) pair
+    # is looked up once and its incomes are bracketed together with searchsorted
+    import numpy as np
+    import pandas as pd
+    income = np.asarray(total_income, dtype=float)
+    if years is None:
+        return tax_for_incomes(get_bracket_table(), income)
+    if filing_statuses is None:
+        filing_statuses = [None] * len(income)
+    codes, uniques = pd.MultiIndex.from_arrays([list(years), list(filing_statuses)]).factorize()
+    tax = np.empty(len(income), dtype=float)
+    for code, (year, status) in enumerate(uniques):
+        group = codes == code
+        tax[group] = tax_for_incomes(get_bracket_table(year, status), income[group])
+    return tax
+
+def projection_rows(results, clients=None, years=None) -> 'pd.DataFrame':
+    # Flatten parsed results into the long (document, client, year, filing status, form, income, withholding)
+    # table create_tax_projections works on: one row per income or withholding amount that
+    # create_tax_projection would count. Amounts are converted exactly as the scalar path does.
+    rows = []
+    for document, result in enumerate(results):
+        client = clients[document] if clients is not None else result['SSN']
+        year = years[document] if years is not None else result['Tax Period']
+        status = get_filing_status(result)
+        for form, data in result['Income'].items():
+            if isinstance(data, dict) and 'Income' in data:
+                rows.extend([(document, client, year, status, form, value, '0') for value in data['Income'].values()])
+                rows.extend([(document, client, year, status, form, '0', value) for value in data.get('Withholdings', {}).values()])
+            elif form in return_income_fields:
+                rows.append((document, client, year, status, form, data, '0'))
+    documents, client_column, year_column, status_column, forms, incomes, withholdings = zip(*rows) if rows else ((),) * 7
+    import numpy as np
+    import pandas as pd
+    return pd.DataFrame({
+        'Document': np.array(documents, dtype=np.int64),
+        'Client': list(client_column),
+        'Tax Year': list(year_column),
+        'Filing Status': list(status_column),
+        'Form': list(forms),
+        'Income': amounts_to_floats(incomes),
+        'Withholding': amounts_to_floats(withholdings),
+    }, columns=projection_row_columns)
+
+def create_tax_projections(rows: 'pd.DataFrame', by=('Client', 'Tax Year')) -> 'pd.DataFrame':
+    # Vectorized create_tax_projection over a projection_rows table, one output row per group.
+    # Group by 'Document' to get exactly the per-transcript projections of the scalar function,
+    # or by client/year to project everything known about each client-year at once. Each group is
+    # taxed with the brackets of its (first) tax year and filing status.
+    import numpy as np
+    import pandas as pd
+    by = list(by)
+    se = rows['Form'].isin(se_income_forms).to_numpy()
+    # Summed in cents, like create_tax_projection, so both give the same floats
+    income = np.rint(rows['Income'].to_numpy(dtype=float) * 100).astype(np.int64)
+    frame = pd.DataFrame({
+        "(TP) Income Subject to SE Tax": np.where(se, income, 0),
+        "(TP) Income Not Subject to SE Tax": np.where(se, 0, income),
+        "(TP) Withholding": np.rint(rows['Withholding'].to_numpy(dtype=float) * 100).astype(np.int64),
+    })
+    keys = [rows[name].to_numpy() for name in by]
+    cents = frame.groupby(keys, sort=False).sum()
+    projections = cents / 100
+    projections.index.names = by
+    brackets = rows[['Tax Year', 'Filing Status']].groupby(keys, sort=False).first()
+    total_income = (cents["(TP) Income Subject to SE Tax"] + cents["(TP) Income Not Subject to SE Tax"]) / 100
+    projections["Total Income"] = total_income
+    projections["Projected Tax"] = calculate_tax_batch(total_income, brackets['Tax Year'].tolist(), brackets['Filing Status'].tolist())
+    projections["Projected Amount Owed"] = np.maximum(0, projections["Projected Tax"] - projections["(TP) Withholding"])
+    return projections
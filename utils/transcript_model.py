@@ -0,0 +1,220 @@
+# utils/transcript_model.py
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from utils.common import amount_to_cents
+from utils.transcript_parser import transaction_keys
+
+# Keys of the parse_transcript dict, in the order parse_transcript writes them
+result_keys = ('Transcript Type', 'Tracking Number', 'Tax Period', 'SSN', 'Details', 'Income', 'Transactions', 'Return Filed')
+
+def _interned(strings: Iterable[str]) -> Tuple[str, ...]:
+    # Field names and common values ('$0.00', 'Single', ...) repeat across every transcript in a
+    # batch; interning keeps one copy of each instead of one per transcript
+    return tuple(sys.intern(string) if type(string) is str else string for string in strings)
+
+@dataclass(slots=True)
+class FormAmounts:
+    # One form's income and withholding amounts: field names, the values as printed on the
+    # transcript (kept for to_dict) and the same values in integer cents
+    income_keys: Tuple[str, ...]
+    income_values: Tuple[str, ...]
+    income_cents: Tuple[int, ...]
+    withholding_keys: Tuple[str, ...]
+    withholding_values: Tuple[str, ...]
+    withholding_cents: Tuple[int, ...]
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Dict[str, str]]) -> 'FormAmounts':
+        income = data.get('Income', {})
+        withholdings = data.get('Withholdings', {})
+        return cls(
+            _interned(income), _interned(income.values()), tuple(amount_to_cents(value) or 0 for value in income.values()),
+            _interned(withholdings), _interned(withholdings.values()), tuple(amount_to_cents(value) or 0 for value in withholdings.values()),
+        )
+
+    def to_dict(self) -> Dict[str, Dict[str, str]]:
+        return {
+            "Income": dict(zip(self.income_keys, self.income_values)),
+            "Withholdings": dict(zip(self.withholding_keys, self.withholding_values)),
+        }
+
+    @property
+    def total_income_cents(self) -> int:
+        return sum(self.income_cents)
+
+    @property
+    def total_withholding_cents(self) -> int:
+        return sum(self.withholding_cents)
+
+@dataclass(slots=True)
+class Transcript:
+    # A parsed transcript without the per-line dicts. Details are two parallel tuples (duplicate
+    # keys kept, in transcript order) and Income is a key tuple with either the printed value or
+    # a FormAmounts per key. Amounts are converted to cents once, here.
+    transcript_type: str
+    tracking_number: str
+    tax_period: str
+    ssn: str
+    return_filed: bool
+    detail_keys: Tuple[str, ...]
+    detail_values: Tuple[str, ...]
+    income_keys: Tuple[str, ...]
+    income_values: Tuple[Union[str, FormAmounts], ...]
+    # Cents for flat income values; None for forms and for values that aren't amounts
+    income_cents: Tuple[Optional[int], ...]
+    # (code, explanation, cycle, date, amount) per transaction line; None for results parsed
+    # before transactions were extracted, so they round-trip without the key
+    transactions: Optional[Tuple[Tuple[str, ...], ...]]
+    # Anything else the result dict carried ("Error", ...), in its original order
+    extra: Optional[Dict[str, object]] = None
+    # The Details and Income dict views, built on first access and then reused: the summary and
+    # projection code read result['Income'] several times per transcript
+    _details: Optional[List[Dict[str, str]]] = field(default=None, init=False, repr=False, compare=False)
+    _income: Optional[Dict[str, Union[str, Dict[str, Dict[str, str]]]]] = field(default=None, init=False, repr=False, compare=False)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, object]) -> 'Transcript':
+        details = data['Details']
+        detail_keys = []
+        detail_values = []
+        for detail in details:
+            for key, value in detail.items():
+                detail_keys.append(key)
+                detail_values.append(value)
+        income_values = []
+        income_cents = []
+        for value in data['Income'].values():
+            if isinstance(value, dict):
+                income_values.append(FormAmounts.from_dict(value))
+                income_cents.append(None)
+            else:
+                income_values.append(sys.intern(value) if type(value) is str else value)
+                income_cents.append(amount_to_cents(value))
+        transactions = data.get('Transactions')
+        if transactions is not None:
+            transactions = tuple(_interned(transaction[key] for key in transaction_keys) for transaction in transactions)
+        extra = {key: value for key, value in data.items() if key not in result_keys}
+        return cls(
+            data['Transcript Type'], data['Tracking Number'], data['Tax Period'], data['SSN'], data['Return Filed'],
+            _interned(detail_keys), _interned(detail_values),
+            _interned(data['Income']), tuple(income_values), tuple(income_cents),
+            transactions, extra or None,
+        )
+
+    def to_dict(self) -> Dict[str, object]:
+        # The exact dict parse_transcript produced, built fresh so changing it leaves the record alone
+        data = {
+            "Transcript Type": self.transcript_type,
+            "Tracking Number": self.tracking_number,
+            "Tax Period": self.tax_period,
+            "SSN": self.ssn,
+            "Details": self._build_details(),
+            "Income": self._build_income(),
+            "Transactions": self.transaction_dicts,
+            "Return Filed": self.return_filed,
+        }
+        if self.transactions is None:
+            del data["Transactions"]
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    @property
+    def details(self) -> List[Dict[str, str]]:
+        if self._details is None:
+            self._details = self._build_details()
+        return self._details
+
+    @property
+    def income(self) -> Dict[str, Union[str, Dict[str, Dict[str, str]]]]:
+        if self._income is None:
+            self._income = self._build_income()
+        return self._income
+
+    def _build_details(self) -> List[Dict[str, str]]:
+        return [{key: value} for key, value in zip(self.detail_keys, self.detail_values)]
+
+    def _build_income(self) -> Dict[str, Union[str, Dict[str, Dict[str, str]]]]:
+        return {
+            key: value.to_dict() if isinstance(value, FormAmounts) else value
+            for key, value in zip(self.income_keys, self.income_values)
+        }
+
+    @property
+    def transaction_dicts(self) -> List[Dict[str, str]]:
+        return [dict(zip(transaction_keys, transaction)) for transaction in self.transactions or ()]
+
+    @property
+    def error(self) -> Optional[str]:
+        return self.extra.get('Error') if self.extra else None
+
+    def detail(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        # First value recorded for key
+        try:
+            return self.detail_values[self.detail_keys.index(key)]
+        except ValueError:
+            return default
+
+    def detail_all(self, key: str) -> List[str]:
+        return [value for detail_key, value in zip(self.detail_keys, self.detail_values) if detail_key == key]
+
+    def amount(self, key: str, default: int = 0) -> int:
+        # Cents for a flat income value (Account Transcript / Record of Account / Summary)
+        try:
+            cents = self.income_cents[self.income_keys.index(key)]
+        except ValueError:
+            return default
+        return default if cents is None else cents
+
+    def form(self, name: str) -> Optional[FormAmounts]:
+        try:
+            value = self.income_values[self.income_keys.index(name)]
+        except ValueError:
+            return None
+        return value if isinstance(value, FormAmounts) else None
+
+    # Read-only mapping access with the parse_transcript keys, so code written against the
+    # result dicts (result['SSN'], result.get('Details', [])) keeps working on a Transcript.
+    def __getitem__(self, key: str):
+        if key == 'Transcript Type':
+            return self.transcript_type
+        if key == 'Tracking Number':
+            return self.tracking_number
+        if key == 'Tax Period':
+            return self.tax_period
+        if key == 'SSN':
+            return self.ssn
+        if key == 'Details':
+            return self.details
+        if key == 'Income':
+            return self.income
+        if key == 'Transactions' and self.transactions is not None:
+            return self.transaction_dicts
+        if key == 'Return Filed':
+            return self.return_filed
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key: str) -> bool:
+        if key == 'Transactions':
+            return self.transactions is not None
+        return key in result_keys or bool(self.extra and key in self.extra)
+
+    def keys(self) -> List[str]:
+        keys = [key for key in result_keys if key != 'Transactions' or self.transactions is not None]
+        return keys + list(self.extra or ())
+
+def to_transcripts(results: Iterable[Dict[str, object]]) -> List[Transcript]:
+    return [result if isinstance(result, Transcript) else Transcript.from_dict(result) for result in results]
+
+def to_dicts(transcripts: Iterable[Union[Transcript, Dict[str, object]]]) -> List[Dict[str, object]]:
+    return [transcript.to_dict() if isinstance(transcript, Transcript) else transcript for transcript in transcripts]
@@ -1,20 +1,119 @@
 import re
-from typing import Dict, List, Union
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple, Union
+from utils.form_registry import form_registry, income_section, withholding_section
+from utils.label_index import LabelIndex
+from utils.metrics import timed
 
-def parse_transcript(content: str) -> Dict[str, Union[str, List[Dict[str, str]]]]:
-    lines = content.split('\n')  # Correct indentation
-    
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+# Bump whenever parse_transcript's output changes so cached parse results are not reused
+parser_version = 6
+
+# Patterns are compiled once at import; parse_transcript runs for every transcript in a batch.
+tracking_number_pattern = re.compile(r'Tracking Number[:\s]*([\d]+)')
+tax_period_pattern = re.compile(r'Tax Period[:\s]*([\d-]+)|TAX PERIOD[:\s]*([A-Za-z\s\d.,]+)|Tax Period Requested[:\s]*([A-Za-z\s\d.,]+)')
+# Both labels may be followed by a masked number ('XXX-XX-1234'), as transcripts print it
+ssn_pattern = re.compile(r'SSN Provided[:\s]*([\d-]+|XXX-XX-\d{4})|TAXPAYER IDENTIFICATION NUMBER[:\s]*([\d-]+|XXX-XX-\d{4})')
+form_pattern = re.compile(r'Form\s+([\w-]+)')
+year_pattern = re.compile(r'\d{4}')
+# Account transcript transaction lines: code, explanation, optional cycle, date, amount, e.g.
+# "150 Tax return filed 20212105 06-03-2021 $1,234.00"
+transaction_pattern = re.compile(r'\n[ \t]*(\d{3})[ \t]+(.+?)[ \t]+(?:(\d{8})[ \t]+)?(\d{2}-\d{2}-\d{4})[ \t]+(-?\$?-?[\d,]+\.\d{2})[ \t]*\r?$', re.M)
+# TC 150 (return filed) opens its line; also catches layouts where the transaction table's
+# columns were extracted onto separate lines. Amounts and dates containing '150' never match.
+return_filed_pattern = re.compile(r'\n[ \t]*150(?:[ \t]|\r?$)', re.M)
+# Both patterns start at a line break rather than '^', so the regex engine jumps from line to
+# line instead of trying every character. Account transcripts print their transactions under
+# this column heading; the patterns only scan from there on, and the whole document only when
+# the heading is missing
+transaction_table_heading = 'EXPLANATION OF TRANSACTION'
+transaction_keys = ('Code', 'Explanation', 'Cycle', 'Date', 'Amount')
+
+# Header values come from the last line where their pattern matches, as the line-by-line parser
+# left them. The labels are located with str.find and the patterns only tried there, instead of
+# running every pattern over every line.
+tracking_number_labels = ('Tracking Number',)
+tax_period_labels = ('Tax Period', 'TAX PERIOD')
+ssn_labels = ('SSN Provided', 'TAXPAYER IDENTIFICATION NUMBER')
+
+# Per-form fields come from the form registry (utils/data/forms.json)
+income_fields = form_registry.income_fields
+withholding_fields = form_registry.withholding_fields
+# Form field labels that aren't an exact match ('Wages, Tips, and Other Compensation', OCR noise)
+# are resolved through these before they are dropped
+income_label_index = LabelIndex(income_fields)
+withholding_label_index = LabelIndex(withholding_fields)
+# form -> {label as printed: (section, field) or None}: the registry's labels, plus every other
+# label seen under the form once it has been resolved, so a line is one dict lookup
+form_labels: Dict[str, Dict[str, Optional[Tuple[str, str]]]] = {}
+# Resolved labels remembered per form; past this, new ones are resolved every time
+max_form_labels = 4096
+unresolved = object()
+
+# Batches smaller than this are parsed in-process; pool start-up and pickling would cost more than they save
+parallel_threshold = 64
+
+def detect_transcript_type(content: str) -> str:
     if "Account Transcript" in content:
-        transcript_type = "Account Transcript"
+        return "Account Transcript"
     elif "Record of Account" in content:
-        transcript_type = "Record of Account"
+        return "Record of Account"
     elif "Wage and Income Transcript" in content:
         if "Wage & Income Summary" in content and not any(form in content for form in ['W-2', '1099-MISC', '1099-NEC', '1099-G', '1099-DIV']):
-            transcript_type = "Wage and Income Summary"
-        else:
-            transcript_type = "Wage and Income Transcript"
+            return "Wage and Income Summary"
+        return "Wage and Income Transcript"
+    return "Unknown"
+
+def last_line_match(content: str, pattern: re.Pattern, labels: Tuple[str, ...]) -> Optional[re.Match]:
+    # pattern's first match on the last line where it matches at all. Every alternative of the
+    # header patterns starts with one of labels, so the match is tried at the labels only.
+    positions = []
+    for label in labels:
+        position = content.find(label)
+        while position != -1:
+            positions.append(position)
+            position = content.find(label, position + len(label))
+    positions.sort()
+    end = len(positions)
+    while end:
+        start = content.rfind('\n', 0, positions[end - 1]) + 1
+        stop = content.find('\n', start)
+        if stop == -1:
+            stop = len(content)
+        first = end - 1
+        while first and positions[first - 1] >= start:
+            first -= 1
+        for position in positions[first:end]:
+            match = pattern.match(content, position, stop)
+            if match:
+                return match
+        end = first
+    return None
+
+def form_label_table(form: str) -> Dict[str, Optional[Tuple[str, str]]]:
+    labels = form_labels.get(form)
+    if labels is None:
+        spec = form_registry.get(form)
+        labels = form_labels[form] = dict(spec.fields) if spec is not None else {}
+    return labels
+
+def resolve_form_label(form: str, label: str) -> Optional[Tuple[str, str]]:
+    # (section, field) for a label printed under form that the registry doesn't list, or None
+    field = income_label_index.resolve(form, label)
+    if field is not None:
+        resolved = (income_section, field)
     else:
-        transcript_type = "Unknown"
+        field = withholding_label_index.resolve(form, label)
+        resolved = (withholding_section, field) if field is not None else None
+    labels = form_label_table(form)
+    if len(labels) < max_form_labels:
+        labels[label] = resolved
+    return resolved
+
+@timed('parse_transcript', lambda result, content: {'bytes': len(content)})
+def parse_transcript(content: str) -> Dict[str, Union[str, List[Dict[str, str]]]]:
+    transcript_type = detect_transcript_type(content)
     
     data = {
         "Transcript Type": transcript_type,
@@ -23,97 +122,79 @@ def parse_transcript(content: str) -> Dict[str, Union[str, List[Dict[str, str]]]
         "SSN": "",
         "Details": [],
         "Income": {},
-        "Return Filed": False  # Default is False, will update if Code:150 is found
+        "Transactions": [],
+        "Return Filed": False
     }
+    income = data["Income"]
     
-    tracking_number_pattern = re.compile(r'Tracking Number[:\s]*([\d]+)')
-    tax_period_pattern = re.compile(r'Tax Period[:\s]*([\d-]+)|TAX PERIOD[:\s]*([A-Za-z\s\d.,]+)|Tax Period Requested[:\s]*([A-Za-z\s\d.,]+)')
-    ssn_pattern = re.compile(r'SSN Provided[:\s]*([\d-]+)|TAXPAYER IDENTIFICATION NUMBER[:\s]*([\d-]+|XXX-XX-\d{4})')
-    form_pattern = re.compile(r'Form\s+([\w-]+)')
+    if transcript_type in ("Account Transcript", "Record of Account"):
+        table_start = content.find(transaction_table_heading)
+        table = content[table_start:] if table_start != -1 else '\n' + content
+        rows = transaction_pattern.findall(table)
+        # Cycle is '' when the line has none
+        data["Transactions"] = [
+            {"Code": code, "Explanation": explanation, "Cycle": cycle or "", "Date": date, "Amount": amount}
+            for code, explanation, cycle, date, amount in rows
+        ]
+        # Transaction code 150 indicates the return has been filed; a TC 150 transaction line
+        # settles it without another scan
+        data["Return Filed"] = any(row[0] == '150' for row in rows) or return_filed_pattern.search(table) is not None
+    elif '150' in content:
+        data["Return Filed"] = return_filed_pattern.search('\n' + content) is not None
     
-    current_form = None
+    tracking_number_match = last_line_match(content, tracking_number_pattern, tracking_number_labels)
+    if tracking_number_match:
+        data["Tracking Number"] = tracking_number_match.group(1)
+    tax_period_match = last_line_match(content, tax_period_pattern, tax_period_labels)
+    if tax_period_match:
+        tax_period_value = tax_period_match.group(1) or tax_period_match.group(2) or tax_period_match.group(3)
+        year_match = year_pattern.search(tax_period_value)
+        data["Tax Period"] = year_match.group() if year_match else "Unknown"
+    ssn_match = last_line_match(content, ssn_pattern, ssn_labels)
+    if ssn_match:
+        data["SSN"] = ssn_match.group(1) if ssn_match.group(1) else ssn_match.group(2)
     
-    income_fields = {
-        'W-2': ['Wages, Tips and Other Compensation'],
-        '1099-MISC': ['Non-Employee Compensation', 'Medical Payments', 'Fishing Income', 'Rents', 'Royalties', 'Attorney Fees', 'Other Income', 'Substitute Payments for Dividends'],
-        '1099-NEC': ['Non-Employee Compensation'],
-        '1099-K': ['Gross Amount of Payment Card/Third Party Transactions'],
-        '1099-PATR': ['Patronage Dividends', 'Non-Patronage Distribution', 'Retained Allocations', 'Redemption Amount'],
-        '1042-S': ['Gross Income'],
-        'K-1 1065': ['Royalties', 'Ordinary Income K-1', 'Real Estate', 'Other Rental', 'Guaranteed Payments', 'Dividends', 'Interest'],
-        'K-1 1041': ['Net Rental Real Estate Income', 'Other Rental Income', 'Dividends', 'Interest', 'Long-Term Capital Gain', 'Other Portfolio and Non-Business Income'],
-        'W-2G': ['Gross Winnings'],
-        '1099-R': ['Taxable Amount'],
-        '1099-B': ['Proceeds', 'Cost or Basis'],
-        '1099-S': ['Gross Proceeds'],
-        '1099-LTC': ['Gross Long-Term Care Benefits Paid', 'Accelerated Death Benefits Paid'],
-        '3922': ['Exercise Fair Market Value per Share on Exercise Date', 'Exercise Price per Share', 'Number of Shares Transferred'],
-        'K-1 1120S': ['Dividends', 'Interest', 'Royalties', 'Ordinary Income K-1', 'Real Estate', 'Other Rental'],
-        'SSA': ['Pensions and Annuities (Total Benefits Paid)'],
-        '1099-DIV': ['Qualified Dividends', 'Cash Liquidation Distribution', 'Capital Gains', 'Ordinary Dividend'],
-        '1099-INT': ['Interest'],
-        '1099-G': ['Unemployment Compensation', 'Agricultural Subsidies', 'Taxable Grants'],
-        '1098': ['Mortgage Interest Received from Payer(s)/Borrower(s)', 'Outstanding Mortgage Principle']
-    }
-    withholding_fields = {
-        'W-2': ['Federal Income Tax Withheld'],
-        '1099-MISC': ['Tax Withheld'],
-        '1099-NEC': ['Federal Income Tax Withheld'],
-        '1099-K': ['Federal Income Tax Withheld'],
-        '1099-PATR': ['Tax Withheld'],
-        '1042-S': ['U.S. Federal Tax Withheld'],
-        'W-2G': ['Federal Income Tax Withheld'],
-        '1099-R': ['Tax Withheld'],
-        'SSA': ['Tax Withheld'],
-        '1099-DIV': ['Tax Withheld'],
-        '1099-INT': ['Tax Withheld'],
-        '1099-G': ['Tax Withheld']
-    }
-    
-    for line in lines:
-        tracking_number_match = tracking_number_pattern.search(line)
-        if tracking_number_match:
-            data["Tracking Number"] = tracking_number_match.group(1)
-            
-        tax_period_match = tax_period_pattern.search(line)
-        if tax_period_match:
-            tax_period_value = tax_period_match.group(1) or tax_period_match.group(2) or tax_period_match.group(3)
-            if tax_period_value:
-                year_match = re.search(r'\d{4}', tax_period_value)
-                if year_match:
-                    data["Tax Period"] = year_match.group()
-                else:
-                    data["Tax Period"] = "Unknown"
-        
-        ssn_match = ssn_pattern.search(line)
-        if ssn_match:
-            data["SSN"] = ssn_match.group(1) if ssn_match.group(1) else ssn_match.group(2)
-        
-        # Check if Code:150 is present, indicating the return has been filed
-        if '150' in line:
-            data["Return Filed"] = True
-        
-        form_match = form_pattern.search(line)
-        if form_match:
-            current_form = form_match.group(1)
-            if current_form not in data["Income"]:
-                data["Income"][current_form] = {"Income": {}, "Withholdings": {}}
-        
+    # One pass over the lines collects every "key: value" pair, plus (pair count, form) at each
+    # line naming a form, so a pair belongs to the last form named on or above its line. Lines
+    # are only checked for forms when the transcript names one at all.
+    pairs = []
+    forms = []
+    scan_forms = 'Form' in content
+    for line in content.split('\n'):
+        if scan_forms and 'Form' in line:
+            form_match = form_pattern.search(line)
+            if form_match:
+                # Registered names can contain spaces ('K-1 1065'); anything else is the first word
+                forms.append((len(pairs), form_registry.form_for_word(form_match.group(1), line, form_match.start(1))))
         if ':' in line:
-            key, value = line.split(':', 1)
+            key, _, value = line.partition(':')
             key = key.strip()
             value = value.strip()
             if key and value:
-                data["Details"].append({key: value})
-                if transcript_type in ["Account Transcript", "Record of Account"]:
-                    data["Income"][key] = value
-                elif transcript_type == "Wage and Income Transcript" and current_form:
-                    if key in income_fields.get(current_form, []):
-                        data["Income"][current_form]["Income"][key] = value
-                    elif key in withholding_fields.get(current_form, []):
-                        data["Income"][current_form]["Withholdings"][key] = value
-                elif transcript_type == "Wage and Income Summary":
-                    data["Income"][key] = value
+                pairs.append((key, value))
+    data["Details"] = [{key: value} for key, value in pairs]
+    
+    flat_income = transcript_type in ("Account Transcript", "Record of Account", "Wage and Income Summary")
+    if not forms:
+        if flat_income:
+            income.update(pairs)
+        return data
+    if flat_income:
+        income.update(pairs[:forms[0][0]])
+    for (start, form), (end, _) in zip(forms, forms[1:] + [(len(pairs), None)]):
+        if form not in income:
+            income[form] = {"Income": {}, "Withholdings": {}}
+        if flat_income:
+            income.update(pairs[start:end])
+        elif transcript_type == "Wage and Income Transcript":
+            form_data = income[form]
+            labels = form_label_table(form)
+            for key, value in pairs[start:end]:
+                field = labels.get(key, unresolved)
+                if field is unresolved:
+                    field = resolve_form_label(form, key)
+                if field is not None:
+                    form_data[field[0]][field[1]] = value
     return data
 
 def flatten_dict(d, parent_key='', sep='_'):
@@ -126,9 +207,44 @@ def flatten_dict(d, parent_key='', sep='_'):
             items.append((new_key, v))
     return dict(items)
     
-def process_transcripts(transcripts: List[str]) -> List[Dict[str, Union[str, Dict]]]:
-    results = []
-    for content in transcripts:
-        parsed_data = parse_transcript(content)
-        results.append(parsed_data)
-    return results
+def error_result(error: Exception) -> Dict[str, Union[str, List[Dict[str, str]]]]:
+    # Placeholder for a transcript that couldn't be read or parsed, so batches keep their shape
+    return {
+        "Transcript Type": "Unknown",
+        "Tracking Number": "",
+        "Tax Period": "",
+        "SSN": "",
+        "Details": [],
+        "Income": {},
+        "Transactions": [],
+        "Return Filed": False,
+        "Error": f"{type(error).__name__}: {error}"
+    }
+
+def parse_transcript_safe(content: str) -> Dict[str, Union[str, List[Dict[str, str]]]]:
+    # Same as parse_transcript, but a failure becomes an error_result instead of an exception,
+    # so one bad transcript can't take down a whole batch.
+    try:
+        return parse_transcript(content)
+    except Exception as e:
+        return error_result(e)
+
+def process_transcripts(transcripts: Iterable[str], workers: Optional[int] = None, executor: Optional['Executor'] = None, chunksize: Optional[int] = None) -> List[Dict[str, Union[str, Dict]]]:
+    # Results come back in input order. Pass workers to shard the batch across a process pool,
+    # or an executor to reuse one you already own (it is not shut down here); with an executor,
+    # workers is only used to size the chunks.
+    transcripts = list(transcripts)
+    if executor is None and (not workers or workers == 1 or len(transcripts) < parallel_threshold):
+        return [parse_transcript_safe(content) for content in transcripts]
+    
+    pool_size = workers or 1
+    if chunksize is None:
+        # A few chunks per worker keeps the pool balanced while pickling whole chunks at a time
+        chunksize = max(1, len(transcripts) // (pool_size * 4))
+    
+    if executor is not None:
+        return list(executor.map(parse_transcript_safe, transcripts, chunksize=chunksize))
+    # Imported here; multiprocessing is only worth loading when a batch is actually sharded
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(parse_transcript_safe, transcripts, chunksize=chunksize))
@@ -0,0 +1,185 @@
+# utils/transcript_sources.py
+import glob
+import io
+import itertools
+import mmap
+import os
+import re
+import tarfile
+import zipfile
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from utils.transcript_parser import parse_transcript_safe, error_result
+
+transcript_extensions = ('.pdf', '.txt')
+zip_extensions = ('.zip',)
+tar_extensions = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+# Vendor exports concatenate many transcripts into one text file. A transcript starts at the
+# banner line above its title line (the request date and tracking number sit in between), or at
+# the title itself when there is no banner; banners repeated on later pages never start one.
+transcript_title_pattern = re.compile(rb'^[ \t]*(?:Account Transcript|Record of Account|Wage and Income Transcript|Tax Return Transcript)[ \t]*\r?$', re.M)
+transcript_banner = b'This Product Contains Sensitive Taxpayer Data'
+
+def is_transcript_name(name: str) -> bool:
+    return name.lower().endswith(transcript_extensions)
+
+def is_pdf(name: str, data: bytes) -> bool:
+    return data[:5] == b'%PDF-' or name.lower().endswith('.pdf')
+
+def read_transcript_text(name: str, data: bytes, pdf_workers: Optional[int] = None) -> str:
+    if is_pdf(name, data):
+        # Imported here so text-only ingestion never loads the PDF stack
+        from utils.pdf_utils import extract_text_from_pdf
+        return extract_text_from_pdf(io.BytesIO(data), workers=pdf_workers)
+    return data.decode("utf-8")
+
+def transcript_segment_bounds(data) -> Iterator[Tuple[int, int]]:
+    # (start, end) byte offsets of each transcript in a text dump (bytes or an mmap). Text with at
+    # most one title comes back as a single segment covering all of it.
+    start = 0
+    previous_title_end = None
+    for match in transcript_title_pattern.finditer(data):
+        if previous_title_end is not None:
+            banner = data.rfind(transcript_banner, previous_title_end, match.start())
+            cut = data.rfind(b'\n', 0, banner) + 1 if banner != -1 else match.start()
+            yield start, cut
+            start = cut
+        previous_title_end = match.end()
+    yield start, len(data)
+
+def _iter_segments(name: str, data) -> Iterator[Tuple[str, bytes]]:
+    # One (name, bytes) per transcript; only a dump's segments get '#1', '#2', ... suffixes
+    bounds = transcript_segment_bounds(data)
+    try:
+        first = next(bounds)
+        second = next(bounds, None)
+        if second is None:
+            yield name, data[first[0]:first[1]]
+            return
+        for index, (start, end) in enumerate(itertools.chain((first, second), bounds), 1):
+            yield f"{name}#{index}", data[start:end]
+    finally:
+        # Drop the regex scanner before the caller unmaps the file
+        bounds.close()
+
+def _iter_text_file(path: str) -> Iterator[Tuple[str, bytes]]:
+    # Text files are memory-mapped and cut into transcripts, so a multi-GB dump is never read or
+    # decoded as a whole; only the segment being parsed is copied out of the mapping.
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            yield path, b''
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            yield from _iter_segments(path, view)
+
+def _iter_member(name: str, data: bytes) -> Iterator[Tuple[str, bytes]]:
+    if is_pdf(name, data):
+        yield name, data
+    else:
+        yield from _iter_segments(name, data)
+
+def _iter_zip(path: str) -> Iterator[Tuple[str, bytes]]:
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if not info.is_dir() and is_transcript_name(info.filename):
+                yield from _iter_member(f"{path}/{info.filename}", archive.read(info))
+
+def _iter_tar(path: str) -> Iterator[Tuple[str, bytes]]:
+    # Stream mode reads members strictly in order, so compressed archives are never seeked or buffered
+    with tarfile.open(path, 'r|*') as archive:
+        for member in archive:
+            if member.isfile() and is_transcript_name(member.name):
+                yield from _iter_member(f"{path}/{member.name}", archive.extractfile(member).read())
+
+def _iter_file(path: str) -> Iterator[Tuple[str, bytes]]:
+    with open(path, 'rb') as file:
+        yield path, file.read()
+
+def _report(on_error: Optional[Callable[[str, Exception], None]], path: str, error: Exception):
+    # Hand a read failure to on_error, or raise it when there is none
+    if on_error is None:
+        raise error
+    on_error(path, error)
+
+def _guarded(path: str, items: Iterable[Tuple[str, bytes]], on_error: Optional[Callable[[str, Exception], None]]) -> Iterator[Tuple[str, bytes]]:
+    # items, up to the first error reading path
+    try:
+        yield from items
+    except Exception as e:
+        _report(on_error, path, e)
+
+def _iter_path(path: str, on_error: Optional[Callable[[str, Exception], None]] = None) -> Iterator[Tuple[str, bytes]]:
+    lowered = path.lower()
+    if os.path.isdir(path):
+        # A directory that can't be listed is reported like any other unreadable path
+        for root, dirs, files in os.walk(path, onerror=lambda error: _report(on_error, error.filename or path, error)):
+            dirs.sort()
+            for file_name in sorted(files):
+                yield from _iter_path(os.path.join(root, file_name), on_error)
+    elif not os.path.exists(path):
+        _report(on_error, path, FileNotFoundError("no such file or directory"))
+    elif lowered.endswith(zip_extensions):
+        yield from _guarded(path, _iter_zip(path), on_error)
+    elif lowered.endswith(tar_extensions):
+        yield from _guarded(path, _iter_tar(path), on_error)
+    elif lowered.endswith('.txt'):
+        yield from _guarded(path, _iter_text_file(path), on_error)
+    elif is_transcript_name(path):
+        yield from _guarded(path, _iter_file(path), on_error)
+
+def iter_transcript_files(sources, on_error: Optional[Callable[[str, Exception], None]] = None) -> Iterator[Tuple[str, bytes]]:
+    # Yields (name, raw bytes) one file at a time from directories, glob patterns, zip/tar
+    # archives, plain file paths, or uploaded file objects (anything with .name and .getvalue()/.read()).
+    # Text files on disk or in archives are split into one item per transcript; uploaded file
+    # objects are always one item each. A path that is missing, matches nothing or can't be read
+    # (a corrupt archive, say) raises, or with on_error is passed to on_error(path, error) and
+    # skipped; an archive read part-way keeps the members before the failure.
+    if isinstance(sources, (str, os.PathLike)) or hasattr(sources, 'read'):
+        sources = [sources]
+    for source in sources:
+        if isinstance(source, (str, os.PathLike)):
+            path = os.fspath(source)
+            if glob.has_magic(path):
+                matches = sorted(glob.iglob(path, recursive=True))
+                if not matches:
+                    _report(on_error, path, FileNotFoundError("no files match the pattern"))
+                for match in matches:
+                    yield from _iter_path(match, on_error)
+            else:
+                yield from _iter_path(path, on_error)
+        else:
+            name = getattr(source, 'name', '')
+            data = source.getvalue() if hasattr(source, 'getvalue') else source.read()
+            yield name, data
+
+def iter_transcript_texts(sources) -> Iterator[Tuple[str, str]]:
+    for name, data in iter_transcript_files(sources):
+        yield name, read_transcript_text(name, data)
+
+def parse_transcript_bytes(name: str, data: bytes, pdf_workers: Optional[int] = None) -> Dict[str, Union[str, List[Dict[str, str]]]]:
+    # Unreadable files give an error result rather than an exception
+    try:
+        content = read_transcript_text(name, data, pdf_workers)
+    except Exception as e:
+        return error_result(e)
+    return parse_transcript_safe(content)
+
+def parse_transcript_file(item: Tuple[str, bytes], pdf_workers: Optional[int] = 1) -> Tuple[Dict[str, Union[str, List[Dict[str, str]]]], int]:
+    # (result, PDF page count) for one (name, bytes) pair from iter_transcript_files. Meant to be
+    # mapped over a process pool, so by default each PDF is extracted in-process.
+    name, data = item
+    result = parse_transcript_bytes(name, data, pdf_workers)
+    pages = 0
+    if is_pdf(name, data) and "Error" not in result:
+        from utils.pdf_utils import count_pdf_pages
+        pages = count_pdf_pages(data)
+    return result, pages
+
+def iter_parse_transcripts(sources, cache=None) -> Iterator[Dict[str, Union[str, List[Dict[str, str]]]]]:
+    # Lazily parse every transcript in sources, in order. Only one file's bytes and text are alive
+    # at a time, so the result can feed create_client_summary directly on arbitrarily large backfills.
+    # With a ParseCache, files seen before are returned without extracting or parsing them again.
+    for name, data in iter_transcript_files(sources):
+        if cache is not None:
+            yield cache.get_or_parse(name, data)
+        else:
+            yield parse_transcript_bytes(name, data)
@@ -0,0 +1,261 @@
+# utils/transcript_store.py
+import datetime
+import os
+import uuid
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from utils.client_sum import get_tax_year
+from utils.common import amounts_to_cents, get_last_four_ssn
+from utils.transcript_model import to_dicts
+from utils.transcript_parser import transaction_keys
+
+# All three datasets are hive-partitioned by these columns, so a filter on either skips whole directories
+partition_schema = pa.schema([('tax_year', pa.string()), ('transcript_type', pa.string())])
+transcript_schema = pa.schema([
+    ('transcript_id', pa.string()),
+    ('batch_id', pa.string()),
+    ('position', pa.int32()),
+    ('ingested_at', pa.timestamp('us', tz='UTC')),
+    ('source_name', pa.string()),
+    ('ssn', pa.string()),
+    ('ssn_last_four', pa.string()),
+    ('tracking_number', pa.string()),
+    ('tax_period', pa.string()),
+    ('return_filed', pa.bool_()),
+    ('error', pa.string()),
+    ('tax_year', pa.string()),
+    ('transcript_type', pa.string()),
+])
+# One row per detail line, flat income value, form, or form amount, in transcript order ('seq').
+# 'section' is detail / income / form / form_income / form_withholding.
+line_item_schema = pa.schema([
+    ('transcript_id', pa.string()),
+    ('ssn_last_four', pa.string()),
+    ('seq', pa.int32()),
+    ('section', pa.string()),
+    ('form', pa.string()),
+    ('key', pa.string()),
+    ('value', pa.string()),
+    ('cents', pa.int64()),
+    ('tax_year', pa.string()),
+    ('transcript_type', pa.string()),
+])
+# One row per account transcript transaction line, in transcript order ('seq'). 'date' and
+# 'amount' are as printed; 'posted' and 'cents' are the parsed values (null when unparseable).
+transaction_schema = pa.schema([
+    ('transcript_id', pa.string()),
+    ('ssn_last_four', pa.string()),
+    ('seq', pa.int32()),
+    ('code', pa.string()),
+    ('explanation', pa.string()),
+    ('cycle', pa.string()),
+    ('date', pa.string()),
+    ('posted', pa.date32()),
+    ('amount', pa.string()),
+    ('cents', pa.int64()),
+    ('tax_year', pa.string()),
+    ('transcript_type', pa.string()),
+])
+account_types = ["Account Transcript", "Record of Account"]
+
+class TranscriptStore:
+    # Parsed transcripts persisted as three Parquet datasets under root: 'transcripts' (one row per
+    # transcript), 'line_items' (its details and income amounts) and 'transactions' (its
+    # transaction code lines). Every write_results call adds new files for its batch; nothing is
+    # rewritten. Reads push filters down to partitions and row groups and memory-map the files.
+
+    def __init__(self, root: str):
+        self.root = root
+        self.transcripts_path = os.path.join(root, 'transcripts')
+        self.line_items_path = os.path.join(root, 'line_items')
+        self.transactions_path = os.path.join(root, 'transactions')
+
+    def write_results(self, results: Iterable[Dict[str, object]], names: Optional[Sequence[str]] = None, batch_id: Optional[str] = None) -> str:
+        results = to_dicts(results)
+        batch_id = batch_id or uuid.uuid4().hex
+        ingested_at = datetime.datetime.now(datetime.timezone.utc)
+        transcripts = {field.name: [] for field in transcript_schema}
+        line_items = {field.name: [] for field in line_item_schema}
+        transactions = {field.name: [] for field in transaction_schema}
+        for position, result in enumerate(results):
+            transcript_id = f"{batch_id}:{position}"
+            last_four = get_last_four_ssn(result['SSN'])
+            tax_year = get_tax_year(result['Tax Period'])
+            transcript_type = result['Transcript Type']
+            transcripts['transcript_id'].append(transcript_id)
+            transcripts['batch_id'].append(batch_id)
+            transcripts['position'].append(position)
+            transcripts['ingested_at'].append(ingested_at)
+            transcripts['source_name'].append(names[position] if names is not None else None)
+            transcripts['ssn'].append(result['SSN'])
+            transcripts['ssn_last_four'].append(last_four)
+            transcripts['tracking_number'].append(result['Tracking Number'])
+            transcripts['tax_period'].append(result['Tax Period'])
+            transcripts['return_filed'].append(result['Return Filed'])
+            transcripts['error'].append(result.get('Error'))
+            transcripts['tax_year'].append(tax_year)
+            transcripts['transcript_type'].append(transcript_type)
+
+            rows = []
+            for detail in result['Details']:
+                for key, value in detail.items():
+                    rows.append(('detail', None, key, value))
+            for key, value in result['Income'].items():
+                if isinstance(value, dict):
+                    rows.append(('form', key, None, None))
+                    rows.extend(('form_income', key, field, amount) for field, amount in value.get('Income', {}).items())
+                    rows.extend(('form_withholding', key, field, amount) for field, amount in value.get('Withholdings', {}).items())
+                else:
+                    rows.append(('income', None, key, value))
+            for seq, (section, form, key, value) in enumerate(rows):
+                line_items['transcript_id'].append(transcript_id)
+                line_items['ssn_last_four'].append(last_four)
+                line_items['seq'].append(seq)
+                line_items['section'].append(section)
+                line_items['form'].append(form)
+                line_items['key'].append(key)
+                line_items['value'].append(value)
+                # Printed amounts for now; parsed together once the batch is collected
+                line_items['cents'].append(value if section != 'detail' else None)
+                line_items['tax_year'].append(tax_year)
+                line_items['transcript_type'].append(transcript_type)
+            for seq, transaction in enumerate(result.get('Transactions') or ()):
+                transactions['transcript_id'].append(transcript_id)
+                transactions['ssn_last_four'].append(last_four)
+                transactions['seq'].append(seq)
+                for key in transaction_keys:
+                    transactions[key.lower()].append(transaction[key])
+                transactions['posted'].append(_posted_date(transaction['Date']))
+                transactions['cents'].append(transaction['Amount'])
+                transactions['tax_year'].append(tax_year)
+                transactions['transcript_type'].append(transcript_type)
+
+        line_items['cents'] = _cents_column(line_items['cents'])
+        transactions['cents'] = _cents_column(transactions['cents'])
+        self._write(pa.Table.from_pydict(transcripts, schema=transcript_schema), self.transcripts_path, batch_id)
+        self._write(pa.Table.from_pydict(line_items, schema=line_item_schema), self.line_items_path, batch_id)
+        self._write(pa.Table.from_pydict(transactions, schema=transaction_schema), self.transactions_path, batch_id)
+        return batch_id
+
+    def _write(self, table: pa.Table, path: str, batch_id: str):
+        if table.num_rows == 0:
+            return
+        ds.write_dataset(
+            table, path, format='parquet',
+            partitioning=ds.partitioning(partition_schema, flavor='hive'),
+            basename_template=f"{batch_id}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore',
+        )
+
+    def _read(self, path: str, filters=None, columns: Optional[List[str]] = None) -> pa.Table:
+        schema = {self.transcripts_path: transcript_schema, self.transactions_path: transaction_schema}.get(path, line_item_schema)
+        if not os.path.isdir(path):
+            return schema.empty_table() if columns is None else schema.empty_table().select(columns)
+        return pq.read_table(
+            path, columns=columns, filters=filters, memory_map=True,
+            partitioning=ds.partitioning(partition_schema, flavor='hive'),
+        )
+
+    def read_transcripts(self, filters=None, columns: Optional[List[str]] = None) -> pa.Table:
+        # filters use the pyarrow.parquet form, e.g. [('ssn_last_four', '=', '2171'), ('tax_year', 'in', ['2021', '2022'])]
+        return self._read(self.transcripts_path, filters, columns)
+
+    def read_line_items(self, filters=None, columns: Optional[List[str]] = None) -> pa.Table:
+        return self._read(self.line_items_path, filters, columns)
+
+    def read_transactions(self, filters=None, columns: Optional[List[str]] = None) -> pa.Table:
+        # e.g. every lien across a client's years: [('ssn_last_four', '=', '2171'), ('code', '=', '582')]
+        return self._read(self.transactions_path, filters, columns)
+
+    def load_results(self, filters=None) -> List[Dict[str, object]]:
+        # Rebuild the parse_transcript dicts for the matching transcripts, oldest batch first
+        transcripts = self.read_transcripts(filters).sort_by([('ingested_at', 'ascending'), ('batch_id', 'ascending'), ('position', 'ascending')])
+        if transcripts.num_rows == 0:
+            return []
+        ids = transcripts.column('transcript_id').to_pylist()
+        # Partition filters narrow the line items to the same directories before the id filter runs
+        item_filters = [('transcript_id', 'in', ids)]
+        years = sorted(set(transcripts.column('tax_year').to_pylist()))
+        types = sorted(set(transcripts.column('transcript_type').to_pylist()))
+        item_filters += [('tax_year', 'in', years), ('transcript_type', 'in', types)]
+        items = self.read_line_items(item_filters, ['transcript_id', 'seq', 'section', 'form', 'key', 'value'])
+        items = items.sort_by([('transcript_id', 'ascending'), ('seq', 'ascending')])
+
+        bodies = {transcript_id: ([], {}, []) for transcript_id in ids}
+        for transcript_id, section, form, key, value in zip(*(items.column(name).to_pylist() for name in ('transcript_id', 'section', 'form', 'key', 'value'))):
+            details, income, _ = bodies[transcript_id]
+            if section == 'detail':
+                details.append({key: value})
+            elif section == 'income':
+                income[key] = value
+            elif section == 'form':
+                income[form] = {"Income": {}, "Withholdings": {}}
+            elif section == 'form_income':
+                income[form]["Income"][key] = value
+            else:
+                income[form]["Withholdings"][key] = value
+
+        # Stores written before transactions were kept have no transactions dataset; those
+        # transcripts come back with an empty list
+        transaction_rows = self.read_transactions(item_filters, ['transcript_id', 'seq'] + [key.lower() for key in transaction_keys])
+        transaction_rows = transaction_rows.sort_by([('transcript_id', 'ascending'), ('seq', 'ascending')])
+        for row in zip(*(transaction_rows.column(name).to_pylist() for name in ['transcript_id'] + [key.lower() for key in transaction_keys])):
+            bodies[row[0]][2].append(dict(zip(transaction_keys, row[1:])))
+
+        results = []
+        for row in transcripts.select(['transcript_id', 'transcript_type', 'tracking_number', 'tax_period', 'ssn', 'return_filed', 'error']).to_pylist():
+            details, income, transactions = bodies[row['transcript_id']]
+            result = {
+                "Transcript Type": row['transcript_type'],
+                "Tracking Number": row['tracking_number'],
+                "Tax Period": row['tax_period'],
+                "SSN": row['ssn'],
+                "Details": details,
+                "Income": income,
+                "Transactions": transactions,
+                "Return Filed": row['return_filed'],
+            }
+            if row['error'] is not None:
+                result["Error"] = row['error']
+            results.append(result)
+        return results
+
+    def unfiled_years(self, ssn_last_four: str) -> List[str]:
+        # Tax years whose latest stored account transcript for the client shows no filed return
+        table = self.read_transcripts(
+            [('ssn_last_four', '=', ssn_last_four), ('transcript_type', 'in', account_types)],
+            ['tax_year', 'return_filed', 'ingested_at', 'position'],
+        ).sort_by([('ingested_at', 'ascending'), ('position', 'ascending')])
+        latest = dict(zip(table.column('tax_year').to_pylist(), table.column('return_filed').to_pylist()))
+        return sorted(year for year, filed in latest.items() if not filed)
+
+def _posted_date(date: str) -> Optional[datetime.date]:
+    try:
+        return datetime.datetime.strptime(date, '%m-%d-%Y').date()
+    except ValueError:
+        return None
+
+def _cents_column(values: Sequence[Optional[str]]) -> pa.Array:
+    # amounts_to_cents over printed amounts; null where a value is missing or isn't an amount
+    import numpy as np
+    present = [position for position, value in enumerate(values) if value is not None]
+    cents = np.zeros(len(values), dtype=np.int64)
+    valid = np.zeros(len(values), dtype=bool)
+    cents[present], valid[present] = amounts_to_cents([values[position] for position in present])
+    return pa.array(cents, mask=~valid)
+
+_default_store = None
+
+def default_transcript_store(root: Optional[str] = None) -> Optional[TranscriptStore]:
+    # Persistence is opt-in: pass a root or set TAXRESO_STORE to a directory
+    global _default_store
+    root = root or os.environ.get("TAXRESO_STORE")
+    if not root:
+        return None
+    if _default_store is None or _default_store.root != root:
+        _default_store = TranscriptStore(root)
+    return _default_store